@@ -3,7 +3,7 @@ Image → caption logic
 
 """
 from typing import List
-from models.img_to_text_model import ImageToTextModel
+from models.interfaces import CaptionModel
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -13,7 +13,7 @@ class CaptionGenerator:
 
     """Handle caption generation from images"""
     
-    def __init__(self, model: ImageToTextModel):
+    def __init__(self, model: CaptionModel):
         
         """ Initialize caption generator """
         self.model = model
@@ -1,10 +1,11 @@
 """
 Text → embedding logic
 """
-from typing import List
+from typing import List, Optional
 import numpy as np
-from models.embedding_model import EmbeddingModel
+from models.interfaces import TextEmbeddingModel
 from utils.logger import setup_logger
+from utils.lru_cache import PersistentLRUCache, memoized_batch
 
 logger = setup_logger(__name__)
 
@@ -12,9 +13,10 @@ logger = setup_logger(__name__)
 class EmbeddingGenerator:
     """Handle embedding generation from normalized text"""
     
-    def __init__(self, model: EmbeddingModel):
-        """ Initialize embedding generator"""
+    def __init__(self, model: TextEmbeddingModel, cache: Optional[PersistentLRUCache] = None):
+        """ Initialize embedding generator (cache: optional normalized text → embedding cache)"""
         self.model = model
+        self.cache = cache
     
     def process_single(self, text: str) -> np.ndarray:
         
@@ -28,10 +30,16 @@ class EmbeddingGenerator:
     
     def process_batch(self, texts: List[str]) -> np.ndarray:
         """
-        Generate embeddings for batch of texts texts: List of normalized texts
+        Generate embeddings for batch of texts texts: List of normalized texts (each distinct text once)
         Returns:Array of embedding vectors
         """
-        logger.info(f"Generating embeddings for {len(texts)} texts")
-        embeddings = self.model.generate_embeddings_batch(texts)
+        logger.info(f"Generating embeddings for {len(texts)} texts ({len(set(texts))} distinct)")
+        if len(texts) == 0:
+            return self.model.generate_embeddings_batch(texts)
+        embeddings = np.stack(memoized_batch(texts, self._embed_distinct, self.cache))
         logger.debug(f"Embeddings shape: {embeddings.shape}")
         return embeddings
+    
+    def _embed_distinct(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed distinct texts, one owned row per text (cached rows must not pin the batch array)"""
+        return [row.copy() for row in self.model.generate_embeddings_batch(texts)]
@@ -0,0 +1,40 @@
+"""
+Image → CLIP embedding logic
+"""
+from typing import List
+import numpy as np
+from models.interfaces import ImageEmbeddingModel
+from utils.batching import create_batches
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class ImageEmbeddingGenerator:
+    """Handle CLIP image embedding generation for the CLIP image index"""
+
+    def __init__(self, model: ImageEmbeddingModel, embedding_dim: int, batch_size: int = 64):
+        """ Initialize image embedding generator (batch_size: images per model call)"""
+        self.model = model
+        self.embedding_dim = embedding_dim
+        self.batch_size = batch_size
+
+    def process_batch(self, image_paths: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for batch of images from image_paths: List of image paths
+        Returns: Array of embedding vectors (all-zero rows for images that could not be read)
+        """
+        logger.info(f"Generating CLIP image embeddings for {len(image_paths)} images")
+        if len(image_paths) == 0:
+            return np.zeros((0, self.embedding_dim), dtype='float32')
+        return np.concatenate([self._embed(batch) for batch in create_batches(image_paths, self.batch_size)])
+
+    def _embed(self, image_paths: List[str]) -> np.ndarray:
+        """Embed one model batch, image by image when it fails so one bad file does not cost the batch"""
+        try:
+            return self.model.encode_images(image_paths).astype('float32')
+        except Exception as e:
+            if len(image_paths) > 1:
+                return np.concatenate([self._embed([image_path]) for image_path in image_paths])
+            logger.error(f"Failed to embed {image_paths[0]}: {e}")
+            return np.zeros((1, self.embedding_dim), dtype='float32')
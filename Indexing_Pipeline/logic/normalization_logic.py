@@ -2,9 +2,10 @@
 Caption → normalized text logic
 
 """
-from typing import List
-from models.text_norm_model import TextNormalizationModel
+from typing import List, Optional
+from models.interfaces import NormalizationModel
 from utils.logger import setup_logger
+from utils.lru_cache import PersistentLRUCache, memoized_batch
 
 logger = setup_logger(__name__)
 
@@ -12,9 +13,10 @@ logger = setup_logger(__name__)
 class TextNormalizer:
     """Handle text normalization from captions"""
     
-    def __init__(self, model: TextNormalizationModel):
-        """Initialize text normalizer """
+    def __init__(self, model: NormalizationModel, cache: Optional[PersistentLRUCache] = None):
+        """Initialize text normalizer (cache: optional caption → normalized text cache)"""
         self.model = model
+        self.cache = cache
     
     def process_single(self, caption: str) -> str:
         """
@@ -28,9 +30,9 @@ class TextNormalizer:
     
     def process_batch(self, captions: List[str]) -> List[str]:
         """
-        Normalize batch of captions
+        Normalize batch of captions (each distinct caption once)
         Returns:List of normalized texts
         """
-        logger.info(f"Normalizing {len(captions)} captions")
-        normalized_texts = self.model.normalize_texts_batch(captions)
+        logger.info(f"Normalizing {len(captions)} captions ({len(set(captions))} distinct)")
+        normalized_texts = memoized_batch(captions, self.model.normalize_texts_batch, self.cache)
         return normalized_texts
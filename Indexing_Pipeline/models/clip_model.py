@@ -0,0 +1,131 @@
+"""
+CLIP text / image encoder
+
+Shared by the Retrieval Pipeline's reranker and CLIP first stage and by the
+Indexing Pipeline's CLIP image index and zero-shot tagger, so queries and images
+are embedded by the same code.
+"""
+import os
+import importlib.util
+import torch
+from transformers import CLIPProcessor, CLIPModel
+from PIL import Image
+from typing import List
+import numpy as np
+
+# Import batching utilities by path (this module is also loaded by the Retrieval Pipeline)
+batching_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utils', 'batching.py')
+spec = importlib.util.spec_from_file_location("indexing_batching", batching_path)
+batching = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(batching)
+
+
+class CLIPEncoder:
+    """CLIP model wrapper encoding text queries and images into one embedding space"""
+    
+    def __init__(self, model_path: str, device: str = "cuda", max_batch_tokens: int = 8192):
+        """
+        Initialize CLIP model
+        
+        Args:
+            model_path: Path or name of CLIP model
+            device: Device to run model on ('cuda' or 'cpu')
+            max_batch_tokens: Padded text tokens per forward pass (batch size x longest text)
+        """
+        self.device = device if torch.cuda.is_available() and device == "cuda" else "cpu"
+        self.max_batch_tokens = max_batch_tokens
+        
+        print(f"Loading CLIP model on {self.device}...")
+        self.model = CLIPModel.from_pretrained(model_path).to(self.device)
+        self.processor = CLIPProcessor.from_pretrained(model_path)
+        self.model.eval()
+        
+    def encode_text(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode text queries into embeddings
+        
+        Many texts are grouped by token length into forward passes of at most
+        max_batch_tokens padded tokens and returned in input order.
+        
+        Args:
+            texts: List of text queries
+            
+        Returns:
+            Text embeddings as numpy array
+        """
+        if len(texts) == 0:
+            return np.zeros((0, self.model.config.projection_dim), dtype=np.float32)
+        
+        tokenizer = self.processor.tokenizer
+        encoded = tokenizer(texts, truncation=True)
+        features = [{k: encoded[k][i] for k in encoded.keys()} for i in range(len(texts))]
+        lengths = [len(ids) for ids in encoded['input_ids']]
+        return np.stack(batching.run_token_budget_batches(features, lengths, self._encode_tokenized,
+                                                          self.max_batch_tokens))
+    
+    def _encode_tokenized(self, features: List[dict]) -> np.ndarray:
+        """Encode one length bucket of tokenized texts"""
+        with torch.no_grad():
+            inputs = self.processor.tokenizer.pad(features, return_tensors="pt")
+            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            text_features = self.model.get_text_features(**inputs)
+            # Normalize features
+            text_features = text_features / text_features.norm(p=2, dim=-1, keepdim=True)
+            return text_features.cpu().numpy()
+    
+    def load_images(self, image_paths: List[str]) -> List[Image.Image]:
+        """
+        Decode images from disk
+        
+        Args:
+            image_paths: List of image file paths
+            
+        Returns:
+            List of RGB PIL images
+        """
+        return [Image.open(img_path).convert("RGB") for img_path in image_paths]
+    
+    def encode_images(self, image_paths: List[str]) -> np.ndarray:
+        """
+        Encode images into embeddings
+        
+        Args:
+            image_paths: List of image file paths
+            
+        Returns:
+            Image embeddings as numpy array
+        """
+        return self.encode_pil_images(self.load_images(image_paths))
+    
+    def encode_pil_images(self, images: List[Image.Image]) -> np.ndarray:
+        """
+        Encode decoded images into embeddings
+        
+        Args:
+            images: List of RGB PIL images
+            
+        Returns:
+            Image embeddings as numpy array
+        """
+        with torch.no_grad():
+            inputs = self.processor(images=images, return_tensors="pt", padding=True)
+            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            image_features = self.model.get_image_features(**inputs)
+            # Normalize features
+            image_features = image_features / image_features.norm(p=2, dim=-1, keepdim=True)
+            return image_features.cpu().numpy()
+    
+    def compute_similarity(self, text_embeddings: np.ndarray, image_embeddings: np.ndarray) -> np.ndarray:
+        """
+        Compute similarity scores between text and images
+        
+        Args:
+            text_embeddings: Text embeddings (1, dim)
+            image_embeddings: Image embeddings (N, dim)
+            
+        Returns:
+            Similarity scores (N,)
+        """
+        # Compute cosine similarity (dot product of normalized vectors)
+        scores = np.dot(text_embeddings, image_embeddings.T).squeeze()
+        return scores
@@ -0,0 +1,144 @@
+"""
+Early stopping and constrained decoding for the Qwen generators
+
+- TokenCountStoppingCriteria ends a sequence once it has generated a number
+  of tokens from a set (sentence ends, newlines, keyword separators), so a
+  one-sentence caption or a keyword list does not run to max_new_tokens.
+- KeywordGrammar restricts generation to vocabulary phrases joined by a
+  separator (e.g. "yellow | raincoat | city street") through
+  generate(prefix_allowed_tokens_fn=...).
+
+Token sets are computed once per tokenizer from the decoded vocabulary.
+"""
+from typing import Dict, Iterable, List
+import torch
+from transformers import StoppingCriteria
+
+
+def token_ids_matching(tokenizer, predicate) -> List[int]:
+    """
+    Ids of the vocabulary tokens whose decoded text satisfies predicate
+
+    Args:
+        tokenizer: HF tokenizer
+        predicate: Function of the decoded token text
+
+    Returns:
+        Sorted token ids (special tokens such as <|im_end|> are never included)
+    """
+    special_ids = set(tokenizer.all_special_ids)
+    return [
+        token_id for token_id in range(len(tokenizer))
+        if token_id not in special_ids and predicate(tokenizer.decode([token_id]))
+    ]
+
+
+def sentence_end_token_ids(tokenizer) -> List[int]:
+    """Tokens that end a sentence ('.', '!', '?' at the end of the token) or contain a newline"""
+    return token_ids_matching(tokenizer, lambda text: text.rstrip(' ').endswith(('.', '!', '?')) or '\n' in text)
+
+
+def newline_token_ids(tokenizer) -> List[int]:
+    """Tokens that contain a newline"""
+    return token_ids_matching(tokenizer, lambda text: '\n' in text)
+
+
+class TokenCountStoppingCriteria(StoppingCriteria):
+    """Stop each sequence once it generated max_count tokens from a token set"""
+
+    def __init__(self, token_ids: Iterable[int], max_count: int, prompt_length: int):
+        """
+        Initialize criteria
+
+        Args:
+            token_ids: Counted tokens
+            max_count: Sequence is done at this many counted tokens
+            prompt_length: Padded prompt length (only generated tokens are counted)
+        """
+        self.token_ids = torch.tensor(sorted(set(token_ids)), dtype=torch.long)
+        self.max_count = max_count
+        self.prompt_length = prompt_length
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        generated = input_ids[:, self.prompt_length:]
+        counts = torch.isin(generated, self.token_ids.to(generated.device)).sum(dim=1)
+        return counts >= self.max_count
+
+
+class _TrieNode:
+    __slots__ = ('children', 'terminal')
+
+    def __init__(self):
+        self.children: Dict[int, '_TrieNode'] = {}
+        self.terminal = False
+
+
+class KeywordGrammar:
+    """Token-level grammar: phrase (separator phrase)* EOS, phrases from a fixed vocabulary"""
+
+    def __init__(self, tokenizer, phrases: Iterable[str], separator: str = " |"):
+        """
+        Build the phrase tries
+
+        Args:
+            tokenizer: HF tokenizer of the generating model
+            phrases: Allowed keywords (e.g. the fashion vocabulary)
+            separator: Text between keywords, before the next keyword's leading space
+        """
+        self.separator = tokenizer.encode(separator, add_special_tokens=False)
+        self.eos_token_id = tokenizer.eos_token_id
+        # The first keyword may start with or without a space, later ones follow "<separator> "
+        self.first_root = _TrieNode()
+        self.next_root = _TrieNode()
+        for phrase in phrases:
+            for root, text in ((self.first_root, phrase), (self.first_root, f" {phrase}"),
+                               (self.next_root, f" {phrase}")):
+                node = root
+                for token_id in tokenizer.encode(text, add_special_tokens=False):
+                    node = node.children.setdefault(token_id, _TrieNode())
+                node.terminal = True
+
+    def allowed_tokens(self, generated: List[int]) -> List[int]:
+        """
+        Tokens that may follow the generated ones
+
+        Args:
+            generated: Tokens generated so far (without the prompt)
+
+        Returns:
+            Allowed token ids (EOS only once the output cannot be continued)
+        """
+        node, separator_pos = self.first_root, None
+        for token_id in generated:
+            if separator_pos is not None:
+                if token_id != self.separator[separator_pos]:
+                    return [self.eos_token_id]
+                separator_pos += 1
+                if separator_pos == len(self.separator):
+                    node, separator_pos = self.next_root, None
+            elif token_id in node.children:
+                node = node.children[token_id]
+            elif node.terminal and token_id == self.separator[0]:
+                separator_pos = 1
+                if separator_pos == len(self.separator):
+                    node, separator_pos = self.next_root, None
+            else:
+                return [self.eos_token_id]
+
+        if separator_pos is not None:
+            return [self.separator[separator_pos]]
+        allowed = list(node.children)
+        if node.terminal:
+            allowed += [self.separator[0], self.eos_token_id]
+        return allowed or [self.eos_token_id]
+
+    def prefix_allowed_tokens_fn(self, prompt_length: int):
+        """
+        Callback for generate(prefix_allowed_tokens_fn=...)
+
+        Args:
+            prompt_length: Padded prompt length of the batch
+        """
+        def allowed(batch_id: int, input_ids: torch.Tensor) -> List[int]:
+            return self.allowed_tokens(input_ids[prompt_length:].tolist())
+        return allowed
@@ -1,22 +1,34 @@
 """
 BAGE embedding wrapper for text to vector conversion
 """
+import os
+import importlib.util
 from transformers import AutoTokenizer, AutoModel
 import torch
 import torch.nn.functional as F
 from typing import List
 import numpy as np
 
+# Import batching utilities by path (this module is also loaded by the Retrieval Pipeline)
+batching_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utils', 'batching.py')
+spec = importlib.util.spec_from_file_location("indexing_batching", batching_path)
+batching = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(batching)
+
 
 class EmbeddingModel:
     """Wrapper for BAAI/bge-large-en-v1.5 model"""
     
-    def __init__(self, model_path: str, device: str = "cuda"):
+    def __init__(self, model_path: str, device: str = "cuda", max_length: int = 512, max_batch_tokens: int = 16384):
         """
         Initialize the embedding model
         device: Device to run model on (cuda/cpu)
+        max_length: Texts are truncated to this many tokens
+        max_batch_tokens: Padded tokens per forward pass (batch size x longest text)
         """
         self.device = device
+        self.max_length = max_length
+        self.max_batch_tokens = max_batch_tokens
         self.tokenizer = AutoTokenizer.from_pretrained(model_path)
         self.model = AutoModel.from_pretrained(model_path)
         self.model.to(device)
@@ -32,7 +44,7 @@ class EmbeddingModel:
             text, 
             padding=True, 
             truncation=True, 
-            max_length=512,
+            max_length=self.max_length,
             return_tensors='pt'
         )
         encoded_input = {k: v.to(self.device) for k, v in encoded_input.items()}
@@ -52,17 +64,27 @@ class EmbeddingModel:
     def generate_embeddings_batch(self, texts: List[str]) -> np.ndarray:
         """
         Generate embeddings for multiple texts
+        
+        Texts are tokenized once, grouped by token length into forward passes of
+        at most max_batch_tokens padded tokens, and returned in input order.
         Returns: Array of embedding vectors
         """
+        if len(texts) == 0:
+            return np.zeros((0, self.model.config.hidden_size), dtype=np.float32)
         
-        # Tokenize batch
-        encoded_input = self.tokenizer(
-            texts,
-            padding=True,
-            truncation=True,
-            max_length=512,
-            return_tensors='pt'
+        # Tokenize without padding; each length bucket is padded to its own longest text
+        encoded = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+        features = [{k: encoded[k][i] for k in encoded.keys()} for i in range(len(texts))]
+        lengths = [len(ids) for ids in encoded['input_ids']]
+        
+        embeddings = batching.run_token_budget_batches(
+            features, lengths, self._embed_encoded, self.max_batch_tokens
         )
+        return np.stack(embeddings)
+    
+    def _embed_encoded(self, features: List[dict]) -> np.ndarray:
+        """Embed one length bucket of tokenized texts"""
+        encoded_input = self.tokenizer.pad(features, return_tensors='pt')
         encoded_input = {k: v.to(self.device) for k, v in encoded_input.items()}
         
         # Generate embeddings
@@ -1,18 +1,39 @@
 """
 Qwen2-VL wrapper for image to text caption generation
 """
-from transformers import Qwen2VLForConditionalGeneration, AutoProcessor
+import hashlib
+import os
+import importlib.util
+from transformers import Qwen2VLForConditionalGeneration, AutoProcessor, StoppingCriteriaList
 from qwen_vl_utils import process_vision_info
 import torch
 from PIL import Image
-from typing import List, Union
+from typing import List, Optional, Union
+
+# Import decoding helpers by path (shared with the normalization model)
+decoding_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'decoding.py')
+spec = importlib.util.spec_from_file_location("decoding", decoding_path)
+decoding = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(decoding)
 
 
 class ImageToTextModel:
 
     """Wrapper for Qwen2-VL-2B-Instruct model"""
     
-    def __init__(self, model_path: str, device: str = "cuda"):
+    # Cached captions are keyed by version: bump PROMPT_VERSION when the prompt or generation settings change
+    PROMPT_VERSION = 1
+    CAPTION_PROMPT = "You are a professional fashion image caption generator for an intelligent fashion search engine. Describe the image in ONE clear, short, and accurate sentence. Include ONLY the following if clearly visible: Upper body clothing with type and color (e.g., black shirt). Lower body clothing with type and color (e.g., blue jeans). Visible accessories with color (e.g., red tie, black hat). Background or environment if relevant (e.g., office, indoor, city street, park). Posture or action if visible (e.g., standing, walking, sitting). Rules: Focus only on visible and factual details. Do NOT guess, infer, or add extra information. Do NOT describe emotions, style, or intent."
+    # Single-pass mode: emit the normalized ' | ' keyword list directly (no text normalization model)
+    KEYWORDS_PROMPT = "You are a fashion search engine keyword extraction model. List ONLY the fashion keywords that are clearly visible in the image, separated by ' | '. Rules: 1. Clothing items and accessories (e.g., shirt, jacket, raincoat, pants, jeans, tie). 2. Their colors, each as its own keyword, ONLY if clearly visible. 3. Environment or setting ONLY if clearly visible and relevant (e.g., office, park, indoor, city street). 4. Do NOT guess or infer missing information. 5. Do NOT write sentences, explanations or non-fashion words. 6. Output ONE line. Example output: yellow | raincoat | black | pants | city street"
+    CAPTION_MODES = ('sentence', 'keywords')
+    MAX_NEW_TOKENS = 128
+    # Config keys that change the captions (passed to version_for by the registry)
+    VERSION_CONFIG_KEYS = ('min_pixels', 'max_pixels', 'max_sentences', 'caption_mode')
+    
+    def __init__(self, model_path: str, device: str = "cuda",
+                 min_pixels: Optional[int] = None, max_pixels: Optional[int] = None, max_sentences: int = 0,
+                 caption_mode: str = "sentence"):
 
         """
 
@@ -21,18 +42,81 @@ class ImageToTextModel:
         Args:
             model_path: Path to the local model
             device: Device to run model on (cuda/cpu)
+            min_pixels: Smaller images are upscaled to this area before tokenization
+            max_pixels: Larger images are downscaled to this area (one visual token per 28x28 pixels)
+            max_sentences: Stop generating after this many sentences (0 = up to MAX_NEW_TOKENS)
+            caption_mode: 'sentence' (caption for the normalizer) or 'keywords' (normalized text directly)
 
         """
+        if caption_mode not in self.CAPTION_MODES:
+            raise ValueError(f"Unknown caption_mode '{caption_mode}', expected one of {self.CAPTION_MODES}")
         self.device = device
+        self.model_path = model_path
+        self.min_pixels = min_pixels
+        self.max_pixels = max_pixels
+        self.max_sentences = max_sentences
+        self.caption_mode = caption_mode
         self.model = Qwen2VLForConditionalGeneration.from_pretrained(
             model_path,
             torch_dtype=torch.float16 if device == "cuda" else torch.float32,
             device_map="auto" if device == "cuda" else None
         )
-        self.processor = AutoProcessor.from_pretrained(model_path)
+        pixel_limits = {k: v for k, v in (('min_pixels', min_pixels), ('max_pixels', max_pixels)) if v}
+        self.processor = AutoProcessor.from_pretrained(model_path, **pixel_limits)
         
         if device == "cpu":
             self.model.to(device)
+        
+        # Stop tokens for both modes, so caption_mode can be switched on a loaded model
+        self.sentence_end_ids = decoding.sentence_end_token_ids(self.processor.tokenizer)
+        self.newline_ids = decoding.newline_token_ids(self.processor.tokenizer)
+    
+    @classmethod
+    def version_for(cls, model_path: str, min_pixels: Optional[int] = None, max_pixels: Optional[int] = None,
+                    max_sentences: int = 0, caption_mode: str = "sentence") -> str:
+        """Model / prompt / resolution / decoding version of the captions this class produces"""
+        prompt = cls.KEYWORDS_PROMPT if caption_mode == 'keywords' else cls.CAPTION_PROMPT
+        prompt_hash = hashlib.sha1(f"{prompt}|{cls.MAX_NEW_TOKENS}".encode('utf-8')).hexdigest()[:8]
+        version = f"qwen2-vl:{model_path}:prompt-v{cls.PROMPT_VERSION}-{prompt_hash}"
+        if min_pixels or max_pixels:
+            version += f":px{min_pixels or 0}-{max_pixels or 0}"
+        if caption_mode == 'keywords':
+            version += ":keywords"
+        elif max_sentences:
+            version += f":s{max_sentences}"
+        return version
+    
+    @property
+    def version(self) -> str:
+        """Model / prompt / resolution / decoding version of this instance's captions"""
+        return self.version_for(self.model_path, self.min_pixels, self.max_pixels, self.max_sentences,
+                                self.caption_mode)
+    
+    def load_image(self, image_path: str) -> Image.Image:
+        """
+        Decode an image, already reduced to max_pixels
+        
+        JPEGs are decoded at a reduced DCT scale (1/2 .. 1/8) that still covers
+        max_pixels, so large product photos are never decoded at full size.
+        
+        Args:
+            image_path: Path to the image file
+        
+        Returns:
+            RGB image with at most max_pixels pixels (any size when max_pixels is unset)
+        """
+        image = Image.open(image_path)
+        if self.max_pixels:
+            scale = (self.max_pixels / (image.width * image.height)) ** 0.5
+            if scale < 1:
+                image.draft('RGB', (int(image.width * scale) + 1, int(image.height * scale) + 1))
+        image = image.convert('RGB')
+        
+        if self.max_pixels and image.width * image.height > self.max_pixels:
+            scale = (self.max_pixels / (image.width * image.height)) ** 0.5
+            size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+            image = image.resize(size, Image.BICUBIC)
+        return image
     
     def generate_caption(self, image_path: str) -> str:
         """
@@ -42,11 +126,15 @@ class ImageToTextModel:
             image_path: Path to the image file
         
         Returns:
-            Generated caption describing fashion items
+            Generated caption describing fashion items ('a | b | c' keywords in keywords mode)
         """
-        # Load image
+        # Load image (pre-resized to the vision-token budget)
         
-        image = Image.open(image_path).convert('RGB')
+        image_content = {"type": "image", "image": self.load_image(image_path)}
+        if self.min_pixels:
+            image_content["min_pixels"] = self.min_pixels
+        if self.max_pixels:
+            image_content["max_pixels"] = self.max_pixels
         
         # Prepare prompt for fashion description
 
@@ -54,12 +142,9 @@ class ImageToTextModel:
             {
                 "role": "user",
                 "content": [
-                    {
-                        "type": "image",
-                        "image": image_path,
-                    },
+                    image_content,
                     {"type": "text",
-                        "text": "You are a professional fashion image caption generator for an intelligent fashion search engine. Describe the image in ONE clear, short, and accurate sentence. Include ONLY the following if clearly visible: Upper body clothing with type and color (e.g., black shirt). Lower body clothing with type and color (e.g., blue jeans). Visible accessories with color (e.g., red tie, black hat). Background or environment if relevant (e.g., office, indoor, city street, park). Posture or action if visible (e.g., standing, walking, sitting). Rules: Focus only on visible and factual details. Do NOT guess, infer, or add extra information. Do NOT describe emotions, style, or intent."
+                        "text": self.KEYWORDS_PROMPT if self.caption_mode == 'keywords' else self.CAPTION_PROMPT
                     },
                 ],
             }
@@ -86,8 +171,20 @@ class ImageToTextModel:
         
         # Generate
 
+        # Stop at the end of the keyword line / requested sentences instead of running to MAX_NEW_TOKENS
+        stopping_criteria = None
+        if self.caption_mode == 'keywords':
+            stopping_criteria = StoppingCriteriaList([decoding.TokenCountStoppingCriteria(
+                self.newline_ids, 1, inputs.input_ids.shape[1]
+            )])
+        elif self.max_sentences:
+            stopping_criteria = StoppingCriteriaList([decoding.TokenCountStoppingCriteria(
+                self.sentence_end_ids, self.max_sentences, inputs.input_ids.shape[1]
+            )])
+        
         with torch.no_grad():
-            generated_ids = self.model.generate(**inputs, max_new_tokens=128)
+            generated_ids = self.model.generate(**inputs, max_new_tokens=self.MAX_NEW_TOKENS,
+                                                stopping_criteria=stopping_criteria)
         
         generated_ids_trimmed = [
             out_ids[len(in_ids):] for in_ids, out_ids in zip(inputs.input_ids, generated_ids)
@@ -97,6 +194,9 @@ class ImageToTextModel:
             generated_ids_trimmed, skip_special_tokens=True, clean_up_tokenization_spaces=False
         )
         
+        if self.caption_mode == 'keywords':
+            lines = output_text[0].strip().splitlines()
+            return lines[0].strip().rstrip('|').strip() if lines else ""
         return output_text[0]
     
     def generate_captions_batch(self, image_paths: List[str]) -> List[str]:
@@ -0,0 +1,51 @@
+"""
+Model interfaces used by the pipeline logic
+
+The logic classes only call the methods below, so any object providing them
+(HF wrappers, lightweight models, test doubles) can be plugged in through the
+model registry. This module has no dependencies so the Retrieval Pipeline can
+load it by path.
+"""
+from typing import List, Protocol, runtime_checkable
+import numpy as np
+
+
+@runtime_checkable
+class CaptionModel(Protocol):
+    """Image → caption"""
+
+    def generate_caption(self, image_path: str) -> str:
+        ...
+
+    def generate_captions_batch(self, image_paths: List[str]) -> List[str]:
+        ...
+
+
+@runtime_checkable
+class NormalizationModel(Protocol):
+    """Caption or query → ' | ' separated fashion keywords"""
+
+    def normalize_text(self, caption: str) -> str:
+        ...
+
+    def normalize_texts_batch(self, captions: List[str]) -> List[str]:
+        ...
+
+
+@runtime_checkable
+class TextEmbeddingModel(Protocol):
+    """Normalized text → L2-normalized embedding"""
+
+    def generate_embedding(self, text: str) -> np.ndarray:
+        ...
+
+    def generate_embeddings_batch(self, texts: List[str]) -> np.ndarray:
+        ...
+
+
+@runtime_checkable
+class ImageEmbeddingModel(Protocol):
+    """Image → L2-normalized embedding in a joint text / image space (CLIP)"""
+
+    def encode_images(self, image_paths: List[str]) -> np.ndarray:
+        ...
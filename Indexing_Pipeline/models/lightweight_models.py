@@ -0,0 +1,160 @@
+"""
+Deterministic lightweight models
+
+Drop-in replacements for the HF models that run in microseconds on CPU and need
+no downloads. They make load tests and perf runs of the pipelines possible on a
+bare machine; their output is only meaningful for the shared fashion vocabulary.
+
+This module only depends on numpy so it can be loaded by the Retrieval Pipeline.
+"""
+import hashlib
+import os
+import re
+import importlib.util
+from typing import List
+import numpy as np
+
+# Import vocabulary by path (shared with the Retrieval Pipeline)
+vocabulary_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utils', 'fashion_vocabulary.py')
+spec = importlib.util.spec_from_file_location("fashion_vocabulary", vocabulary_path)
+fashion_vocabulary = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(fashion_vocabulary)
+
+
+def token_vector(token: str, dim: int) -> np.ndarray:
+    """
+    Deterministic pseudo-random unit vector for a token
+
+    Args:
+        token: Any string
+        dim: Vector dimension
+
+    Returns:
+        float32 unit vector, identical across runs and machines
+    """
+    seed = int.from_bytes(hashlib.md5(token.encode('utf-8')).digest()[:8], 'little')
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def text_vector(text: str, dim: int) -> np.ndarray:
+    """
+    Bag-of-words embedding: sum of token vectors, L2-normalized
+
+    Args:
+        text: Text to embed ('|' separators are ignored)
+        dim: Vector dimension
+
+    Returns:
+        float32 unit vector
+    """
+    tokens = re.findall(r"[a-z0-9\-]+", fashion_vocabulary.canonicalize(text)) or [""]
+    vector = np.sum([token_vector(token, dim) for token in tokens], axis=0)
+    return (vector / (np.linalg.norm(vector) + 1e-12)).astype(np.float32)
+
+
+class FilenameCaptionModel:
+    """Captioner that reads vocabulary words from the image file name (e.g. yellow_raincoat_01.jpg)"""
+
+    VERSION = "filename-v1"
+    VERSION_CONFIG_KEYS = ('caption_mode',)
+
+    def __init__(self, model_path: str = "", device: str = "cpu", caption_mode: str = "sentence"):
+        self.device = device
+        self.caption_mode = caption_mode
+
+    @classmethod
+    def version_for(cls, model_path: str = "", caption_mode: str = "sentence") -> str:
+        return f"{cls.VERSION}:keywords" if caption_mode == 'keywords' else cls.VERSION
+
+    @property
+    def version(self) -> str:
+        return self.version_for(caption_mode=self.caption_mode)
+
+    def generate_caption(self, image_path: str) -> str:
+        stem = os.path.splitext(os.path.basename(image_path))[0].replace('_', ' ')
+        keywords = fashion_vocabulary.extract_keywords(stem)
+        if self.caption_mode == 'keywords':
+            return " | ".join(keywords)
+        if not keywords:
+            return "A person in an image."
+        return f"A person wearing {' '.join(keywords)}."
+
+    def generate_captions_batch(self, image_paths: List[str]) -> List[str]:
+        return [self.generate_caption(image_path) for image_path in image_paths]
+
+
+class RuleBasedNormalizationModel:
+    """Normalizer that keeps the vocabulary words of the caption, joined with ' | '"""
+
+    VERSION = "rules-v1"
+
+    def __init__(self, model_path: str = "", device: str = "cpu"):
+        self.device = device
+
+    @classmethod
+    def version_for(cls, model_path: str = "") -> str:
+        return cls.VERSION
+
+    @property
+    def version(self) -> str:
+        return self.VERSION
+
+    def normalize_text(self, caption: str) -> str:
+        return " | ".join(fashion_vocabulary.extract_keywords(caption))
+
+    def normalize_texts_batch(self, captions: List[str]) -> List[str]:
+        return [self.normalize_text(caption) for caption in captions]
+
+
+class HashEmbeddingModel:
+    """Embedder that sums hashed token vectors (same texts always give the same vector)"""
+
+    def __init__(self, model_path: str = "", device: str = "cpu", embedding_dim: int = 1024):
+        self.device = device
+        self.embedding_dim = embedding_dim
+
+    def generate_embedding(self, text: str) -> np.ndarray:
+        return text_vector(text, self.embedding_dim)
+
+    def generate_embeddings_batch(self, texts: List[str]) -> np.ndarray:
+        if len(texts) == 0:
+            return np.zeros((0, self.embedding_dim), dtype=np.float32)
+        return np.stack([self.generate_embedding(text) for text in texts])
+
+
+class HashCLIPModel:
+    """
+    Hash-based text / image encoder with the CLIPEncoder interface
+
+    Images are never decoded: an image is embedded from the vocabulary words in its
+    file name (e.g. yellow_raincoat_01.jpg), with the same hashed token vectors as
+    the text side, so rankings are reproducible and cost microseconds on CPU.
+    """
+
+    def __init__(self, model_path: str = "", device: str = "cpu", embedding_dim: int = 768):
+        self.device = "cpu"
+        self.embedding_dim = embedding_dim
+
+    def encode_text(self, texts: List[str]) -> np.ndarray:
+        return np.stack([text_vector(text, self.embedding_dim) for text in texts])
+
+    def load_images(self, image_paths: List[str]) -> List[str]:
+        # Nothing to decode, the file name is the image content
+        return list(image_paths)
+
+    def encode_pil_images(self, images: List[str]) -> np.ndarray:
+        vectors = []
+        for image_path in images:
+            stem = os.path.splitext(os.path.basename(str(image_path)))[0].replace('_', ' ')
+            keywords = fashion_vocabulary.extract_keywords(stem)
+            # Unknown names still get a stable, distinct vector
+            text = " ".join(keywords) if keywords else str(image_path)
+            vectors.append(text_vector(text, self.embedding_dim))
+        return np.stack(vectors)
+
+    def encode_images(self, image_paths: List[str]) -> np.ndarray:
+        return self.encode_pil_images(self.load_images(image_paths))
+
+    def compute_similarity(self, text_embeddings: np.ndarray, image_embeddings: np.ndarray) -> np.ndarray:
+        return np.dot(text_embeddings, image_embeddings.T).squeeze()
@@ -0,0 +1,201 @@
+"""
+Model registry
+
+Maps the `backend` key of each `models.<role>` config section to a builder.
+Builders import their module lazily, so choosing a lightweight backend never
+imports torch / transformers.
+
+    models:
+      embedding:
+        backend: "hash"        # bge (default) | hash
+
+This module only depends on the standard library so the Retrieval Pipeline can
+load it by path and extend it.
+"""
+import os
+import importlib.util
+from typing import Callable, Dict
+
+models_dir = os.path.dirname(os.path.abspath(__file__))
+_modules = {}
+
+
+def _load_module(module_name: str):
+    """Import a module of this package by path (once)"""
+    if module_name not in _modules:
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(models_dir, f"{module_name}.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _modules[module_name] = module
+    return _modules[module_name]
+
+
+def _build_qwen_vl(config: dict):
+    return _load_module("img_to_text_model").ImageToTextModel(
+        model_path=config['path'],
+        device=config['device'],
+        min_pixels=config.get('min_pixels'),
+        max_pixels=config.get('max_pixels'),
+        max_sentences=config.get('max_sentences', 0),
+        caption_mode=config.get('caption_mode', 'sentence')
+    )
+
+
+def _build_qwen_normalizer(config: dict):
+    return _load_module("text_norm_model").TextNormalizationModel(
+        model_path=config['path'],
+        device=config['device'],
+        max_batch_tokens=config.get('max_batch_tokens', 8192),
+        max_keywords=config.get('max_keywords', 0),
+        constrained=config.get('constrained', False)
+    )
+
+
+def _build_bge(config: dict):
+    return _load_module("embedding_model").EmbeddingModel(
+        model_path=config['path'],
+        device=config['device'],
+        max_length=config.get('max_length', 512),
+        max_batch_tokens=config.get('max_batch_tokens', 16384)
+    )
+
+
+def _build_clip_tagger(config: dict):
+    return _load_module("zero_shot_tagger").ZeroShotTagger(
+        model_path=config['path'],
+        device=config['device'],
+        max_garments=config.get('max_garments', 3),
+        min_garment_prob=config.get('min_garment_prob', 0.1),
+        min_setting_prob=config.get('min_setting_prob', 0.5),
+        batch_size=config.get('batch_size', 64)
+    )
+
+
+def _build_clip_image_embedder(config: dict):
+    # Same wrapper the Retrieval Pipeline encodes queries with, so both sides share one embedding space
+    return _load_module("clip_model").CLIPEncoder(
+        model_path=config['path'],
+        device=config['device']
+    )
+
+
+def _build_hash_image_embedder(config: dict):
+    return _load_module("lightweight_models").HashCLIPModel(
+        embedding_dim=config.get('embedding_dim', 768)
+    )
+
+
+def _build_filename_captioner(config: dict):
+    return _load_module("lightweight_models").FilenameCaptionModel(
+        device=config.get('device', 'cpu'),
+        caption_mode=config.get('caption_mode', 'sentence')
+    )
+
+
+def _build_rule_normalizer(config: dict):
+    return _load_module("lightweight_models").RuleBasedNormalizationModel(device=config.get('device', 'cpu'))
+
+
+def _build_hash_embedder(config: dict):
+    return _load_module("lightweight_models").HashEmbeddingModel(
+        device=config.get('device', 'cpu'),
+        embedding_dim=config.get('embedding_dim', 1024)
+    )
+
+
+# role -> backend -> builder(config); the first backend of each role is the default
+MODEL_BACKENDS: Dict[str, Dict[str, Callable[[dict], object]]] = {
+    'img_to_text': {
+        'qwen2-vl': _build_qwen_vl,
+        'filename': _build_filename_captioner,
+    },
+    'text_normalization': {
+        'qwen': _build_qwen_normalizer,
+        'rules': _build_rule_normalizer,
+    },
+    'embedding': {
+        'bge': _build_bge,
+        'hash': _build_hash_embedder,
+    },
+    # Fast indexing tier: generation-free image → normalized keywords
+    'zero_shot_tagger': {
+        'clip': _build_clip_tagger,
+    },
+    # CLIP image index for the Retrieval Pipeline's first_stage: clip
+    'image_embedding': {
+        'clip': _build_clip_image_embedder,
+        'hash': _build_hash_image_embedder,
+    },
+}
+
+
+# role -> backend -> (module, class) whose version_for(model_path) identifies its outputs;
+# lets cached outputs be looked up without loading model weights
+MODEL_CLASSES: Dict[str, Dict[str, tuple]] = {
+    'img_to_text': {
+        'qwen2-vl': ("img_to_text_model", "ImageToTextModel"),
+        'filename': ("lightweight_models", "FilenameCaptionModel"),
+    },
+    'text_normalization': {
+        'qwen': ("text_norm_model", "TextNormalizationModel"),
+        'rules': ("lightweight_models", "RuleBasedNormalizationModel"),
+    },
+    'zero_shot_tagger': {
+        'clip': ("zero_shot_tagger", "ZeroShotTagger"),
+    },
+}
+
+
+def register_backend(role: str, backend: str, builder: Callable[[dict], object]):
+    """
+    Register a model builder
+
+    Args:
+        role: Config section name under `models` (e.g. 'embedding')
+        backend: Value of the section's `backend` key
+        builder: Function creating the model from the section config
+    """
+    MODEL_BACKENDS.setdefault(role, {})[backend] = builder
+
+
+def build_model(role: str, config: dict):
+    """
+    Build the model configured for a role
+
+    Args:
+        role: Config section name under `models`
+        config: That section (backend, path, device, ...)
+
+    Returns:
+        Model instance implementing the role's interface
+    """
+    if role not in MODEL_BACKENDS:
+        raise ValueError(f"Unknown model role: {role}")
+
+    backends = MODEL_BACKENDS[role]
+    backend = config.get('backend') or next(iter(backends))
+    if backend not in backends:
+        raise ValueError(f"Unknown {role} backend: {backend} (available: {', '.join(backends)})")
+    return backends[backend](config)
+
+
+def model_version(role: str, config: dict) -> str:
+    """
+    Version of the outputs of the model configured for a role
+
+    Args:
+        role: Config section name under `models` (img_to_text, text_normalization or zero_shot_tagger)
+        config: That section
+
+    Returns:
+        Version string (model path + prompt version + output-changing settings), without loading the model
+    """
+    classes = MODEL_CLASSES.get(role, {})
+    backend = config.get('backend') or next(iter(MODEL_BACKENDS[role]))
+    if backend not in classes:
+        raise ValueError(f"No version known for {role} backend: {backend}")
+    module_name, class_name = classes[backend]
+    model_class = getattr(_load_module(module_name), class_name)
+    # Settings besides the path that change the outputs (e.g. the captioner's pixel limits)
+    options = {key: config.get(key) for key in getattr(model_class, 'VERSION_CONFIG_KEYS', ())}
+    return model_class.version_for(config.get('path', ''), **options)
@@ -2,33 +2,99 @@
 Qwen2.5-0.5B-Instruct wrapper for text normalization
 
 """
-from transformers import AutoModelForCausalLM, AutoTokenizer
+import hashlib
+import os
+import importlib.util
+from transformers import AutoModelForCausalLM, AutoTokenizer, StoppingCriteriaList
 import torch
 from typing import List
 
 
+# Import helpers by path (this module is also loaded by the Retrieval Pipeline)
+def _import_from_path(module_name: str, file_path: str):
+    spec = importlib.util.spec_from_file_location(module_name, file_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+models_dir = os.path.dirname(os.path.abspath(__file__))
+batching = _import_from_path("indexing_batching", os.path.join(models_dir, '..', 'utils', 'batching.py'))
+fashion_vocabulary = _import_from_path("fashion_vocabulary", os.path.join(models_dir, '..', 'utils', 'fashion_vocabulary.py'))
+decoding = _import_from_path("decoding", os.path.join(models_dir, 'decoding.py'))
+
+
 class TextNormalizationModel:
     """Wrapper for Qwen2.5-0.5B-Instruct model"""
     
-    def __init__(self, model_path: str, device: str = "cuda"):
+    # Cached normalized texts are keyed by version: bump PROMPT_VERSION when the prompts or generation settings change
+    PROMPT_VERSION = 1
+    SYSTEM_PROMPT = "You are a fashion search engine text normalization and keyword extraction model. Extract ONLY essential fashion-related keywords from the input text. Rules: 1. Extract clothing items (e.g., shirt, jacket, raincoat, pants, jeans, tie). 2. Extract colors ONLY if explicitly mentioned. 3. Extract environment or setting ONLY if explicitly mentioned and relevant (e.g., office, park, indoor). 4. Do NOT guess or infer missing information. 5. Do NOT add, explain, or rephrase anything. 6. Do NOT include non-fashion words. 7. Output ONLY the extracted keywords separated by ' | '. 8. Keep the output minimal, precise, and consistent. Example: Input: A person wearing a bright yellow raincoat and black pants, standing outdoors on a city street. Output: yellow | raincoat | black | pants | city street"
+    USER_PROMPT = "Extract fashion keywords from: {caption}\n\nKeywords:"
+    MAX_NEW_TOKENS = 64  # Reduced from 128 to prevent hallucination
+    SEPARATOR = " |"
+    # Config keys that change the normalized texts (passed to version_for by the registry)
+    VERSION_CONFIG_KEYS = ('max_keywords', 'constrained')
+    
+    def __init__(self, model_path: str, device: str = "cuda", max_batch_tokens: int = 8192,
+                 max_keywords: int = 0, constrained: bool = False):
         """
         Initialize the text normalization model
         
         Args:
             model_path: Path to the local model
             device: Device to run model on (cuda/cpu)
+            max_batch_tokens: Padded prompt + generated tokens per generate() call
+                              (a value below one prompt's length disables batching)
+            max_keywords: Stop after this many keywords (0 = no limit); generation also stops at a newline
+            constrained: Only allow fashion vocabulary phrases joined by ' | '
         """
         self.device = device
+        self.model_path = model_path
+        self.max_batch_tokens = max_batch_tokens
+        self.max_keywords = max_keywords
+        self.constrained = constrained
         self.model = AutoModelForCausalLM.from_pretrained(
             model_path,
             torch_dtype=torch.float16 if device == "cuda" else torch.float32,
             device_map="auto" if device == "cuda" else None
         )
         self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        # Batched generation needs the prompts aligned on the right edge
+        self.tokenizer.padding_side = "left"
+        
+        # Token sets for early stopping / the keyword grammar (computed once from the vocabulary)
+        self.newline_ids = decoding.newline_token_ids(self.tokenizer)
+        self.separator_ids = decoding.token_ids_matching(self.tokenizer, lambda text: '|' in text)
+        self.grammar = None
+        if constrained:
+            phrases = fashion_vocabulary.COLORS + fashion_vocabulary.GARMENTS + fashion_vocabulary.SETTINGS
+            self.grammar = decoding.KeywordGrammar(self.tokenizer, phrases, separator=self.SEPARATOR)
         
         if device == "cpu":
             self.model.to(device)
     
+    @classmethod
+    def version_for(cls, model_path: str, max_keywords: int = 0, constrained: bool = False) -> str:
+        """Model / prompt / decoding version of the normalized texts this class produces"""
+        prompt_hash = hashlib.sha1(
+            f"{cls.SYSTEM_PROMPT}|{cls.USER_PROMPT}|{cls.MAX_NEW_TOKENS}".encode('utf-8')
+        ).hexdigest()[:8]
+        version = f"qwen:{model_path}:prompt-v{cls.PROMPT_VERSION}-{prompt_hash}"
+        if max_keywords:
+            version += f":k{max_keywords}"
+        if constrained:
+            # The grammar only allows vocabulary phrases: a vocabulary edit changes the outputs
+            vocabulary = "|".join(fashion_vocabulary.COLORS + fashion_vocabulary.GARMENTS + fashion_vocabulary.SETTINGS)
+            grammar_hash = hashlib.sha1(f"{cls.SEPARATOR}|{vocabulary}".encode('utf-8')).hexdigest()[:8]
+            version += f":grammar-{grammar_hash}"
+        return version
+    
+    @property
+    def version(self) -> str:
+        """Model / prompt / decoding version of this instance's normalized texts"""
+        return self.version_for(self.model_path, self.max_keywords, self.constrained)
+    
     def normalize_text(self, caption: str) -> str:
         """
         Normalize caption text to structured format
@@ -39,55 +105,102 @@ class TextNormalizationModel:
         Returns:
             Normalized text (e.g., "white shirt | black jeans | black tie | formal")
         """
-        # Prepare prompt
+        model_inputs = self.tokenizer([self._build_prompt(caption)], return_tensors="pt").to(self.device)
+        
+        with torch.no_grad():
+            generated_ids = self.model.generate(
+                **model_inputs, **self._generation_kwargs(model_inputs['input_ids'].shape[1])
+            )
+        
+        generated_ids = [
+            output_ids[len(input_ids):] for input_ids, output_ids in zip(model_inputs.input_ids, generated_ids)
+        ]
+        
+        response = self.tokenizer.batch_decode(generated_ids, skip_special_tokens=True)[0]
+        
+        return self._clean(response)
+    
+    def _build_prompt(self, caption: str) -> str:
+        """Chat-formatted prompt for one caption"""
         messages = [
             {
                 "role": "system",
-                "content": "You are a fashion search engine text normalization and keyword extraction model. Extract ONLY essential fashion-related keywords from the input text. Rules: 1. Extract clothing items (e.g., shirt, jacket, raincoat, pants, jeans, tie). 2. Extract colors ONLY if explicitly mentioned. 3. Extract environment or setting ONLY if explicitly mentioned and relevant (e.g., office, park, indoor). 4. Do NOT guess or infer missing information. 5. Do NOT add, explain, or rephrase anything. 6. Do NOT include non-fashion words. 7. Output ONLY the extracted keywords separated by ' | '. 8. Keep the output minimal, precise, and consistent. Example: Input: A person wearing a bright yellow raincoat and black pants, standing outdoors on a city street. Output: yellow | raincoat | black | pants | city street"
+                "content": self.SYSTEM_PROMPT
             },
             {
                 "role": "user", 
-                "content": f"Extract fashion keywords from: {caption}\n\nKeywords:"
+                "content": self.USER_PROMPT.format(caption=caption)
             }
         ]
         
-        text = self.tokenizer.apply_chat_template(
+        return self.tokenizer.apply_chat_template(
             messages,
             tokenize=False,
             add_generation_prompt=True
         )
+    
+    def _generation_kwargs(self, prompt_length: int) -> dict:
+        """
+        Decoding settings shared by single and batched generation
         
-        model_inputs = self.tokenizer([text], return_tensors="pt").to(self.device)
-        
-        with torch.no_grad():
-            generated_ids = self.model.generate(
-                **model_inputs,
-                max_new_tokens=64,  # Reduced from 128 to prevent hallucination
-                temperature=0.1,     # Reduced from 0.3 for more deterministic output
-                do_sample=False,     # Greedy decoding for consistency
-                repetition_penalty=1.2  # Prevent repetition
+        Args:
+            prompt_length: Padded prompt length (stopping criteria only look at generated tokens)
+        """
+        stopping_criteria = [decoding.TokenCountStoppingCriteria(self.newline_ids, 1, prompt_length)]
+        if self.max_keywords:
+            # The max_keywords-th separator would start one keyword too many
+            stopping_criteria.append(
+                decoding.TokenCountStoppingCriteria(self.separator_ids, self.max_keywords, prompt_length)
             )
-        
-        generated_ids = [
-            output_ids[len(input_ids):] for input_ids, output_ids in zip(model_inputs.input_ids, generated_ids)
-        ]
-        
-        response = self.tokenizer.batch_decode(generated_ids, skip_special_tokens=True)[0]
-        
-        return response.strip()
+        kwargs = dict(
+            max_new_tokens=self.MAX_NEW_TOKENS,
+            temperature=0.1,     # Reduced from 0.3 for more deterministic output
+            do_sample=False,     # Greedy decoding for consistency
+            repetition_penalty=1.2,  # Prevent repetition
+            pad_token_id=self.tokenizer.pad_token_id,
+            stopping_criteria=StoppingCriteriaList(stopping_criteria)
+        )
+        if self.grammar is not None:
+            kwargs['prefix_allowed_tokens_fn'] = self.grammar.prefix_allowed_tokens_fn(prompt_length)
+        return kwargs
+    
+    def _clean(self, response: str) -> str:
+        """First line of the response, without a separator left by early stopping"""
+        lines = response.strip().splitlines()
+        return lines[0].strip().rstrip('|').strip() if lines else ""
     
     def normalize_texts_batch(self, captions: List[str]) -> List[str]:
         """
         Normalize multiple captions
+        
+        Prompts are grouped by token length into left-padded generate() calls of
+        at most max_batch_tokens (prompt + MAX_NEW_TOKENS per caption).
         Returns:
             List of normalized texts
         """
-        normalized_texts = []
-        for caption in captions:
-            try:
-                normalized = self.normalize_text(caption)
-                normalized_texts.append(normalized)
-            except Exception as e:
+        if not captions:
+            return []
+        encoded = self.tokenizer([self._build_prompt(caption) for caption in captions])
+        features = [{k: encoded[k][i] for k in encoded.keys()} for i in range(len(captions))]
+        lengths = [len(ids) + self.MAX_NEW_TOKENS for ids in encoded['input_ids']]
+        return batching.run_token_budget_batches(features, lengths, self._normalize_encoded, self.max_batch_tokens)
+    
+    def _normalize_encoded(self, features: List[dict]) -> List[str]:
+        """Generate for one length bucket of tokenized prompts (one by one if the batch fails)"""
+        try:
+            model_inputs = self.tokenizer.pad(features, return_tensors="pt").to(self.device)
+            with torch.no_grad():
+                generated_ids = self.model.generate(
+                    **model_inputs, **self._generation_kwargs(model_inputs['input_ids'].shape[1])
+                )
+        except Exception as e:
+            if len(features) == 1:
                 print(f"Error normalizing text: {e}")
-                normalized_texts.append("")
-        return normalized_texts
+                return [""]
+            print(f"Error normalizing batch of {len(features)} captions, retrying one by one: {e}")
+            return [self._normalize_encoded([feature])[0] for feature in features]
+        
+        # Left padding: every prompt ends at the same position
+        generated_ids = generated_ids[:, model_inputs['input_ids'].shape[1]:]
+        responses = self.tokenizer.batch_decode(generated_ids, skip_special_tokens=True)
+        return [self._clean(response) for response in responses]
@@ -0,0 +1,163 @@
+"""
+CLIP zero-shot attribute tagger for the fast indexing tier
+
+Generation-free CaptionModel: text embeddings of every (color, garment) pair
+and every setting of the fashion vocabulary are computed once; each batch of
+images is then tagged with two matrix products against them, and the best
+attributes are written in the normalized ' | ' keyword format. Orders of
+magnitude cheaper than VLM captioning, at lower quality, so rows it produced
+are marked by their text_source and can be refined later with
+scripts/refine_text.py.
+"""
+import hashlib
+import os
+import importlib.util
+from typing import List
+import numpy as np
+
+
+def _import_from_path(module_name: str, file_path: str):
+    spec = importlib.util.spec_from_file_location(module_name, file_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+models_dir = os.path.dirname(os.path.abspath(__file__))
+fashion_vocabulary = _import_from_path("fashion_vocabulary", os.path.join(models_dir, '..', 'utils', 'fashion_vocabulary.py'))
+batching = _import_from_path("indexing_batching", os.path.join(models_dir, '..', 'utils', 'batching.py'))
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class ZeroShotTagger:
+    """Tag images with fashion vocabulary attributes using CLIP image-text similarity"""
+
+    # Tags are keyed by version: bump TAGGER_VERSION when the templates or selection logic change
+    TAGGER_VERSION = 1
+    GARMENT_TEMPLATE = "a photo of a person wearing a {color} {garment}"
+    SETTING_TEMPLATE = "a photo of a person, {setting}"
+    # Config keys that change the tags (passed to version_for by the registry)
+    VERSION_CONFIG_KEYS = ('max_garments', 'min_garment_prob', 'min_setting_prob')
+
+    def __init__(self, model_path: str, device: str = "cuda", max_garments: int = 3,
+                 min_garment_prob: float = 0.1, min_setting_prob: float = 0.5, batch_size: int = 64):
+        """
+        Load CLIP and embed the attribute vocabulary
+
+        Args:
+            model_path: Path or name of the CLIP model
+            device: Device to run model on (cuda/cpu)
+            max_garments: Most (color, garment) pairs kept per image, each with a different garment
+            min_garment_prob: Pairs after the best one need this softmax probability
+            min_setting_prob: The best setting is only kept with this softmax probability
+            batch_size: Images per CLIP forward pass
+        """
+        clip_module = _import_from_path("clip_model", os.path.join(models_dir, 'clip_model.py'))
+        self.clip = clip_module.CLIPEncoder(model_path=model_path, device=device)
+        self.device = self.clip.device
+        self.model_path = model_path
+        self.max_garments = max_garments
+        self.min_garment_prob = min_garment_prob
+        self.min_setting_prob = min_setting_prob
+        self.batch_size = batch_size
+
+        # Attribute text embeddings, computed once (vocabulary size x dim)
+        self.pairs = [(color, garment) for garment in fashion_vocabulary.GARMENTS for color in fashion_vocabulary.COLORS]
+        self.settings = list(fashion_vocabulary.SETTINGS)
+        self.pair_matrix = self.clip.encode_text(
+            [self.GARMENT_TEMPLATE.format(color=color, garment=garment) for color, garment in self.pairs]
+        )
+        self.setting_matrix = self.clip.encode_text(
+            [self.SETTING_TEMPLATE.format(setting=setting) for setting in self.settings]
+        )
+        self.logit_scale = float(self.clip.model.logit_scale.exp().item())
+
+    @classmethod
+    def version_for(cls, model_path: str, max_garments: int = 3, min_garment_prob: float = 0.1,
+                    min_setting_prob: float = 0.5) -> str:
+        """Model / vocabulary / threshold version of the tags this class produces"""
+        vocabulary = "|".join(fashion_vocabulary.COLORS + fashion_vocabulary.GARMENTS + fashion_vocabulary.SETTINGS)
+        settings_hash = hashlib.sha1(
+            f"{cls.GARMENT_TEMPLATE}|{cls.SETTING_TEMPLATE}|{vocabulary}|"
+            f"{max_garments}|{min_garment_prob}|{min_setting_prob}".encode('utf-8')
+        ).hexdigest()[:8]
+        return f"clip-tags:{model_path}:v{cls.TAGGER_VERSION}-{settings_hash}"
+
+    @property
+    def version(self) -> str:
+        """Model / vocabulary / threshold version of this instance's tags"""
+        return self.version_for(self.model_path, self.max_garments, self.min_garment_prob, self.min_setting_prob)
+
+    def tag_embeddings(self, image_embeddings: np.ndarray) -> List[str]:
+        """
+        Normalized texts for L2-normalized CLIP image embeddings
+
+        Args:
+            image_embeddings: (N, dim) image embeddings
+
+        Returns:
+            One 'color | garment | ... | setting' text per image
+        """
+        pair_probs = _softmax(self.logit_scale * image_embeddings @ self.pair_matrix.T)
+        setting_probs = _softmax(self.logit_scale * image_embeddings @ self.setting_matrix.T)
+        # Enough candidates to find max_garments distinct garments in the common case
+        candidates = np.argsort(-pair_probs, axis=1)[:, :self.max_garments * len(fashion_vocabulary.COLORS)]
+        best_settings = setting_probs.argmax(axis=1)
+
+        texts = []
+        for i in range(len(image_embeddings)):
+            keywords, garments = [], set()
+            for j in candidates[i]:
+                color, garment = self.pairs[j]
+                if garment in garments:
+                    continue
+                if garments and pair_probs[i, j] < self.min_garment_prob:
+                    break
+                garments.add(garment)
+                keywords.extend(word for word in (color, garment) if word not in keywords)
+                if len(garments) == self.max_garments:
+                    break
+            if setting_probs[i, best_settings[i]] >= self.min_setting_prob:
+                keywords.append(self.settings[best_settings[i]])
+            texts.append(" | ".join(keywords))
+        return texts
+
+    def generate_caption(self, image_path: str) -> str:
+        """
+        Tag a single image
+
+        Args:
+            image_path: Path to the image file
+
+        Returns:
+            Normalized keyword text (e.g. "yellow | raincoat | black | pants | city street")
+        """
+        return self.generate_captions_batch([image_path])[0]
+
+    def generate_captions_batch(self, image_paths: List[str]) -> List[str]:
+        """
+        Tag multiple images, batch_size images per CLIP forward pass
+
+        Args:
+            image_paths: List of image file paths
+
+        Returns:
+            List of normalized keyword texts ("" for images that could not be processed)
+        """
+        texts = []
+        for batch in batching.create_batches(image_paths, self.batch_size):
+            try:
+                texts.extend(self.tag_embeddings(self.clip.encode_images(batch)))
+            except Exception as e:
+                if len(batch) == 1:
+                    print(f"Error processing {batch[0]}: {e}")
+                    texts.append("")
+                else:
+                    # One unreadable image should not cost the whole batch
+                    texts.extend(self.generate_captions_batch([image_path])[0] for image_path in batch)
+        return texts
@@ -0,0 +1,274 @@
+"""
+Distributed indexing over a PostgreSQL work queue
+
+Roles:
+
+1. coordinator - split unprocessed images into work units (indexing_work_units table)
+2. worker      - claim units, caption / normalize / embed them, store metadata in
+                 PostgreSQL and write one partial vector shard per unit
+                 (run as many as the GPUs allow, on one or several machines)
+3. merge       - fold the finished partial shards into the main FAISS index, catch
+                 up the CLIP image index and export the metadata snapshot
+4. status      - print units per status
+
+Usage:
+    python run_distributed.py coordinator
+    python run_distributed.py worker [--worker-id gpu0]
+    python run_distributed.py merge [--wait]
+    python run_distributed.py status
+"""
+import argparse
+import os
+import socket
+import sys
+import time
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from run_indexing import (
+    load_config, load_processors, save_caches, connect_postgres, create_artifact_store, create_faiss_writer,
+    process_images, export_metadata_snapshot, text_source, update_clip_index
+)
+from storage.work_queue import WorkQueue, LeaseKeeper
+from data.dataset_loader import DatasetLoader
+from utils.logger import setup_logger
+from utils.batching import create_batches
+from utils.telemetry import IndexingTelemetry
+
+logger = setup_logger(__name__)
+
+
+def open_queue(config: dict) -> WorkQueue:
+    """Connect to the work queue with the distributed settings"""
+    dist_config = config.get('distributed', {})
+    queue = WorkQueue(
+        config['database']['postgres'],
+        lease_seconds=dist_config.get('lease_seconds', 900),
+        max_attempts=dist_config.get('max_attempts', 3)
+    )
+    queue.connect()
+    return queue
+
+
+def run_coordinator(config: dict):
+    """
+    Queue every image that is neither in the FAISS index nor already in an open unit
+
+    Workers commit rows to PostgreSQL before their unit is merged, so a row alone
+    does not mean the image has a vector (its unit may have failed); images of
+    failed units are queued again.
+    """
+    dataset_loader = DatasetLoader(
+        image_dir=config['dataset']['image_dir'],
+        supported_formats=config['dataset']['supported_formats']
+    )
+    image_paths = dataset_loader.load_images()
+
+    postgres = connect_postgres(config)
+    queue = open_queue(config)
+
+    faiss_writer = create_faiss_writer(config)
+    faiss_writer.load_index()
+    indexed_ids = set(faiss_writer.image_ids)
+    processed_paths = {image_path for block in postgres.iter_image_paths()
+                       for image_id, image_path in block if image_id in indexed_ids}
+    enqueued_paths = queue.enqueued_paths()
+    new_paths = [img for img in image_paths if img not in processed_paths and img not in enqueued_paths]
+    logger.info(f"{len(image_paths)} images: {len(processed_paths)} indexed, "
+                f"{len(enqueued_paths)} already queued, {len(new_paths)} new")
+
+    if new_paths:
+        queue.create_units(new_paths, config.get('distributed', {}).get('unit_size', 512))
+    logger.info(f"Work units: {queue.counts()}")
+
+    queue.close()
+    postgres.close()
+
+
+def write_partial_shard(shard_path: str, image_ids: list, embeddings: np.ndarray):
+    """Write a partial shard atomically (tmp file + rename)"""
+    tmp_path = shard_path + '.tmp.npz'
+    np.savez(tmp_path, image_ids=np.array(image_ids, dtype=np.int64),
+             embeddings=np.asarray(embeddings, dtype=np.float32))
+    os.replace(tmp_path, shard_path)
+
+
+def run_worker(config: dict, worker_id: str):
+    """Claim and process units until the queue has no pending or claimed units left"""
+    dist_config = config.get('distributed', {})
+    partial_dir = dist_config.get('partial_dir', 'storage/partial')
+    poll_interval = dist_config.get('poll_interval', 15)
+    os.makedirs(partial_dir, exist_ok=True)
+
+    processors = load_processors(config)
+    postgres = connect_postgres(config)
+    queue = open_queue(config)
+    artifact_store = create_artifact_store(config, postgres)
+    source = text_source(config)
+
+    progress_file = config['processing'].get('progress_file')
+    if progress_file:
+        progress_file = progress_file.replace('.jsonl', f'_{worker_id}.jsonl')
+    telemetry = IndexingTelemetry(total_images=0, progress_path=progress_file)
+    batch_size = config['dataset']['batch_size']
+    batch_idx = 0
+    units_done = 0
+
+    logger.info(f"Worker {worker_id} started")
+    while True:
+        unit = queue.claim(worker_id)
+        if unit is None:
+            counts = queue.counts()
+            if counts.get('pending', 0) == 0 and counts.get('claimed', 0) == 0:
+                break
+            # Other workers hold the remaining units; wait in case a lease expires
+            time.sleep(poll_interval)
+            continue
+
+        unit_id, image_paths = unit
+        telemetry.total_images += len(image_paths)
+        logger.info(f"--- Unit {unit_id} ({len(image_paths)} images) ---")
+        try:
+            unit_ids, unit_embeddings = [], []
+            with LeaseKeeper(config['database']['postgres'], unit_id, worker_id,
+                             dist_config.get('heartbeat_interval', 60)) as lease:
+                for image_batch in create_batches(image_paths, batch_size):
+                    if lease.lost:
+                        break
+                    batch_idx += 1
+                    image_ids, embeddings = process_images(image_batch, processors, postgres, telemetry,
+                                                           artifact_store, source)
+                    if len(image_ids) != len(image_batch):
+                        raise RuntimeError(f"PostgreSQL insert returned {len(image_ids)} ids for {len(image_batch)} images")
+                    unit_ids.extend(image_ids)
+                    unit_embeddings.append(embeddings)
+                    telemetry.record_batch(batch_idx, len(image_batch))
+
+            if lease.lost:
+                logger.warning(f"Unit {unit_id} was reclaimed by another worker, dropping its results")
+                continue
+
+            shard_path = os.path.join(partial_dir, f"unit_{unit_id:06d}_{worker_id}.npz")
+            write_partial_shard(shard_path, unit_ids, np.concatenate(unit_embeddings))
+            if queue.complete(unit_id, worker_id, os.path.abspath(shard_path)):
+                units_done += 1
+                logger.info(f"✓ Unit {unit_id} done ({len(unit_ids)} vectors)")
+            else:
+                os.remove(shard_path)
+                logger.warning(f"Unit {unit_id} was reclaimed by another worker, dropping its results")
+        except Exception as e:
+            logger.error(f"Unit {unit_id} failed: {e}")
+            queue.conn.rollback()
+            queue.fail(unit_id, worker_id, str(e))
+
+        # Outside the unit: a failed cache save must not fail a finished unit
+        try:
+            save_caches(processors)
+        except Exception as e:
+            logger.warning(f"Could not save caches: {e}")
+
+    summary = telemetry.summary()
+    logger.info(f"Worker {worker_id} finished: {units_done} units, {summary['processed']} images, "
+                f"{summary['images_per_sec']:.2f} images/sec")
+    if artifact_store is not None:
+        artifact_store.log_stats()
+    queue.close()
+    postgres.close()
+
+
+def run_merge(config: dict, wait: bool = False):
+    """
+    Fold finished partial shards into the main FAISS index
+
+    Args:
+        config: Indexing configuration
+        wait: Wait until no unit is pending or claimed before merging
+    """
+    queue = open_queue(config)
+    poll_interval = config.get('distributed', {}).get('poll_interval', 15)
+    while wait:
+        counts = queue.counts()
+        if counts.get('pending', 0) == 0 and counts.get('claimed', 0) == 0:
+            break
+        logger.info(f"Waiting for workers: {counts}")
+        time.sleep(poll_interval)
+
+    units = queue.done_units()
+    if not units:
+        logger.info("No finished units to merge")
+        queue.close()
+        return
+
+    faiss_writer = create_faiss_writer(config)
+    faiss_writer.load_index()
+    indexed_ids = set(faiss_writer.image_ids)
+
+    merged_units, missing_units, merged_vectors = [], [], 0
+    for unit_id, shard_path in units:
+        if not shard_path or not os.path.exists(shard_path):
+            logger.error(f"Partial shard of unit {unit_id} not found at {shard_path} (is partial_dir shared?), "
+                         f"queueing it again")
+            missing_units.append(unit_id)
+            continue
+        with np.load(shard_path) as shard:
+            image_ids, embeddings = shard['image_ids'], shard['embeddings']
+
+        # A reclaimed unit or an interrupted merge can repeat ids that are already indexed
+        keep = np.array([image_id not in indexed_ids for image_id in image_ids.tolist()], dtype=bool)
+        if keep.any():
+            faiss_writer.add_vectors_batch(image_ids[keep].tolist(), embeddings[keep])
+            indexed_ids.update(image_ids[keep].tolist())
+            merged_vectors += int(keep.sum())
+        merged_units.append((unit_id, shard_path))
+
+    # CLIP image index first, so it is complete when the text index version (watched by hot reload) changes
+    postgres = connect_postgres(config)
+    if config['database'].get('clip_index', {}).get('enabled', False):
+        update_clip_index(config, postgres)
+
+    # Index first: units are only marked merged once their vectors are on disk
+    faiss_writer.save_index(final=True)
+    queue.mark_merged([unit_id for unit_id, _ in merged_units])
+    if missing_units:
+        queue.requeue(missing_units, "partial shard missing at merge")
+    for _, shard_path in merged_units:
+        os.remove(shard_path)
+    logger.info(f"✓ Merged {len(merged_units)} units ({merged_vectors} new vectors), "
+                f"index has {faiss_writer.ntotal} vectors, {len(missing_units)} units queued again")
+
+    snapshot_config = config['database'].get('metadata_snapshot', {})
+    if snapshot_config.get('enabled', False):
+        export_metadata_snapshot(postgres, snapshot_config['path'], faiss_writer.version)
+
+    postgres.close()
+    queue.close()
+
+
+def run_status(config: dict):
+    """Print units per status"""
+    queue = open_queue(config)
+    counts = queue.counts()
+    queue.close()
+    for status in ('pending', 'claimed', 'done', 'merged', 'failed'):
+        print(f"{status:<8} {counts.get(status, 0)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed indexing over a PostgreSQL work queue")
+    parser.add_argument('role', choices=['coordinator', 'worker', 'merge', 'status'])
+    parser.add_argument('--config', default=os.path.join(os.path.dirname(__file__), 'config', 'indexing.yaml'))
+    parser.add_argument('--worker-id', default=f"{socket.gethostname()}-{os.getpid()}")
+    parser.add_argument('--wait', action='store_true', help="merge: wait for all units to finish first")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    if args.role == 'coordinator':
+        run_coordinator(config)
+    elif args.role == 'worker':
+        run_worker(config, args.worker_id)
+    elif args.role == 'merge':
+        run_merge(config, wait=args.wait)
+    else:
+        run_status(config)
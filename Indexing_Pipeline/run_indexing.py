@@ -9,31 +9,40 @@ Pipeline Flow is like this way :
 4. Store (image_id, path, normalized_text) in PostgreSQL
 5. Normalized Text → Embedding (BAAI/bge-large-en-v1.5) model we are used 
 6. Store (image_id, embedding) in FAISS
+7. Export metadata snapshot (image_id, path, normalized_text) next to the FAISS index
+8. Optional: Image → CLIP embedding, stored in the CLIP image index (database.clip_index)
 
 
 """
 
 import yaml
+import hashlib
+import json
 import os
 import sys
+from functools import partial
+import numpy as np
+from datetime import datetime
 from pathlib import Path
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # Models
-from models.img_to_text_model import ImageToTextModel
-from models.text_norm_model import TextNormalizationModel
-from models.embedding_model import EmbeddingModel
+from models.registry import build_model, model_version
 
 # Logic
 from logic.caption_logic import CaptionGenerator
 from logic.normalization_logic import TextNormalizer
 from logic.embedding_logic import EmbeddingGenerator
+from logic.image_embedding_logic import ImageEmbeddingGenerator
 
 # Storage
 from storage.postgres_writer import PostgresWriter
 from storage.faiss_writer import FAISSWriter
+from storage.sharded_faiss_writer import ShardedFAISSWriter
+from storage.metadata_snapshot import MetadataSnapshot
+from storage.artifact_store import ArtifactStore, content_hash
 
 # Data
 from data.dataset_loader import DatasetLoader
@@ -42,6 +51,9 @@ from data.image_registry import ImageRegistry
 # Utils
 from utils.logger import setup_logger
 from utils.batching import create_batches
+from utils.telemetry import IndexingTelemetry, get_current_rss_mb, release_memory
+from utils.lru_cache import PersistentLRUCache
+from utils.profiler import BatchProfiler
 
 logger = setup_logger(__name__)
 
@@ -53,6 +65,486 @@ def load_config(config_path: str) -> dict:
     return config
 
 
+def export_metadata_snapshot(postgres: PostgresWriter, snapshot_path: str, index_version: str,
+                             full: bool = False):
+    """
+    Refresh the metadata snapshot incrementally from created_at and tag it with the index version
+    
+    Args:
+        postgres: Connected PostgreSQL writer
+        snapshot_path: Path of the snapshot file
+        index_version: Version of the FAISS index saved alongside
+        full: Re-export every row (after a re-index updated existing rows)
+    """
+    if os.path.exists(snapshot_path) and not full:
+        snapshot = MetadataSnapshot.load(snapshot_path)
+    else:
+        snapshot = MetadataSnapshot.empty()
+    
+    last_created_at = snapshot.max_created_at()
+    since = datetime.fromtimestamp(last_created_at) if last_created_at is not None else None
+    records = postgres.get_records_since(since)
+    
+    snapshot = snapshot.merge(records, index_version=index_version)
+    snapshot.save(snapshot_path)
+    logger.info(f"✓ Metadata snapshot saved ({len(snapshot)} rows, {len(records)} refreshed)")
+
+
+def embedding_version(config: dict) -> str:
+    """Version of the configured text embeddings (backend, path, dimension and truncation)"""
+    model_config = config['models']['embedding']
+    return (f"{model_config.get('backend', 'bge')}:{model_config.get('path', '')}:"
+            f"{model_config.get('embedding_dim', 1024)}:{model_config.get('max_length', 512)}")
+
+
+def create_cache(config: dict, role: str):
+    """
+    Persistent input -> output cache of a model role, or None when disabled
+    
+    Args:
+        config: Indexing configuration
+        role: 'text_normalization' or 'embedding' (processing.caches.<role>)
+    
+    Returns:
+        PersistentLRUCache namespaced by the model that produced its values
+    """
+    cache_config = config['processing'].get('caches', {}).get(role, {})
+    if not cache_config.get('enabled', False):
+        return None
+    if role == 'text_normalization':
+        namespace = model_version(role, config['models'][role])
+    else:
+        namespace = embedding_version(config)
+    return PersistentLRUCache(cache_config.get('max_entries', 100000), cache_config.get('path'), namespace)
+
+
+def save_caches(processors: tuple):
+    """Persist the processors' caches and log their hit rates"""
+    for processor in processors:
+        cache = getattr(processor, 'cache', None)
+        if cache is not None:
+            cache.save()
+            logger.info(f"{type(processor).__name__} cache: {cache.stats()}")
+
+
+def caption_role(config: dict) -> str:
+    """Model role of the caption stage: the CLIP tagger in the fast tier, the VLM captioner otherwise"""
+    return 'zero_shot_tagger' if config['processing'].get('fast_tier', False) else 'img_to_text'
+
+
+def is_single_pass(config: dict) -> bool:
+    """True when the caption stage emits the normalized keywords itself (fast tier or caption_mode: keywords)"""
+    if caption_role(config) == 'zero_shot_tagger':
+        return True
+    return config['models']['img_to_text'].get('caption_mode', 'sentence') == 'keywords'
+
+
+def stage_versions(config: dict) -> dict:
+    """Versions of the caption and (unless single pass) normalization outputs of the configured models"""
+    role = caption_role(config)
+    caption_version = model_version(role, config['models'][role])
+    versions = {'caption': caption_version}
+    if not is_single_pass(config):
+        normalize_version = model_version('text_normalization', config['models']['text_normalization'])
+        # Normalized texts depend on the captions they were made from
+        versions['normalize'] = f"{caption_version}+{normalize_version}"
+    return versions
+
+
+def text_source(config: dict) -> str:
+    """Version of the models that produce normalized_text, stored with every row"""
+    versions = stage_versions(config)
+    return versions.get('normalize', versions['caption'])
+
+
+def load_processors(config: dict, embedding: bool = True) -> tuple:
+    """
+    Load the three models and wrap them in their logic processors
+    
+    Args:
+        config: Indexing configuration
+        embedding: Load the embedding model (False when only the texts are needed)
+    
+    Returns:
+        (CaptionGenerator, TextNormalizer, EmbeddingGenerator); the TextNormalizer is
+        None in single-pass mode, where the text normalization model is never loaded,
+        and the EmbeddingGenerator is None without embedding
+    """
+    role = caption_role(config)
+    img_to_text_model = build_model(role, config['models'][role])
+    logger.info("✓ Zero-shot tagger loaded (fast tier)" if role == 'zero_shot_tagger' else "✓ Image-to-Text model loaded")
+    
+    text_normalizer = None
+    if is_single_pass(config):
+        logger.info("Single-pass mode: captions are the normalized keywords, Text Normalization model skipped")
+    else:
+        text_norm_model = build_model('text_normalization', config['models']['text_normalization'])
+        text_normalizer = TextNormalizer(text_norm_model, create_cache(config, 'text_normalization'))
+        logger.info("✓ Text Normalization model loaded")
+    
+    embedding_gen = None
+    if embedding:
+        embedding_model = build_model('embedding', config['models']['embedding'])
+        embedding_gen = EmbeddingGenerator(embedding_model, create_cache(config, 'embedding'))
+        logger.info("✓ Embedding model loaded")
+    
+    return CaptionGenerator(img_to_text_model), text_normalizer, embedding_gen
+
+
+def connect_postgres(config: dict) -> PostgresWriter:
+    """Connect to PostgreSQL and create the tables if needed"""
+    postgres = PostgresWriter(config['database']['postgres'])
+    postgres.connect()
+    schema_path = os.path.join(os.path.dirname(__file__), 'storage', 'schema.sql')
+    postgres.create_table(schema_path)
+    return postgres
+
+
+def create_artifact_store(config: dict, postgres: PostgresWriter):
+    """ArtifactStore for the configured caption / normalization models, or None when disabled"""
+    if not config['processing'].get('artifact_store', {}).get('enabled', False):
+        return None
+    versions = stage_versions(config)
+    logger.info(f"Artifact store versions: {versions}")
+    return ArtifactStore(postgres, versions)
+
+
+def create_faiss_writer(config: dict):
+    """FAISSWriter or ShardedFAISSWriter for the configured index (not loaded yet)"""
+    faiss_config = config['database']['faiss']
+    if faiss_config.get('sharding', {}).get('enabled', False):
+        return ShardedFAISSWriter(faiss_config)
+    return FAISSWriter(faiss_config)
+
+
+def update_clip_index(config: dict, postgres: PostgresWriter, recreate: bool = False,
+                      block_size: int = 10000) -> int:
+    """
+    Add the CLIP image embeddings of stored images that the CLIP index does not hold yet
+    
+    The CLIP index (database.clip_index) serves the Retrieval Pipeline's
+    first_stage: clip, where the query is encoded once with the CLIP text tower and
+    searched against the images directly. It is caught up with PostgreSQL after the
+    images were processed, so it follows every indexing mode with one extra model.
+    
+    Args:
+        config: Indexing configuration
+        postgres: Connected PostgreSQL writer
+        recreate: Start an empty index instead of extending the one on disk
+        block_size: Rows per cursor fetch
+    
+    Returns:
+        Number of images added
+    """
+    clip_config = config['database']['clip_index']
+    clip_writer = FAISSWriter(clip_config)
+    if recreate:
+        clip_writer.create_index()
+    else:
+        clip_writer.load_index()
+    indexed_ids = set(clip_writer.image_ids)
+    
+    model_config = config['models']['image_embedding']
+    image_embedding_gen = ImageEmbeddingGenerator(
+        build_model('image_embedding', model_config),
+        embedding_dim=clip_config.get('embedding_dim', 768),
+        batch_size=model_config.get('batch_size', 64)
+    )
+    logger.info(f"✓ CLIP image model loaded ({len(indexed_ids)} images already in the CLIP index)")
+    
+    added = 0
+    for block in postgres.iter_image_paths(block_size):
+        rows = [(image_id, image_path) for image_id, image_path in block if image_id not in indexed_ids]
+        if not rows:
+            continue
+        embeddings = image_embedding_gen.process_batch([image_path for _, image_path in rows])
+        # Unreadable images have no vector; they are retried on the next update
+        readable = np.linalg.norm(embeddings, axis=1) > 0
+        clip_writer.add_vectors_batch([image_id for (image_id, _), ok in zip(rows, readable) if ok],
+                                      embeddings[readable])
+        added += int(readable.sum())
+        clip_writer.save_index()
+        logger.info(f"✓ CLIP index: {added} images added")
+    
+    if added or recreate:
+        clip_writer.save_index(final=True)
+    return added
+
+
+def generate_texts(image_batch: list, processors: tuple, telemetry: IndexingTelemetry,
+                   artifact_store: ArtifactStore = None) -> list:
+    """
+    Caption and normalize one batch of images
+    
+    Args:
+        image_batch: Image paths
+        processors: (CaptionGenerator, TextNormalizer or None, ...) from load_processors
+        telemetry: Telemetry receiving the stage timings
+        artifact_store: Optional store of captions / normalized texts from earlier runs
+    
+    Returns:
+        Normalized texts
+    """
+    caption_gen, text_normalizer = processors[:2]
+    
+    if artifact_store is None:
+        # Step 1: Image → Caption
+        with telemetry.stage('caption'):
+            captions = caption_gen.process_batch(image_batch)
+        
+        # Step 2: Caption → Normalized Text (single pass: the caption already is)
+        if text_normalizer is None:
+            normalized_texts = captions
+        else:
+            with telemetry.stage('normalize'):
+                normalized_texts = text_normalizer.process_batch(captions)
+    else:
+        # Steps 1-2, reusing outputs stored for the same image content and model versions
+        with telemetry.stage('hash'):
+            keys = [content_hash(image_path) for image_path in image_batch]
+        with telemetry.stage('caption'):
+            captions = artifact_store.cached('caption', keys, image_batch, caption_gen.process_batch)
+        if text_normalizer is None:
+            normalized_texts = captions
+        else:
+            with telemetry.stage('normalize'):
+                normalized_texts = artifact_store.cached('normalize', keys, captions, text_normalizer.process_batch)
+    return normalized_texts
+
+
+def process_images(image_batch: list, processors: tuple, postgres: PostgresWriter,
+                   telemetry: IndexingTelemetry, artifact_store: ArtifactStore = None,
+                   source: str = None) -> tuple:
+    """
+    Caption, normalize, store and embed one batch of images
+    
+    Args:
+        image_batch: Image paths
+        processors: (CaptionGenerator, TextNormalizer or None, EmbeddingGenerator) from load_processors
+        postgres: Connected PostgreSQL writer
+        telemetry: Telemetry receiving the stage timings
+        artifact_store: Optional store of captions / normalized texts from earlier runs
+        source: text_source stored with the rows (see text_source())
+    
+    Returns:
+        (image_ids, embeddings)
+    """
+    embedding_gen = processors[2]
+    
+    # Steps 1-2: Image → Caption → Normalized Text
+    normalized_texts = generate_texts(image_batch, processors, telemetry, artifact_store)
+    
+    # Step 3: Store in PostgreSQL
+    with telemetry.stage('db_insert'):
+        records = list(zip(image_batch, normalized_texts))
+        image_ids = postgres.insert_batch(records, text_source=source)
+    
+    # Step 4: Generate Embeddings
+    with telemetry.stage('embed'):
+        embeddings = embedding_gen.process_batch(normalized_texts)
+    
+    return image_ids, embeddings
+
+
+def run_batches(config: dict, image_paths: list, processors: tuple, postgres: PostgresWriter,
+                faiss_writer, image_registry: ImageRegistry, telemetry: IndexingTelemetry,
+                artifact_store: ArtifactStore = None) -> int:
+    """
+    Process images batch by batch with all three models resident
+    
+    Returns:
+        Number of images processed
+    """
+    batch_size = config['dataset']['batch_size']
+    save_interval = config['processing']['save_interval']
+    source = text_source(config)
+    total_processed = 0
+    profiler = BatchProfiler(config['processing'].get('profiler', {}))
+    
+    for batch_idx, image_batch in enumerate(create_batches(image_paths, batch_size)):
+        logger.info(f"\n--- Batch {batch_idx + 1} ({len(image_batch)} images) ---")
+        profiler.before_batch(batch_idx + 1)
+        
+        # Steps 1-4: Caption → Normalized Text → PostgreSQL → Embeddings
+        image_ids, embeddings = process_images(image_batch, processors, postgres, telemetry, artifact_store, source)
+        
+        # Register mappings
+        image_registry.register_batch(image_ids, image_batch)
+        
+        # Step 5: Store in FAISS
+        with telemetry.stage('faiss_add'):
+            faiss_writer.add_vectors_batch(image_ids, embeddings)
+        
+        total_processed += len(image_batch)
+        logger.info(f"✓ Processed {total_processed}/{len(image_paths)} images")
+        
+        # Save FAISS index periodically
+        if total_processed % save_interval == 0:
+            with telemetry.stage('faiss_save'):
+                faiss_writer.save_index()
+            logger.info("✓ FAISS index saved (periodic)")
+        
+        telemetry.record_batch(batch_idx + 1, len(image_batch))
+        profiler.after_batch(batch_idx + 1)
+    
+    profiler.stop()
+    save_caches(processors)
+    return total_processed
+
+
+# Stage-sequential mode: (stage, model role, logic processor) in pipeline order
+PIPELINE_STAGES = (
+    ('caption', 'img_to_text', CaptionGenerator),
+    ('normalize', 'text_normalization', TextNormalizer),
+    ('embed', 'embedding', EmbeddingGenerator),
+)
+
+
+def run_stage(config: dict, role: str, processor_cls, inputs: list, batch_size: int):
+    """
+    Load one model, run it over a whole chunk and drop it
+    
+    The model is only referenced from this frame, so it can be freed with
+    release_memory() once the function returns.
+    
+    Args:
+        config: Indexing configuration
+        role: Model role (img_to_text, text_normalization, embedding)
+        processor_cls: Logic processor wrapping the model
+        inputs: Chunk inputs (image paths, captions or normalized texts)
+        batch_size: Batch size for this stage
+    
+    Returns:
+        Outputs (list of texts, or embeddings array for the embedding role)
+    """
+    rss_before = get_current_rss_mb()
+    model = build_model(role, config['models'][role])
+    cache = create_cache(config, role)
+    processor = processor_cls(model) if cache is None else processor_cls(model, cache)
+    rss_loaded = get_current_rss_mb()
+    if rss_before is not None and rss_loaded is not None:
+        logger.info(f"Loaded {role} model (RSS {rss_before:.0f} -> {rss_loaded:.0f} MB)")
+    
+    batch_outputs = [processor.process_batch(batch) for batch in create_batches(inputs, batch_size)]
+    save_caches((processor,))
+    if role == 'embedding':
+        return np.concatenate(batch_outputs).astype('float32')
+    return [output for batch in batch_outputs for output in batch]
+
+
+def load_stage_artifact(path: str):
+    """Outputs of a finished stage (.npy embeddings or .json texts)"""
+    if path.endswith('.npy'):
+        return np.load(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_stage_artifact(path: str, outputs):
+    """Write stage outputs then rename, so a partial artifact is never reused"""
+    if path.endswith('.npy'):
+        tmp_path = path + '.tmp.npy'
+        np.save(tmp_path, outputs)
+    else:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(outputs, f)
+    os.replace(tmp_path, path)
+
+
+def run_stage_sequential(config: dict, image_paths: list, postgres: PostgresWriter, faiss_writer,
+                         image_registry: ImageRegistry, telemetry: IndexingTelemetry,
+                         artifact_store: ArtifactStore = None) -> int:
+    """
+    Process images chunk by chunk with one model resident at a time
+    
+    Each stage writes its outputs for the chunk to artifact_dir before the next
+    model is loaded, so peak memory is that of the largest model and an
+    interrupted run resumes from the last finished stage of the chunk.
+    
+    Returns:
+        Number of images processed
+    """
+    stage_config = config['processing'].get('stage_sequential', {})
+    chunk_size = stage_config.get('chunk_size', 2000)
+    artifact_dir = stage_config.get('artifact_dir', 'storage/stages')
+    batch_sizes = stage_config.get('batch_sizes', {})
+    os.makedirs(artifact_dir, exist_ok=True)
+    total_processed = 0
+    
+    # Single pass: the caption stage already produces the normalized text
+    single_pass = is_single_pass(config)
+    stages = [stage for stage in PIPELINE_STAGES if not (single_pass and stage[0] == 'normalize')]
+    source = text_source(config)
+    # Artifacts of a run with other models or prompts are not reused
+    versions = json.dumps({**stage_versions(config), 'embed': embedding_version(config)}, sort_keys=True)
+    
+    for chunk_idx, chunk in enumerate(create_batches(image_paths, chunk_size)):
+        logger.info(f"\n--- Chunk {chunk_idx + 1} ({len(chunk)} images) ---")
+        chunk_key = hashlib.sha1('\n'.join([versions] + chunk).encode('utf-8')).hexdigest()[:16]
+        
+        # Caption → Normalized Text → Embeddings, one model at a time
+        stage_outputs = {}
+        artifacts = []
+        keys = None
+        inputs = chunk
+        for stage_name, role, processor_cls in stages:
+            if stage_name == 'caption':
+                role = caption_role(config)
+            extension = 'npy' if stage_name == 'embed' else 'json'
+            artifact_path = os.path.join(artifact_dir, f"chunk_{chunk_key}_{stage_name}.{extension}")
+            artifacts.append(artifact_path)
+            
+            if os.path.exists(artifact_path):
+                outputs = load_stage_artifact(artifact_path)
+                logger.info(f"✓ {stage_name}: reusing {artifact_path}")
+            else:
+                compute = partial(run_stage, config, role, processor_cls,
+                                  batch_size=batch_sizes.get(stage_name, config['dataset']['batch_size']))
+                if artifact_store is not None and stage_name != 'embed':
+                    if keys is None:
+                        with telemetry.stage('hash'):
+                            keys = [content_hash(image_path) for image_path in chunk]
+                    # The model is only loaded if some outputs are not stored for its version
+                    with telemetry.stage(stage_name):
+                        outputs = artifact_store.cached(stage_name, keys, inputs, compute)
+                        release_memory()
+                else:
+                    with telemetry.stage(stage_name):
+                        outputs = compute(inputs)
+                        release_memory()
+                save_stage_artifact(artifact_path, outputs)
+                
+                rss = get_current_rss_mb()
+                logger.info(f"✓ {stage_name}: {len(chunk)} images"
+                            + (f" (RSS after unload {rss:.0f} MB)" if rss is not None else ""))
+            
+            stage_outputs[stage_name] = outputs
+            inputs = outputs
+        
+        # Store in PostgreSQL and FAISS once the chunk has its vectors
+        with telemetry.stage('db_insert'):
+            normalized_texts = stage_outputs['caption'] if single_pass else stage_outputs['normalize']
+            image_ids = postgres.insert_batch(list(zip(chunk, normalized_texts)), text_source=source)
+        if len(image_ids) != len(chunk):
+            raise RuntimeError(f"PostgreSQL insert returned {len(image_ids)} ids for {len(chunk)} images")
+        image_registry.register_batch(image_ids, chunk)
+        
+        with telemetry.stage('faiss_add'):
+            faiss_writer.add_vectors_batch(image_ids, stage_outputs['embed'])
+        with telemetry.stage('faiss_save'):
+            faiss_writer.save_index()
+        
+        for artifact_path in artifacts:
+            os.remove(artifact_path)
+        
+        total_processed += len(chunk)
+        logger.info(f"✓ Processed {total_processed}/{len(image_paths)} images")
+        telemetry.record_batch(chunk_idx + 1, len(chunk))
+    
+    return total_processed
+
+
 def main():
     """Main indexing pipeline orchestrator"""
     
@@ -81,56 +573,46 @@ def main():
     logger.info("STEP 2: Loading Models")
     logger.info("=" * 80)
     
-    img_to_text_model = ImageToTextModel(
-        model_path=config['models']['img_to_text']['path'],
-        device=config['models']['img_to_text']['device']
-    )
-    logger.info("✓ Image-to-Text model loaded")
-    
-    text_norm_model = TextNormalizationModel(
-        model_path=config['models']['text_normalization']['path'],
-        device=config['models']['text_normalization']['device']
-    )
-    logger.info("✓ Text Normalization model loaded")
-    
-    embedding_model = EmbeddingModel(
-        model_path=config['models']['embedding']['path'],
-        device=config['models']['embedding']['device']
-    )
-    logger.info("✓ Embedding model loaded")
-    
-    # Initialize logic processors
-    caption_gen = CaptionGenerator(img_to_text_model)
-    text_normalizer = TextNormalizer(text_norm_model)
-    embedding_gen = EmbeddingGenerator(embedding_model)
+    stage_sequential = config['processing'].get('stage_sequential', {}).get('enabled', False)
+    if stage_sequential:
+        # Models are loaded one at a time per chunk in STEP 4
+        processors = None
+        logger.info("Stage-sequential mode: models are loaded one at a time")
+    else:
+        processors = load_processors(config)
     
     # Initialize storage
     logger.info("=" * 80)
     logger.info("STEP 3: Initializing Storage")
     logger.info("=" * 80)
     
-    postgres = PostgresWriter(config['database']['postgres'])
-    postgres.connect()
-    
-    # Create table if not exists
-    schema_path = os.path.join(os.path.dirname(__file__), 'storage', 'schema.sql')
-    postgres.create_table(schema_path)
+    postgres = connect_postgres(config)
     
     # Get already processed images
     processed_paths = set(postgres.get_all_image_paths())
     logger.info(f"Found {len(processed_paths)} already processed images")
     
-    # Filter out already processed images
-    unprocessed_images = [img for img in image_paths if img not in processed_paths]
-    logger.info(f"Images to process: {len(unprocessed_images)}/{len(image_paths)}")
+    # Filter out already processed images (a re-index runs every image into a new index)
+    reindex = config['processing'].get('reindex', False)
+    if reindex:
+        unprocessed_images = list(image_paths)
+        logger.info(f"Re-indexing all {len(unprocessed_images)} images")
+    else:
+        unprocessed_images = [img for img in image_paths if img not in processed_paths]
+        logger.info(f"Images to process: {len(unprocessed_images)}/{len(image_paths)}")
     
     if len(unprocessed_images) == 0:
         logger.info("All images already processed!")
         postgres.close()
         return
     
-    faiss_writer = FAISSWriter(config['database']['faiss'])
-    faiss_writer.load_index()
+    faiss_writer = create_faiss_writer(config)
+    if reindex:
+        faiss_writer.create_index()
+    else:
+        faiss_writer.load_index()
+    
+    artifact_store = create_artifact_store(config, postgres)
     
     # Initialize registry
     image_registry = ImageRegistry()
@@ -140,53 +622,51 @@ def main():
     logger.info("STEP 4: Processing Images")
     logger.info("=" * 80)
     
-    batch_size = config['dataset']['batch_size']
-    save_interval = config['processing']['save_interval']
-    total_processed = 0
+    telemetry = IndexingTelemetry(
+        total_images=len(unprocessed_images),
+        progress_path=config['processing'].get('progress_file')
+    )
     
-    for batch_idx, image_batch in enumerate(create_batches(unprocessed_images, batch_size)):
-        logger.info(f"\n--- Batch {batch_idx + 1} ({len(image_batch)} images) ---")
-        
-        # Step 1: Image → Caption
-        captions = caption_gen.process_batch(image_batch)
-        
-        # Step 2: Caption → Normalized Text
-        normalized_texts = text_normalizer.process_batch(captions)
-        
-        # Step 3: Store in PostgreSQL
-        records = list(zip(image_batch, normalized_texts))
-        image_ids = postgres.insert_batch(records)
-        
-        # Register mappings
-        image_registry.register_batch(image_ids, image_batch)
-        
-        # Step 4: Generate Embeddings
-        embeddings = embedding_gen.process_batch(normalized_texts)
-        
-        # Step 5: Store in FAISS
-        faiss_writer.add_vectors_batch(image_ids, embeddings)
-        
-        total_processed += len(image_batch)
-        logger.info(f"✓ Processed {total_processed}/{len(unprocessed_images)} images")
-        
-        # Save FAISS index periodically
-        if total_processed % save_interval == 0:
-            faiss_writer.save_index()
-            logger.info("✓ FAISS index saved (periodic)")
+    if stage_sequential:
+        total_processed = run_stage_sequential(config, unprocessed_images, postgres, faiss_writer,
+                                               image_registry, telemetry, artifact_store)
+    else:
+        total_processed = run_batches(config, unprocessed_images, processors, postgres, faiss_writer,
+                                      image_registry, telemetry, artifact_store)
     
     # Final save
     logger.info("=" * 80)
     logger.info("STEP 5: Finalizing")
     logger.info("=" * 80)
     
-    faiss_writer.save_index()
+    # CLIP image index first, so it is complete when the text index version (watched by hot reload) changes
+    if config['database'].get('clip_index', {}).get('enabled', False):
+        processors = None
+        release_memory()
+        update_clip_index(config, postgres, recreate=reindex)
+    
+    faiss_writer.save_index(final=True)
+    
+    snapshot_config = config['database'].get('metadata_snapshot', {})
+    if snapshot_config.get('enabled', False):
+        export_metadata_snapshot(postgres, snapshot_config['path'], faiss_writer.version, full=reindex)
+    
     postgres.close()
     
     logger.info("=" * 80)
     logger.info("INDEXING PIPELINE COMPLETED!")
     logger.info(f"Total images processed: {total_processed}")
-    logger.info(f"FAISS index size: {faiss_writer.index.ntotal} vectors")
+    logger.info(f"FAISS index size: {faiss_writer.ntotal} vectors")
     logger.info(f"Registry size: {image_registry.get_count()} mappings")
+    if artifact_store is not None:
+        artifact_store.log_stats()
+    
+    summary = telemetry.summary()
+    logger.info(f"Throughput: {summary['images_per_sec']:.2f} images/sec "
+                f"in {IndexingTelemetry.format_seconds(summary['elapsed_seconds'])}")
+    for stage_name, seconds in summary['stage_seconds'].items():
+        logger.info(f"  {stage_name}: {seconds:.1f}s total")
+    logger.info(f"Peak CPU RSS: {summary['cpu_max_rss_mb']} MB | Peak GPU allocated: {summary['gpu_max_allocated_mb']} MB")
     logger.info("=" * 80)
 
 
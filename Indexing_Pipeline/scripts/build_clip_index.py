@@ -0,0 +1,87 @@
+"""
+Build CLIP Index Script
+
+Builds the CLIP image index (database.clip_index) for the images already stored
+in PostgreSQL, e.g. when the index is enabled on an existing database. The
+Retrieval Pipeline searches it with first_stage: clip. Only the CLIP image model
+is loaded (no captioning / normalization / text embedding).
+
+By default only images missing from the index are added. With --recreate the
+whole index is built in a temporary directory and then replaces the served files,
+manifest last, like rebuild_faiss.py.
+
+Usage:
+    python scripts/build_clip_index.py
+    python scripts/build_clip_index.py --recreate --block-size 5000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from run_indexing import load_config, connect_postgres, update_clip_index
+from rebuild_faiss import publish
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def build(config: dict, recreate: bool, block_size: int) -> int:
+    """
+    Add the missing images to the CLIP index, or rebuild it and publish it
+
+    Args:
+        config: Indexing configuration
+        recreate: Build a new index from every stored image
+        block_size: Rows per cursor fetch
+
+    Returns:
+        Number of images added
+    """
+    def with_index_path(index_path: str) -> dict:
+        clip_config = dict(config['database']['clip_index'], index_path=index_path)
+        return {**config, 'database': {**config['database'], 'clip_index': clip_config}}
+
+    index_path = os.path.join(parent_dir, config['database']['clip_index']['index_path'])
+    postgres = connect_postgres(config)
+    try:
+        if not recreate:
+            return update_clip_index(with_index_path(index_path), postgres, block_size=block_size)
+
+        target_dir = os.path.dirname(index_path)
+        build_dir = tempfile.mkdtemp(prefix='.rebuild_clip_', dir=target_dir)
+        try:
+            build_path = os.path.join(build_dir, os.path.basename(index_path))
+            added = update_clip_index(with_index_path(build_path), postgres, recreate=True, block_size=block_size)
+            published = publish(build_dir, target_dir, os.path.basename(index_path))
+            logger.info(f"✓ Published {len(published)} files to {target_dir}")
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True)
+        return added
+    finally:
+        postgres.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the CLIP image index from the images stored in PostgreSQL")
+    parser.add_argument('--config', default=os.path.join(parent_dir, 'config', 'indexing.yaml'))
+    parser.add_argument('--recreate', action='store_true', help="Rebuild the whole index instead of adding missing images")
+    parser.add_argument('--block-size', type=int, default=10000, help="Rows per server-side cursor fetch")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    added = build(load_config(args.config), args.recreate, args.block_size)
+    elapsed = time.perf_counter() - start
+
+    print("\n" + "=" * 80)
+    print("CLIP INDEX BUILD COMPLETE")
+    print("=" * 80)
+    print(f"Images added:     {added}")
+    print(f"Total time:       {elapsed:.1f}s ({added / elapsed if elapsed > 0 else 0.0:.1f} images/sec)")
+    print("=" * 80)
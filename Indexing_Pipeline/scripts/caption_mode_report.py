@@ -0,0 +1,147 @@
+"""
+Caption Mode Report
+
+Runs a sample of images through both indexing modes and compares them:
+
+- two-stage:   Qwen2-VL sentence caption -> Qwen2.5 keyword normalization
+- single-pass: Qwen2-VL emits the ' | ' keywords directly (caption_mode: keywords)
+
+For each mode it reports images/sec; for the single-pass output it reports the
+agreement with the two-stage normalized text (vocabulary keyword F1, identical
+keyword sets) and, with --embed, the cosine similarity of their embeddings,
+i.e. how differently the two texts would be retrieved.
+
+Usage:
+    python scripts/caption_mode_report.py
+    python scripts/caption_mode_report.py --sample 200 --embed --output caption_mode.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+import numpy as np
+from run_indexing import load_config
+from data.dataset_loader import DatasetLoader
+from models.registry import build_model
+from utils.fashion_vocabulary import extract_keywords, keyword_f1
+from utils.telemetry import release_memory
+
+
+def timed(function, *args):
+    """(result, seconds)"""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def run_modes(config: dict, image_paths: list) -> dict:
+    """
+    Normalized texts of both modes, loading the normalizer only for the two-stage run
+
+    Returns:
+        Outputs and timings of both modes
+    """
+    captioner = build_model('img_to_text', {**config['models']['img_to_text'], 'caption_mode': 'sentence'})
+    captioner.generate_caption(image_paths[0])  # Warm up
+
+    captions, caption_seconds = timed(captioner.generate_captions_batch, image_paths)
+    captioner.caption_mode = 'keywords'
+    single_pass, single_pass_seconds = timed(captioner.generate_captions_batch, image_paths)
+    del captioner
+    release_memory()
+
+    normalizer = build_model('text_normalization', config['models']['text_normalization'])
+    two_stage, normalize_seconds = timed(normalizer.normalize_texts_batch, captions)
+    del normalizer
+    release_memory()
+
+    return {
+        'captions': captions,
+        'two_stage': two_stage,
+        'single_pass': single_pass,
+        'two_stage_seconds': caption_seconds + normalize_seconds,
+        'normalize_seconds': normalize_seconds,
+        'single_pass_seconds': single_pass_seconds,
+    }
+
+
+def agreement(two_stage: list, single_pass: list) -> dict:
+    """Keyword agreement of the single-pass texts with the two-stage texts"""
+    reference = [set(extract_keywords(text)) for text in two_stage]
+    candidate = [set(extract_keywords(text)) for text in single_pass]
+    f1 = [keyword_f1(ref, cand) for ref, cand in zip(reference, candidate)]
+    return {
+        'keyword_f1': float(np.mean(f1)),
+        'keyword_f1_p10': float(np.percentile(f1, 10)),
+        'same_keywords': sum(ref == cand for ref, cand in zip(reference, candidate)) / len(reference),
+        'identical_text': sum(a == b for a, b in zip(two_stage, single_pass)) / len(two_stage),
+        'empty_single_pass': sum(not text for text in single_pass) / len(single_pass),
+    }
+
+
+def embedding_similarity(config: dict, two_stage: list, single_pass: list) -> dict:
+    """Cosine similarity of the embeddings the two texts would be indexed with"""
+    embedder = build_model('embedding', config['models']['embedding'])
+    a = embedder.generate_embeddings_batch(two_stage)
+    b = embedder.generate_embeddings_batch(single_pass)
+    cosine = np.sum(a * b, axis=1)  # Embeddings are L2-normalized
+    return {'embedding_cosine': float(np.mean(cosine)), 'embedding_cosine_p10': float(np.percentile(cosine, 10))}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare single-pass keyword captions with two-stage normalization")
+    parser.add_argument('--config', default=os.path.join(parent_dir, 'config', 'indexing.yaml'))
+    parser.add_argument('--sample', type=int, default=100, help="Images to run through both modes")
+    parser.add_argument('--embed', action='store_true', help="Also compare the embeddings of both texts")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write the report (with per-image outputs) as JSON")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    dataset_loader = DatasetLoader(
+        image_dir=config['dataset']['image_dir'],
+        supported_formats=config['dataset']['supported_formats']
+    )
+    image_paths = dataset_loader.load_images()
+    random.Random(args.seed).shuffle(image_paths)
+    image_paths = image_paths[:args.sample]
+    if not image_paths:
+        sys.exit("No images found")
+
+    outputs = run_modes(config, image_paths)
+    report = agreement(outputs['two_stage'], outputs['single_pass'])
+    if args.embed:
+        report.update(embedding_similarity(config, outputs['two_stage'], outputs['single_pass']))
+
+    n = len(image_paths)
+    print("\n" + "=" * 80)
+    print(f"CAPTION MODE REPORT ({n} images)")
+    print("=" * 80)
+    print(f"Two-stage:        {n / outputs['two_stage_seconds']:.2f} images/sec "
+          f"(normalization {outputs['normalize_seconds']:.1f}s of {outputs['two_stage_seconds']:.1f}s)")
+    print(f"Single-pass:      {n / outputs['single_pass_seconds']:.2f} images/sec")
+    print(f"Keyword F1:       {report['keyword_f1']:.3f} (p10 {report['keyword_f1_p10']:.3f})")
+    print(f"Same keywords:    {report['same_keywords']:.1%}")
+    print(f"Identical text:   {report['identical_text']:.1%}")
+    print(f"Empty outputs:    {report['empty_single_pass']:.1%}")
+    if args.embed:
+        print(f"Embedding cosine: {report['embedding_cosine']:.3f} (p10 {report['embedding_cosine_p10']:.3f})")
+    print("=" * 80)
+
+    if args.output:
+        report['images'] = [
+            {'image': path, 'caption': caption, 'two_stage': two, 'single_pass': one}
+            for path, caption, two, one in zip(image_paths, outputs['captions'],
+                                               outputs['two_stage'], outputs['single_pass'])
+        ]
+        report.update({k: outputs[k] for k in ('two_stage_seconds', 'normalize_seconds', 'single_pass_seconds')})
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
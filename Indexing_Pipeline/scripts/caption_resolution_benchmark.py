@@ -0,0 +1,141 @@
+"""
+Caption Resolution Benchmark
+
+Captions a sample of images at several max_pixels budgets and reports, for each
+budget, the visual tokens per image, captions/sec and how well the captions
+agree with those at the highest budget. Agreement is measured on the fashion
+attributes the search uses (colors, garments, settings from the shared
+vocabulary), so the cheapest budget that keeps them can be chosen for
+models.img_to_text.max_pixels.
+
+Usage:
+    python scripts/caption_resolution_benchmark.py
+    python scripts/caption_resolution_benchmark.py --sample 100 --max-pixels 100352 200704 401408 802816 0 --output report.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from qwen_vl_utils import smart_resize
+from run_indexing import load_config
+from data.dataset_loader import DatasetLoader
+from models.registry import build_model
+from utils.fashion_vocabulary import extract_keywords, keyword_f1
+
+# Qwen2-VL: one visual token per 28x28 patch after the 2x2 merge;
+# the processor's own default limit stands in for "native" (0)
+PATCH_PIXELS = 28 * 28
+NATIVE_MAX_PIXELS = 16384 * PATCH_PIXELS
+
+
+def visual_tokens(model, image_path: str) -> int:
+    """Visual tokens Qwen2-VL will see for an image under the model's current pixel limits"""
+    image = model.load_image(image_path)
+    height, width = smart_resize(
+        image.height, image.width,
+        min_pixels=model.min_pixels or 4 * PATCH_PIXELS,
+        max_pixels=model.max_pixels or NATIVE_MAX_PIXELS
+    )
+    return (height * width) // PATCH_PIXELS
+
+
+def run_budget(model, image_paths: list, max_pixels: int) -> dict:
+    """Caption the sample at one budget"""
+    model.max_pixels = max_pixels or None
+    tokens = [visual_tokens(model, path) for path in image_paths]
+
+    # Warm up kernels for this input size before timing
+    model.generate_caption(image_paths[0])
+    start = time.perf_counter()
+    captions = model.generate_captions_batch(image_paths)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'max_pixels': max_pixels,
+        'visual_tokens': sum(tokens) / len(tokens),
+        'captions_per_sec': len(image_paths) / elapsed if elapsed > 0 else 0.0,
+        'captions': captions,
+    }
+
+
+def compare(results: list, image_paths: list) -> list:
+    """Attribute agreement of every budget with the highest one"""
+    reference = max(results, key=lambda r: r['max_pixels'] or NATIVE_MAX_PIXELS)
+    reference_keywords = [set(extract_keywords(caption)) for caption in reference['captions']]
+    rows = []
+    for result in results:
+        keywords = [set(extract_keywords(caption)) for caption in result['captions']]
+        f1 = [keyword_f1(ref, cand) for ref, cand in zip(reference_keywords, keywords)]
+        rows.append({
+            'max_pixels': result['max_pixels'],
+            'visual_tokens': result['visual_tokens'],
+            'captions_per_sec': result['captions_per_sec'],
+            'attribute_f1': sum(f1) / len(f1),
+            'same_attributes': sum(ref == cand for ref, cand in zip(reference_keywords, keywords)) / len(keywords),
+            'samples': [
+                {'image': path, 'caption': caption}
+                for path, caption in list(zip(image_paths, result['captions']))[:5]
+            ],
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Captions/sec and attribute agreement per Qwen2-VL pixel budget")
+    parser.add_argument('--config', default=os.path.join(parent_dir, 'config', 'indexing.yaml'))
+    parser.add_argument('--sample', type=int, default=50, help="Images to caption per budget")
+    parser.add_argument('--max-pixels', type=int, nargs='+', default=[100352, 200704, 401408, 802816, 0],
+                        help="Budgets to compare (0 = native resolution)")
+    parser.add_argument('--min-agreement', type=float, default=0.9,
+                        help="Attribute F1 the recommended budget must keep")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write the report (with sample captions) as JSON")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    dataset_loader = DatasetLoader(
+        image_dir=config['dataset']['image_dir'],
+        supported_formats=config['dataset']['supported_formats']
+    )
+    image_paths = dataset_loader.load_images()
+    random.Random(args.seed).shuffle(image_paths)
+    image_paths = image_paths[:args.sample]
+    if not image_paths:
+        sys.exit("No images found")
+
+    # No configured pixel limits: the processor keeps those it is loaded with, which would cap every budget
+    model = build_model('img_to_text', {**config['models']['img_to_text'], 'min_pixels': None, 'max_pixels': None})
+    if not hasattr(model, 'max_pixels'):
+        sys.exit("The configured img_to_text backend has no pixel budget (use backend qwen2-vl)")
+
+    results = [run_budget(model, image_paths, max_pixels) for max_pixels in args.max_pixels]
+    rows = compare(results, image_paths)
+
+    print("\n" + "=" * 80)
+    print(f"CAPTION RESOLUTION BENCHMARK ({len(image_paths)} images)")
+    print("=" * 80)
+    print(f"{'max_pixels':>12} {'tokens/img':>11} {'captions/s':>11} {'attr F1':>8} {'same attrs':>11}")
+    for row in rows:
+        label = row['max_pixels'] or 'native'
+        print(f"{label:>12} {row['visual_tokens']:>11.0f} {row['captions_per_sec']:>11.2f} "
+              f"{row['attribute_f1']:>8.3f} {row['same_attributes']:>10.1%}")
+
+    # Cheapest budget (fewest visual tokens) that keeps the attributes
+    eligible = [row for row in rows if row['attribute_f1'] >= args.min_agreement]
+    if eligible:
+        best = min(eligible, key=lambda row: row['visual_tokens'])
+        print(f"\nRecommended max_pixels: {best['max_pixels'] or 'null (native)'} "
+              f"(attribute F1 {best['attribute_f1']:.3f} >= {args.min_agreement})")
+    print("=" * 80)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'images': len(image_paths), 'budgets': rows}, f, indent=2)
+        print(f"Report written to {args.output}")
@@ -21,6 +21,11 @@ def clear_database():
         
         # Truncate the table
         cursor.execute("TRUNCATE TABLE fashion_images CASCADE;")
+        
+        # Distributed indexing work queue (created by the first run)
+        cursor.execute("SELECT to_regclass('indexing_work_units');")
+        if cursor.fetchone()[0] is not None:
+            cursor.execute("TRUNCATE TABLE indexing_work_units;")
         conn.commit()
         
         # Get count
@@ -46,6 +51,29 @@ def clear_database():
             os.remove(faiss_ids)
             print(f"✓ Deleted FAISS IDs file")
         
+        for extra_file in ['faiss_index_manifest.json', 'faiss_index_metadata.npz', 'faiss_index_vectors.f32',
+                           'faiss_index_pca.bin']:
+            extra_path = os.path.join(parent_dir, 'storage', extra_file)
+            if os.path.exists(extra_path):
+                os.remove(extra_path)
+                print(f"✓ Deleted {extra_file}")
+        
+        # Sharded index files (faiss_index_shards.json, faiss_index_shardNNN*)
+        storage_dir = os.path.join(parent_dir, 'storage')
+        shard_files = [f for f in os.listdir(storage_dir) if f.startswith('faiss_index_shard')]
+        for shard_file in shard_files:
+            os.remove(os.path.join(storage_dir, shard_file))
+        if shard_files:
+            print(f"✓ Deleted {len(shard_files)} FAISS shard files")
+        
+        # Partial shards written by distributed workers
+        partial_dir = os.path.join(storage_dir, 'partial')
+        if os.path.isdir(partial_dir):
+            partial_files = os.listdir(partial_dir)
+            for partial_file in partial_files:
+                os.remove(os.path.join(partial_dir, partial_file))
+            print(f"✓ Deleted {len(partial_files)} partial shard files")
+        
     except Exception as e:
         print(f"❌ Error: {e}")
 
@@ -0,0 +1,253 @@
+"""
+Index Report Script
+
+Compares memory and recall of the FAISS index types and of reduced dimensions on a sample
+of the indexed vectors. The exact float32 index is the ground truth; recall@k is reported
+for every compressed type and every reduction with and without exact rescoring of the
+candidates from the raw vectors.
+
+Usage:
+    python scripts/index_report.py
+    python scripts/index_report.py --sample 50000 --queries 500 --k 10 --types SQfp16 SQ8 PQ --output report.json
+    python scripts/index_report.py --reductions pca truncate --dims 256 384 512
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+import faiss
+import numpy as np
+import yaml
+from storage.faiss_writer import INDEX_TYPES, REDUCTION_METHODS, build_index, reduce_vectors
+
+
+def load_vectors(faiss_config: dict) -> np.ndarray:
+    """
+    Indexed vectors: the raw vectors file if present, otherwise reconstructed from a flat index
+
+    Args:
+        faiss_config: FAISS section of indexing.yaml (paths relative to Indexing_Pipeline)
+
+    Returns:
+        Array (n, dim) float32
+    """
+    index_path = os.path.join(parent_dir, faiss_config['index_path'])
+    vectors_path = index_path.replace('.bin', '_vectors.f32')
+    dim = faiss_config.get('embedding_dim', 1024)
+
+    if os.path.exists(vectors_path):
+        rows = os.path.getsize(vectors_path) // (4 * dim)
+        return np.memmap(vectors_path, dtype='float32', mode='r', shape=(rows, dim))
+
+    index = faiss.read_index(index_path)
+    if not isinstance(index, faiss.IndexFlat) or index.d != dim:
+        raise RuntimeError(f"{index_path} is compressed or reduced and has no raw vectors file to sample from")
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray, k: int) -> float:
+    """Mean fraction of the true top-k found in the returned top-k"""
+    hits = sum(len(set(t[:k]) & set(f[:k])) for t, f in zip(truth, found))
+    return hits / (len(truth) * k)
+
+
+def search_excluding_self(index, queries: np.ndarray, query_rows: np.ndarray, k: int) -> np.ndarray:
+    """Top-k rows for each query, without the query's own row"""
+    _, indices = index.search(queries, k + 1)
+    return np.array([[i for i in row if i != self_row][:k] for row, self_row in zip(indices, query_rows)])
+
+
+def rescore(vectors: np.ndarray, queries: np.ndarray, query_rows: np.ndarray, index, k: int,
+            factor: int, index_queries: np.ndarray = None) -> np.ndarray:
+    """Top-k rows after exact inner-product rescoring of k * factor candidates"""
+    index_queries = queries if index_queries is None else index_queries
+    _, indices = index.search(index_queries, k * factor + 1)
+    results = []
+    for query, row, self_row in zip(queries, indices, query_rows):
+        candidates = np.array([i for i in row if i >= 0 and i != self_row])
+        exact = vectors[candidates] @ query
+        results.append(candidates[np.argsort(-exact)[:k]])
+    return np.array(results)
+
+
+def evaluate_reductions(vectors: np.ndarray, queries: np.ndarray, query_rows: np.ndarray, truth: np.ndarray,
+                        methods: list, dims: list, k: int, rescore_factor: int) -> list:
+    """
+    Build a flat index on reduced vectors for every method and dimension
+
+    Args:
+        vectors: Sample vectors (n, dim), normalized
+        queries: Query vectors (full dimension)
+        query_rows: Rows of the queries in vectors
+        truth: Full-dimension top-k rows per query
+        methods: Reduction methods ('pca', 'truncate')
+        dims: Output dimensions
+        k: Recall cutoff
+        rescore_factor: Candidates per result for the rescored recall
+
+    Returns:
+        One result dictionary per (method, dim)
+    """
+    full_dim = vectors.shape[1]
+    results = []
+    for method in methods:
+        for dim in dims:
+            if dim >= full_dim:
+                continue
+            start = time.perf_counter()
+            transform = None
+            if method == 'pca':
+                transform = faiss.PCAMatrix(full_dim, dim)
+                transform.train(vectors)
+            index = build_index("IndexFlatIP", dim)
+            index.add(reduce_vectors(vectors, method, dim, transform))
+            build_seconds = time.perf_counter() - start
+
+            reduced_queries = reduce_vectors(queries, method, dim, transform)
+            start = time.perf_counter()
+            found = search_excluding_self(index, reduced_queries, query_rows, k)
+            search_seconds = (time.perf_counter() - start) / len(queries)
+            rescored = rescore(vectors, queries, query_rows, index, k, rescore_factor, reduced_queries)
+            results.append({
+                'method': method,
+                'dim': dim,
+                'index_bytes': len(faiss.serialize_index(index)),
+                'build_seconds': build_seconds,
+                'search_seconds': search_seconds,
+                f'recall@{k}': recall_at_k(truth, found, k),
+                f'recall@{k}_rescored': recall_at_k(truth, rescored, k),
+            })
+    return results
+
+
+def evaluate(vectors: np.ndarray, index_types: list, num_queries: int, k: int, rescore_factor: int,
+             pq_m: int, pq_nbits: int, reductions: list = (), dims: list = ()) -> dict:
+    """
+    Build every index type and reduction on the vectors and measure memory and recall
+
+    Args:
+        vectors: Sample vectors (n, dim), normalized
+        index_types: Index types to compare against IndexFlatIP
+        num_queries: Sample vectors used as queries
+        k: Recall cutoff
+        rescore_factor: Candidates per result for the rescored recall
+        pq_m: PQ sub-quantizers
+        pq_nbits: Bits per PQ code
+        reductions: Reduction methods to compare against the full dimension
+        dims: Reduced dimensions
+
+    Returns:
+        Report dictionary
+    """
+    n, dim = vectors.shape
+    rng = np.random.default_rng(0)
+    query_rows = rng.choice(n, size=min(num_queries, n), replace=False)
+    queries = vectors[query_rows]
+
+    flat = build_index("IndexFlatIP", dim)
+    flat.add(vectors)
+    truth = search_excluding_self(flat, queries, query_rows, k)
+
+    results = []
+    for index_type in ["IndexFlatIP"] + [t for t in index_types if t != "IndexFlatIP"]:
+        index = build_index(index_type, dim, pq_m, pq_nbits)
+        start = time.perf_counter()
+        if not index.is_trained:
+            index.train(vectors)
+        index.add(vectors)
+        build_seconds = time.perf_counter() - start
+
+        index_bytes = len(faiss.serialize_index(index))
+        start = time.perf_counter()
+        found = search_excluding_self(index, queries, query_rows, k)
+        search_seconds = (time.perf_counter() - start) / len(queries)
+        entry = {
+            'index_type': index_type,
+            'index_bytes': index_bytes,
+            'bytes_per_vector': index_bytes / n,
+            'build_seconds': build_seconds,
+            'search_seconds': search_seconds,
+            f'recall@{k}': recall_at_k(truth, found, k),
+        }
+        if index_type != "IndexFlatIP":
+            rescored = rescore(vectors, queries, query_rows, index, k, rescore_factor)
+            entry[f'recall@{k}_rescored'] = recall_at_k(truth, rescored, k)
+        results.append(entry)
+
+    return {
+        'vectors': n,
+        'embedding_dim': dim,
+        'queries': len(queries),
+        'k': k,
+        'rescore_factor': rescore_factor,
+        'raw_vectors_bytes': n * dim * 4,
+        'results': results,
+        'reductions': evaluate_reductions(vectors, queries, query_rows, truth, reductions, dims, k, rescore_factor),
+    }
+
+
+def print_report(report: dict):
+    """Print memory and recall per index type"""
+    k = report['k']
+    print("\n" + "=" * 80)
+    print(f"FAISS INDEX REPORT ({report['vectors']} vectors, dim {report['embedding_dim']}, "
+          f"{report['queries']} queries)")
+    print("=" * 80)
+    print(f"{'type':<12}{'MB':>10}{'B/vector':>10}{'ms/query':>10}{'recall@' + str(k):>12}"
+          f"{'rescored x' + str(report['rescore_factor']):>14}")
+    for entry in report['results']:
+        rescored = entry.get(f'recall@{k}_rescored')
+        print(f"{entry['index_type']:<12}{entry['index_bytes'] / 1e6:>10.1f}{entry['bytes_per_vector']:>10.0f}"
+              f"{entry['search_seconds'] * 1000:>10.2f}{entry[f'recall@{k}']:>12.3f}"
+              f"{(f'{rescored:.3f}' if rescored is not None else '-'):>14}")
+    if report['reductions']:
+        print(f"\n{'reduction':<12}{'dim':>6}{'MB':>8}{'ms/query':>10}{'recall@' + str(k):>12}"
+              f"{'rescored x' + str(report['rescore_factor']):>14}")
+        for entry in report['reductions']:
+            print(f"{entry['method']:<12}{entry['dim']:>6}{entry['index_bytes'] / 1e6:>8.1f}"
+                  f"{entry['search_seconds'] * 1000:>10.2f}{entry[f'recall@{k}']:>12.3f}"
+                  f"{entry[f'recall@{k}_rescored']:>14.3f}")
+    print(f"\nRescoring reads the raw float32 vectors ({report['raw_vectors_bytes'] / 1e6:.1f} MB) "
+          f"from a memory-mapped file, not from RAM")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare memory and recall of FAISS index types")
+    parser.add_argument('--config', default=os.path.join(parent_dir, 'config', 'indexing.yaml'))
+    parser.add_argument('--sample', type=int, default=20000, help="Vectors to build the indexes from")
+    parser.add_argument('--queries', type=int, default=200, help="Sample vectors used as queries")
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--rescore-factor', type=int, default=4)
+    parser.add_argument('--types', nargs='*', default=[t for t in INDEX_TYPES if t != "IndexFlatIP"],
+                        choices=INDEX_TYPES)
+    parser.add_argument('--reductions', nargs='*', default=[],
+                        choices=[m for m in REDUCTION_METHODS if m != "none"])
+    parser.add_argument('--dims', nargs='+', type=int, default=[256, 384, 512])
+    parser.add_argument('--output', help="Optional path for the JSON report")
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        faiss_config = yaml.safe_load(f)['database']['faiss']
+
+    vectors = load_vectors(faiss_config)
+    if len(vectors) > args.sample:
+        rows = np.sort(np.random.default_rng(0).choice(len(vectors), size=args.sample, replace=False))
+        vectors = vectors[rows]
+    vectors = np.ascontiguousarray(vectors, dtype='float32')
+
+    report = evaluate(vectors, args.types, args.queries, args.k, args.rescore_factor,
+                      faiss_config.get('pq_m', 64), faiss_config.get('pq_nbits', 8),
+                      args.reductions, args.dims)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
@@ -0,0 +1,185 @@
+"""
+Rebuild FAISS Script
+
+Rebuilds the FAISS index from the normalized texts already stored in PostgreSQL,
+e.g. after the index files were lost or the embedding model changed. Only the
+embedding model is loaded (no captioning / normalization).
+
+Rows are streamed with a server-side cursor, embedded block by block (the
+embedding model buckets each block by token length) and written to a new
+index in a temporary directory. The new files then replace the served ones,
+manifest last, so searchers (and hot reload) only switch once the whole index
+is in place. Files of the old index that the new one does not have (e.g. shards
+after num_shards was lowered) are removed after the switch.
+
+Usage:
+    python scripts/rebuild_faiss.py
+    python scripts/rebuild_faiss.py --block-size 20000
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from run_indexing import (
+    load_config, connect_postgres, create_cache, create_faiss_writer, export_metadata_snapshot, save_caches
+)
+from models.registry import build_model
+from logic.embedding_logic import EmbeddingGenerator
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+# Files FAISSWriter writes for an index (and for each shard of a sharded one)
+INDEX_FILE_SUFFIXES = ('.bin', '_ids.npy', '_manifest.json', '_vectors.f32', '_pca.bin')
+
+
+def index_files(directory: str, index_name: str) -> list:
+    """
+    Files of an index (plain or sharded) in a directory
+
+    Args:
+        directory: Directory to list
+        index_name: File name of the index (e.g. faiss_index.bin)
+
+    Returns:
+        File names (other files such as the metadata snapshot are not included)
+    """
+    stem = os.path.splitext(index_name)[0]
+    suffixes = '|'.join(re.escape(suffix) for suffix in INDEX_FILE_SUFFIXES)
+    pattern = re.compile(rf"^{re.escape(stem)}(_shard\d+)?({suffixes})$")
+    return [name for name in os.listdir(directory) if pattern.match(name) or name == f"{stem}_shards.json"]
+
+
+def publish(build_dir: str, target_dir: str, index_name: str) -> list:
+    """
+    Move the rebuilt files over the served ones, manifests last, then remove stale files
+
+    Each file is replaced atomically; the manifests switch readers to the new
+    version once all its files are in place. Files of the old index that the new
+    one did not produce are only removed after that switch.
+
+    Args:
+        build_dir: Directory holding the new index files
+        target_dir: Directory of the served index (same filesystem, so os.replace is atomic)
+        index_name: File name of the index (e.g. faiss_index.bin)
+
+    Returns:
+        Published file names
+    """
+    def order(name: str) -> int:
+        if name.endswith('_shards.json'):
+            return 3
+        if name.endswith('_manifest.json'):
+            return 2
+        # ids before the index, as FAISSWriter.save_index writes them
+        return 1 if name.endswith('.bin') else 0
+
+    names = sorted(os.listdir(build_dir), key=order)
+    for name in names:
+        os.replace(os.path.join(build_dir, name), os.path.join(target_dir, name))
+
+    stale = sorted(set(index_files(target_dir, index_name)) - set(names))
+    for name in stale:
+        os.remove(os.path.join(target_dir, name))
+    if stale:
+        logger.info(f"Removed {len(stale)} stale index files: {', '.join(stale)}")
+    return names
+
+
+def rebuild(config: dict, block_size: int) -> dict:
+    """
+    Embed every stored normalized text into a fresh index and publish it
+
+    Args:
+        config: Indexing configuration
+        block_size: Rows per cursor fetch and embedding call (forward passes are sized by
+                    models.embedding.max_batch_tokens)
+
+    Returns:
+        Throughput summary
+    """
+    faiss_config = config['database']['faiss']
+    index_path = os.path.join(parent_dir, faiss_config['index_path'])
+    target_dir = os.path.dirname(index_path)
+    build_dir = tempfile.mkdtemp(prefix='.rebuild_', dir=target_dir)
+
+    rebuild_faiss_config = dict(faiss_config, index_path=os.path.join(build_dir, os.path.basename(index_path)))
+    faiss_writer = create_faiss_writer({**config, 'database': {**config['database'], 'faiss': rebuild_faiss_config}})
+    faiss_writer.create_index()
+
+    embedding_gen = EmbeddingGenerator(build_model('embedding', config['models']['embedding']),
+                                       create_cache(config, 'embedding'))
+    logger.info("✓ Embedding model loaded")
+
+    postgres = connect_postgres(config)
+    start = time.perf_counter()
+    embed_seconds = 0.0
+    rows = 0
+    try:
+        for block in postgres.iter_normalized_texts(block_size):
+            image_ids = [row[0] for row in block]
+            texts = [row[1] for row in block]
+
+            embed_start = time.perf_counter()
+            embeddings = embedding_gen.process_batch(texts)
+            embed_seconds += time.perf_counter() - embed_start
+
+            faiss_writer.add_vectors_batch(image_ids, embeddings)
+            rows += len(block)
+            elapsed = time.perf_counter() - start
+            logger.info(f"Embedded {rows} texts ({rows / elapsed:.1f} texts/sec)")
+
+        if rows == 0:
+            raise RuntimeError("No rows in PostgreSQL, nothing to rebuild")
+
+        faiss_writer.save_index(final=True)
+        save_caches((embedding_gen,))
+
+        # Snapshot first: it carries the new index version the manifest is about to publish
+        snapshot_config = config['database'].get('metadata_snapshot', {})
+        if snapshot_config.get('enabled', False):
+            export_metadata_snapshot(postgres, os.path.join(parent_dir, snapshot_config['path']),
+                                     faiss_writer.version, full=True)
+
+        published = publish(build_dir, target_dir, os.path.basename(index_path))
+        logger.info(f"✓ Published {len(published)} files to {target_dir} (version {faiss_writer.version})")
+    finally:
+        postgres.close()
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+    elapsed = time.perf_counter() - start
+    return {
+        'rows': rows,
+        'elapsed_seconds': elapsed,
+        'embed_seconds': embed_seconds,
+        'texts_per_sec': rows / elapsed if elapsed > 0 else 0.0,
+        'embed_texts_per_sec': rows / embed_seconds if embed_seconds > 0 else 0.0,
+        'version': faiss_writer.version,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the FAISS index from normalized texts in PostgreSQL")
+    parser.add_argument('--config', default=os.path.join(parent_dir, 'config', 'indexing.yaml'))
+    parser.add_argument('--block-size', type=int, default=20000, help="Rows per server-side cursor fetch")
+    args = parser.parse_args()
+
+    summary = rebuild(load_config(args.config), args.block_size)
+
+    print("\n" + "=" * 80)
+    print("FAISS REBUILD COMPLETE")
+    print("=" * 80)
+    print(f"Vectors:          {summary['rows']}")
+    print(f"Total time:       {summary['elapsed_seconds']:.1f}s ({summary['texts_per_sec']:.1f} texts/sec)")
+    print(f"Embedding time:   {summary['embed_seconds']:.1f}s ({summary['embed_texts_per_sec']:.1f} texts/sec)")
+    print(f"Index version:    {summary['version']}")
+    print("=" * 80)
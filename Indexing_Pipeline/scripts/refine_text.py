@@ -0,0 +1,125 @@
+"""
+Refine Text Script
+
+Replaces the normalized texts of fast-tier rows (CLIP zero-shot tags, text_source
+clip-tags:...) with VLM captions + normalization, then rebuilds the FAISS index
+from PostgreSQL so the refined texts are searchable. Run it in increments with
+--limit after a fast-tier backfill; image_ids do not change.
+
+Usage:
+    python scripts/refine_text.py --status
+    python scripts/refine_text.py --limit 50000
+    python scripts/refine_text.py --limit 50000 --no-rebuild
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
+
+from run_indexing import (
+    load_config, load_processors, save_caches, connect_postgres, create_artifact_store,
+    generate_texts, text_source
+)
+from rebuild_faiss import rebuild
+from utils.batching import create_batches
+from utils.logger import setup_logger
+from utils.telemetry import IndexingTelemetry, release_memory
+
+logger = setup_logger(__name__)
+
+
+def print_status(postgres):
+    """Rows per text_source"""
+    print("\n" + "=" * 80)
+    print("ROWS PER TEXT SOURCE")
+    print("=" * 80)
+    for source, count in postgres.count_by_text_source():
+        print(f"{count:>10}  {source or '(unknown)'}")
+    print("=" * 80)
+
+
+def refine(config: dict, source_prefix: str, limit: int) -> int:
+    """
+    Re-caption fast-tier rows with the VLM pipeline
+
+    Args:
+        config: Indexing configuration (the fast tier is switched off here)
+        source_prefix: text_source prefix of the rows to refine
+        limit: Maximum rows this run (None = all)
+
+    Returns:
+        Number of refined rows
+    """
+    refine_config = {**config, 'processing': {**config['processing'], 'fast_tier': False}}
+    postgres = connect_postgres(refine_config)
+    image_paths = postgres.get_paths_by_text_source(source_prefix, limit)
+    if not image_paths:
+        logger.info(f"No rows with text_source {source_prefix}*")
+        postgres.close()
+        return 0
+    logger.info(f"Refining {len(image_paths)} rows with text_source {source_prefix}*")
+
+    # Vectors come from the rebuild, so the embedding model is not loaded here
+    processors = load_processors(refine_config, embedding=False)
+    artifact_store = create_artifact_store(refine_config, postgres)
+    source = text_source(refine_config)
+    telemetry = IndexingTelemetry(total_images=len(image_paths),
+                                  progress_path=config['processing'].get('progress_file'))
+
+    refined = 0
+    for batch_idx, image_batch in enumerate(create_batches(image_paths, config['dataset']['batch_size'])):
+        normalized_texts = generate_texts(image_batch, processors, telemetry, artifact_store)
+        # Upserts by image_path: normalized_text and text_source change, image_id stays
+        with telemetry.stage('db_insert'):
+            image_ids = postgres.insert_batch(list(zip(image_batch, normalized_texts)), text_source=source)
+        if len(image_ids) != len(image_batch):
+            raise RuntimeError(f"PostgreSQL update returned {len(image_ids)} ids for {len(image_batch)} images")
+        refined += len(image_batch)
+        telemetry.record_batch(batch_idx + 1, len(image_batch))
+
+    save_caches(processors)
+    if artifact_store is not None:
+        artifact_store.log_stats()
+    postgres.close()
+    return refined
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-caption fast-tier rows with the VLM and rebuild the index")
+    parser.add_argument('--config', default=os.path.join(parent_dir, 'config', 'indexing.yaml'))
+    parser.add_argument('--source-prefix', default='clip-tags', help="text_source prefix of the rows to refine")
+    parser.add_argument('--limit', type=int, help="Maximum rows to refine in this run")
+    parser.add_argument('--no-rebuild', action='store_true', help="Only update PostgreSQL (rebuild later)")
+    parser.add_argument('--block-size', type=int, default=20000, help="Rows per cursor fetch in the rebuild")
+    parser.add_argument('--status', action='store_true', help="Only print rows per text_source")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    if args.status:
+        postgres = connect_postgres(config)
+        print_status(postgres)
+        postgres.close()
+        sys.exit(0)
+
+    start = time.perf_counter()
+    refined = refine(config, args.source_prefix, args.limit)
+    refine_seconds = time.perf_counter() - start
+    release_memory()
+
+    # FAISS vectors cannot be updated in place: re-embed every stored text into a new index
+    summary = None
+    if refined and not args.no_rebuild:
+        summary = rebuild(config, args.block_size)
+
+    print("\n" + "=" * 80)
+    print("TEXT REFINEMENT COMPLETE")
+    print("=" * 80)
+    print(f"Refined rows:     {refined} ({refined / refine_seconds:.2f} images/sec)" if refined else "Refined rows:     0")
+    if summary is not None:
+        print(f"Index rebuilt:    {summary['rows']} vectors in {summary['elapsed_seconds']:.1f}s "
+              f"(version {summary['version']})")
+    print("=" * 80)
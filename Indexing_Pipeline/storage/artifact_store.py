@@ -0,0 +1,138 @@
+"""
+Store captions and normalized texts per image content hash and model version
+
+Rows of image_artifacts are keyed by (content_hash, stage, version). The
+version names the model and prompt that produced the output, so changing the
+normalization prompt only re-runs normalization, and switching the embedder
+re-runs neither the captioner nor the normalizer.
+"""
+import hashlib
+from psycopg2.extras import execute_values
+from typing import Callable, Dict, List, Optional, Tuple
+from storage.postgres_writer import PostgresWriter
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def content_hash(image_path: str, block_size: int = 1 << 20) -> str:
+    """
+    SHA-256 of an image file's bytes
+
+    Args:
+        image_path: Image path
+        block_size: Read size
+
+    Returns:
+        Hex digest (the same image under another path gets the same hash)
+    """
+    digest = hashlib.sha256()
+    with open(image_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """Cached stage outputs in PostgreSQL"""
+
+    def __init__(self, postgres: PostgresWriter, versions: Dict[str, str], table_name: str = 'image_artifacts'):
+        """
+        Initialize artifact store
+
+        Args:
+            postgres: Connected PostgreSQL writer (its connection is reused)
+            versions: stage -> version of the configured model and prompt
+            table_name: Artifact table
+        """
+        self.postgres = postgres
+        self.versions = versions
+        self.table_name = table_name
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    def get_many(self, stage: str, version: str, keys: List[str]) -> Dict[str, str]:
+        """
+        Stored outputs of a stage
+
+        Args:
+            stage: 'caption' or 'normalize'
+            version: Model / prompt version
+            keys: Content hashes
+
+        Returns:
+            content_hash -> output for the keys that are stored
+        """
+        cursor = self.postgres.cursor
+        cursor.execute(
+            f"SELECT content_hash, output FROM {self.table_name} "
+            f"WHERE stage = %s AND version = %s AND content_hash = ANY(%s)",
+            (stage, version, list(set(keys)))
+        )
+        return dict(cursor.fetchall())
+
+    def put_many(self, stage: str, version: str, items: List[Tuple[str, str]]):
+        """
+        Store outputs of a stage
+
+        Args:
+            stage: 'caption' or 'normalize'
+            version: Model / prompt version
+            items: (content_hash, output) pairs
+        """
+        if not items:
+            return
+        try:
+            execute_values(
+                self.postgres.cursor,
+                f"""
+                INSERT INTO {self.table_name} (content_hash, stage, version, output) VALUES %s
+                ON CONFLICT (content_hash, stage, version) DO UPDATE SET output = EXCLUDED.output
+                """,
+                [(key, stage, version, output) for key, output in dict(items).items()]
+            )
+            self.postgres.conn.commit()
+        except Exception as e:
+            # The outputs are still used for this run, they just are not cached
+            logger.error(f"Failed to store {stage} artifacts: {e}")
+            self.postgres.conn.rollback()
+
+    def cached(self, stage: str, keys: List[str], inputs: list, compute: Callable[[list], list]) -> list:
+        """
+        Outputs for the inputs, computing only those not stored for the stage's current version
+
+        Empty outputs (model errors) are returned but not stored, so they are retried.
+
+        Args:
+            stage: 'caption' or 'normalize'
+            keys: Content hash of each input
+            inputs: Stage inputs (image paths or captions)
+            compute: Function running the model on a list of inputs
+
+        Returns:
+            One output per input
+        """
+        version = self.versions[stage]
+        stored = self.get_many(stage, version, keys)
+        missing = [i for i, key in enumerate(keys) if key not in stored]
+        self.hits[stage] = self.hits.get(stage, 0) + len(keys) - len(missing)
+        self.misses[stage] = self.misses.get(stage, 0) + len(missing)
+
+        outputs = [stored.get(key) for key in keys]
+        if missing:
+            computed = compute([inputs[i] for i in missing])
+            for i, output in zip(missing, computed):
+                outputs[i] = output
+            self.put_many(stage, version, [(keys[i], output) for i, output in zip(missing, computed) if output])
+        return outputs
+
+    def hit_rate(self, stage: str) -> Optional[float]:
+        """Fraction of lookups answered from the store"""
+        total = self.hits.get(stage, 0) + self.misses.get(stage, 0)
+        return self.hits.get(stage, 0) / total if total else None
+
+    def log_stats(self):
+        """Log hits / misses per stage"""
+        for stage in sorted(set(self.hits) | set(self.misses)):
+            logger.info(f"Artifact store {stage}: {self.hits.get(stage, 0)} reused, "
+                        f"{self.misses.get(stage, 0)} computed ({self.hit_rate(stage):.1%} reused)")
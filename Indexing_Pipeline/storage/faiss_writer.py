@@ -5,10 +5,90 @@ import faiss
 import numpy as np
 from typing import List
 import os
+import json
+import time
+import uuid
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Supported index_type values: exact float32, scalar quantized (2 / 1 bytes per dim), product quantized
+INDEX_TYPES = ("IndexFlatIP", "SQfp16", "SQ8", "PQ")
+
+
+def build_index(index_type: str, dim: int, pq_m: int = 64, pq_nbits: int = 8):
+    """
+    Create an empty inner-product FAISS index
+    
+    Args:
+        index_type: One of INDEX_TYPES
+        dim: Vector dimension
+        pq_m: PQ sub-quantizers (dim must be divisible by it)
+        pq_nbits: Bits per PQ code
+    
+    Returns:
+        FAISS index (SQ8 and PQ need training before vectors are added)
+    """
+    if index_type == "IndexFlatIP":
+        return faiss.IndexFlatIP(dim)
+    if index_type == "SQfp16":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+    if index_type == "SQ8":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+    if index_type == "PQ":
+        return faiss.IndexPQ(dim, pq_m, pq_nbits, faiss.METRIC_INNER_PRODUCT)
+    raise ValueError(f"Unknown index_type '{index_type}', expected one of {INDEX_TYPES}")
+
+
+def index_type_of(index) -> str:
+    """INDEX_TYPES name of a loaded FAISS index"""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexFlat):
+        return "IndexFlatIP"
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        if index.sq.qtype == faiss.ScalarQuantizer.QT_fp16:
+            return "SQfp16"
+        if index.sq.qtype == faiss.ScalarQuantizer.QT_8bit:
+            return "SQ8"
+    if isinstance(index, faiss.IndexPQ):
+        return "PQ"
+    raise ValueError(f"Unsupported FAISS index {type(index).__name__}, expected one of {INDEX_TYPES}")
+
+
+def min_train_vectors(index_type: str, pq_nbits: int = 8) -> int:
+    """Fewest vectors the index type can be trained on"""
+    return 2 ** pq_nbits if index_type == "PQ" else 1
+
+
+# Supported reduction.method values: keep all dims, learned PCA, keep the leading dims
+REDUCTION_METHODS = ("none", "pca", "truncate")
+
+
+def reduce_vectors(vectors: np.ndarray, method: str, dim: int, transform=None,
+                   normalize: bool = True) -> np.ndarray:
+    """
+    Project vectors to the index dimension
+    
+    Args:
+        vectors: Array (n, embedding_dim), float32
+        method: One of REDUCTION_METHODS
+        dim: Output dimension
+        transform: Trained faiss.PCAMatrix (method 'pca')
+        normalize: L2-normalize the projected vectors (inner product = cosine)
+    
+    Returns:
+        Array (n, dim), float32
+    """
+    if method == "none":
+        return vectors
+    if method == "pca":
+        reduced = transform.apply_py(np.ascontiguousarray(vectors, dtype='float32'))
+    else:
+        reduced = np.ascontiguousarray(vectors[:, :dim], dtype='float32')
+    if normalize:
+        reduced = reduced / np.maximum(np.linalg.norm(reduced, axis=1, keepdims=True), 1e-12)
+    return reduced.astype('float32')
+
 
 class FAISSWriter:
     """Handle FAISS vector index operations"""
@@ -24,15 +104,165 @@ class FAISSWriter:
         self.index_path = config['index_path']
         self.embedding_dim = config.get('embedding_dim', 1024)
         self.normalize_vectors = config.get('normalize_vectors', True)
+        self.index_type = config.get('index_type', 'IndexFlatIP')
+        self.pq_m = config.get('pq_m', 64)
+        self.pq_nbits = config.get('pq_nbits', 8)
+        self.train_size = config.get('train_size', 50000)
+        reduction = config.get('reduction', {})
+        self.reduction_method = reduction.get('method', 'none')
+        self.index_dim = reduction.get('dim', 256) if self.reduction_method != 'none' else self.embedding_dim
+        self.store_raw_vectors = config.get(
+            'store_raw_vectors', self.index_type != 'IndexFlatIP' or self.reduction_method != 'none'
+        )
+        self.transform = None  # faiss.PCAMatrix when reduction.method is 'pca'
+        self.ids_path = self.index_path.replace('.bin', '_ids.npy')
+        self.manifest_path = self.index_path.replace('.bin', '_manifest.json')
+        self.vectors_path = self.index_path.replace('.bin', '_vectors.f32')
+        self.transform_path = self.index_path.replace('.bin', '_pca.bin')
         self.index = None
         self.image_ids = []  # Store image_ids corresponding to vectors
+        self.version = None  # Changes on every save, shared with the metadata snapshot
+        self.train_buffer = []  # Vectors waiting for a quantized index to be trained
+        self.pending_raw = []  # Vectors not yet appended to the raw vectors file
+        
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index_type '{self.index_type}', expected one of {INDEX_TYPES}")
+        if self.reduction_method not in REDUCTION_METHODS:
+            raise ValueError(f"Unknown reduction method '{self.reduction_method}', expected one of {REDUCTION_METHODS}")
+        if self.index_dim > self.embedding_dim:
+            raise ValueError(f"reduction.dim {self.index_dim} exceeds embedding_dim {self.embedding_dim}")
+        if self.reduction_method == 'pca' and self.train_size < self.embedding_dim:
+            raise ValueError(f"train_size {self.train_size} is too small to fit PCA on {self.embedding_dim}-dim "
+                             f"vectors (needs at least embedding_dim)")
+        if self.needs_training and not self.store_raw_vectors:
+            # Vectors buffered for training are only persisted (and restored on resume) through the raw vectors file
+            logger.warning(f"{self.index_type} / reduction {self.reduction_method} needs training: "
+                           f"keeping raw vectors although store_raw_vectors is false")
+            self.store_raw_vectors = True
     
     def create_index(self):
         """Create new FAISS index"""
-        # Using IndexFlatIP (Inner Product) for cosine similarity
-        # Vectors should be normalized for cosine similarity
-        self.index = faiss.IndexFlatIP(self.embedding_dim)
-        logger.info(f"Created FAISS index with dimension {self.embedding_dim}")
+        # Inner Product on normalized vectors = cosine similarity
+        self.index = build_index(self.index_type, self.index_dim, self.pq_m, self.pq_nbits)
+        self.transform = faiss.PCAMatrix(self.embedding_dim, self.index_dim) if self.reduction_method == 'pca' else None
+        self.train_buffer = []
+        self.pending_raw = []
+        for stale_path in (self.vectors_path, self.transform_path):
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+        logger.info(f"Created {self.index_type} FAISS index with dimension {self.index_dim}"
+                    f" (reduction: {self.reduction_method}, embedding_dim {self.embedding_dim})")
+    
+    @property
+    def needs_training(self) -> bool:
+        """Whether vectors are buffered until the quantizer or the reduction is trained"""
+        return self.index_type in ("SQ8", "PQ") or self.reduction_method == 'pca'
+    
+    @property
+    def buffered(self) -> int:
+        """Vectors waiting for index training"""
+        return sum(len(batch) for batch in self.train_buffer)
+    
+    @property
+    def is_trained(self) -> bool:
+        """Whether the reduction and the index can take vectors"""
+        return self.index.is_trained and (self.transform is None or self.transform.is_trained)
+    
+    @property
+    def min_train_vectors(self) -> int:
+        """Fewest buffered vectors to train on at the final save"""
+        needed = min_train_vectors(self.index_type, self.pq_nbits)
+        # PCA is fixed for the life of the index: fewer vectors than input dims give a rank-deficient fit
+        return max(needed, self.embedding_dim) if self.transform is not None else needed
+    
+    def reduce(self, embeddings: np.ndarray) -> np.ndarray:
+        """Project normalized embeddings to the index dimension"""
+        return reduce_vectors(embeddings, self.reduction_method, self.index_dim, self.transform,
+                              self.normalize_vectors)
+    
+    def _train(self):
+        """Train the reduction and the quantizer on the buffered vectors and add them"""
+        vectors = np.concatenate(self.train_buffer).astype('float32')
+        if self.transform is not None and not self.transform.is_trained:
+            logger.info(f"Fitting PCA {self.embedding_dim} -> {self.index_dim} on {len(vectors)} vectors")
+            self.transform.train(vectors)
+        vectors = self.reduce(vectors)
+        if not self.index.is_trained:
+            logger.info(f"Training {self.index_type} index on {len(vectors)} vectors")
+            self.index.train(vectors)
+        self.index.add(vectors)
+        self.train_buffer = []
+    
+    def _raw_vector_rows(self) -> int:
+        """Rows in the raw vectors file"""
+        if not os.path.exists(self.vectors_path):
+            return 0
+        return os.path.getsize(self.vectors_path) // (4 * self.embedding_dim)
+    
+    def _restore_raw_vectors(self):
+        """Align the raw vectors file with the ids and refill the training buffer"""
+        rows = self._raw_vector_rows()
+        if rows > len(self.image_ids):
+            # Interrupted save: drop rows without ids
+            with open(self.vectors_path, 'r+b') as f:
+                f.truncate(len(self.image_ids) * 4 * self.embedding_dim)
+            rows = len(self.image_ids)
+        
+        if rows < self.index.ntotal:
+            # Index saved without raw vectors (e.g. before store_raw_vectors was enabled)
+            if not self._backfill_raw_vectors(rows):
+                return
+            rows = self.index.ntotal
+        
+        if not self.is_trained and rows > 0:
+            raw = np.memmap(self.vectors_path, dtype='float32', mode='r', shape=(rows, self.embedding_dim))
+            self.train_buffer = [np.array(raw[self.index.ntotal:])]
+            logger.info(f"Restored {self.buffered} vectors waiting for index training")
+    
+    def _backfill_raw_vectors(self, rows: int, chunk_size: int = 100000) -> bool:
+        """
+        Append the index's own vectors for rows missing from the raw vectors file
+        
+        Only possible without reduction (the index holds full-dimension vectors, exact for
+        IndexFlatIP, decoded for the quantized types); otherwise raw storage is turned off and
+        the partial file removed, so nothing is rescored against rows that do not match the index.
+        
+        Returns:
+            Whether the raw vectors file now covers the index
+        """
+        if self.reduction_method != 'none':
+            logger.warning(f"Raw vectors file has {rows} rows for {self.index.ntotal} indexed vectors and the "
+                           f"missing ones cannot be rebuilt; disabling raw vectors until the index is rebuilt")
+            self.store_raw_vectors = False
+            if os.path.exists(self.vectors_path):
+                os.remove(self.vectors_path)
+            return False
+        
+        logger.info(f"Filling raw vectors {rows}..{self.index.ntotal} from the {self.index_type} index")
+        with open(self.vectors_path, 'r+b' if os.path.exists(self.vectors_path) else 'wb') as f:
+            f.truncate(rows * 4 * self.embedding_dim)
+            f.seek(rows * 4 * self.embedding_dim)
+            for start in range(rows, self.index.ntotal, chunk_size):
+                count = min(chunk_size, self.index.ntotal - start)
+                f.write(np.ascontiguousarray(self.index.reconstruct_n(start, count), dtype='float32').tobytes())
+        return True
+    
+    def _adopt_index(self):
+        """Take the type and dimension from an index saved without a manifest"""
+        index_type = index_type_of(self.index)
+        if index_type != self.index_type:
+            logger.warning(f"Index on disk is {index_type}, config asks for {self.index_type}; "
+                           f"new vectors keep the on-disk type until the index is rebuilt")
+            self.index_type = index_type
+        if self.index_type == "PQ":
+            pq = faiss.downcast_index(self.index).pq
+            self.pq_m, self.pq_nbits = pq.M, pq.nbits
+        
+        # Indexes without a manifest predate dimensionality reduction
+        if self.index.d != self.embedding_dim:
+            raise ValueError(f"Index on disk has {self.index.d} dims without a manifest, "
+                             f"embedding_dim is {self.embedding_dim}")
+        self._adopt_reduction({'method': 'none'})
     
     def load_index(self):
         """Load existing FAISS index"""
@@ -42,10 +272,29 @@ class FAISSWriter:
                 logger.info(f"Loaded FAISS index from {self.index_path}")
                 
                 # Load image_ids if exists
-                ids_path = self.index_path.replace('.bin', '_ids.npy')
-                if os.path.exists(ids_path):
-                    self.image_ids = np.load(ids_path).tolist()
+                if os.path.exists(self.ids_path):
+                    self.image_ids = np.load(self.ids_path).tolist()
                     logger.info(f"Loaded {len(self.image_ids)} image IDs")
+                
+                if os.path.exists(self.manifest_path):
+                    with open(self.manifest_path, 'r') as f:
+                        manifest = json.load(f)
+                    self.version = manifest.get('version')
+                    self._adopt_reduction(manifest.get('reduction', {'method': 'none'}))
+                    if manifest.get('index_type', 'IndexFlatIP') != self.index_type:
+                        logger.warning(
+                            f"Index on disk is {manifest.get('index_type')}, config asks for {self.index_type}; "
+                            f"new vectors keep the on-disk type until the index is rebuilt"
+                        )
+                        self.index_type = manifest.get('index_type')
+                else:
+                    self._adopt_index()
+                if 'store_raw_vectors' not in self.config:
+                    # Default follows the on-disk index: exact indexes are never rescored
+                    self.store_raw_vectors = self.index_type != 'IndexFlatIP' or self.reduction_method != 'none'
+                
+                if self.store_raw_vectors:
+                    self._restore_raw_vectors()
             except Exception as e:
                 logger.error(f"Failed to load index: {e}")
                 self.create_index()
@@ -53,6 +302,29 @@ class FAISSWriter:
             logger.info("No existing index found, creating new one")
             self.create_index()
     
+    def _adopt_reduction(self, reduction: dict):
+        """Use the reduction the index on disk was built with"""
+        method = reduction.get('method', 'none')
+        dim = reduction.get('dim', self.embedding_dim) if method != 'none' else self.embedding_dim
+        if method != self.reduction_method or dim != self.index_dim:
+            logger.warning(
+                f"Index on disk uses reduction {method} ({dim} dims), config asks for "
+                f"{self.reduction_method} ({self.index_dim} dims); keeping the on-disk reduction until the index is rebuilt"
+            )
+            self.reduction_method, self.index_dim = method, dim
+        
+        self.transform = None
+        if method == 'pca':
+            if os.path.exists(self.transform_path):
+                self.transform = faiss.read_VectorTransform(self.transform_path)
+            else:
+                self.transform = faiss.PCAMatrix(self.embedding_dim, self.index_dim)
+    
+    @property
+    def ntotal(self) -> int:
+        """Number of vectors in the index, including those waiting for training"""
+        return self.index.ntotal + self.buffered
+    
     def add_vector(self, image_id: int, embedding: np.ndarray):
         """
         Add single vector to index
@@ -61,13 +333,7 @@ class FAISSWriter:
             image_id: Database image_id
             embedding: Embedding vector
         """
-        # Normalize if required
-        if self.normalize_vectors:
-            embedding = embedding / np.linalg.norm(embedding)
-        
-        # Add to index
-        self.index.add(embedding.reshape(1, -1).astype('float32'))
-        self.image_ids.append(image_id)
+        self.add_vectors_batch([image_id], embedding.reshape(1, -1))
         logger.debug(f"Added vector for image_id {image_id}")
     
     def add_vectors_batch(self, image_ids: List[int], embeddings: np.ndarray):
@@ -83,20 +349,63 @@ class FAISSWriter:
             norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
             embeddings = embeddings / norms
         
-        # Add to index
-        self.index.add(embeddings.astype('float32'))
+        embeddings = embeddings.astype('float32')
+        if self.store_raw_vectors:
+            self.pending_raw.append(embeddings)
+        
+        # Add to index (PCA and quantized indexes buffer vectors until train_size is reached)
+        if self.is_trained:
+            self.index.add(self.reduce(embeddings))
+        else:
+            self.train_buffer.append(embeddings)
+            if self.buffered >= self.train_size:
+                self._train()
         self.image_ids.extend(image_ids)
         logger.info(f"Added {len(image_ids)} vectors to index")
     
-    def save_index(self):
-        """Save FAISS index to disk"""
+    def save_index(self, final: bool = False):
+        """
+        Save FAISS index to disk
+        
+        Every file is written to a temporary path and renamed over the served one, so a
+        searcher loading concurrently never reads a partly written file. Only a final save
+        publishes a new manifest version; periodic checkpoints keep the version, so hot
+        reload in the Retrieval Pipeline does not reload the index every save_interval images.
+        
+        Args:
+            final: End of a run. Only then is an index still short of train_size trained on the
+                   vectors buffered so far; periodic saves keep them buffered (they are restored
+                   from the raw vectors file on resume)
+        """
         try:
-            # Save index
-            faiss.write_index(self.index, self.index_path)
+            # Train on what we have rather than leaving a quantized index empty after the run
+            if final and not self.is_trained and self.buffered >= self.min_train_vectors:
+                self._train()
+            
+            if self.transform is not None and self.transform.is_trained:
+                tmp_path = self.transform_path + '.tmp'
+                faiss.write_VectorTransform(self.transform, tmp_path)
+                os.replace(tmp_path, self.transform_path)
+            
+            # Raw vectors first: rows beyond the saved ids are dropped on load
+            if self.pending_raw:
+                with open(self.vectors_path, 'ab') as f:
+                    for embeddings in self.pending_raw:
+                        f.write(np.ascontiguousarray(embeddings, dtype='float32').tobytes())
+                self.pending_raw = []
             
-            # Save image_ids
-            ids_path = self.index_path.replace('.bin', '_ids.npy')
-            np.save(ids_path, np.array(self.image_ids))
+            # Ids before the index: ids are append-only, so a reader between the two renames
+            # gets an index whose rows all have ids
+            tmp_path = self.ids_path + '.tmp.npy'
+            np.save(tmp_path, np.array(self.image_ids))
+            os.replace(tmp_path, self.ids_path)
+            
+            tmp_path = self.index_path + '.tmp'
+            faiss.write_index(self.index, tmp_path)
+            os.replace(tmp_path, self.index_path)
+            
+            # Save manifest last so readers never see a version without its files
+            self.write_manifest(publish=final)
             
             logger.info(f"Saved FAISS index to {self.index_path}")
             logger.info(f"Index contains {self.index.ntotal} vectors")
@@ -104,6 +413,30 @@ class FAISSWriter:
             logger.error(f"Failed to save index: {e}")
             raise
     
+    def write_manifest(self, publish: bool = True):
+        """
+        Write index manifest
+        
+        Args:
+            publish: Give the index a new version id (checkpoints keep the current one,
+                     None before the first publish, which hot reload ignores)
+        """
+        if publish:
+            self.version = uuid.uuid4().hex
+        manifest = {
+            'version': self.version,
+            'ntotal': int(self.index.ntotal),
+            'embedding_dim': self.embedding_dim,
+            'index_type': self.index_type,
+            'reduction': {'method': self.reduction_method, 'dim': self.index_dim},
+            'raw_vectors': self.store_raw_vectors,
+            'saved_at': time.time()
+        }
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+    
     def search(self, query_embedding: np.ndarray, k: int = 10) -> tuple:
         """
         Search for k nearest neighbors
@@ -121,7 +454,7 @@ class FAISSWriter:
         
         # Search
         distances, indices = self.index.search(
-            query_embedding.reshape(1, -1).astype('float32'), 
+            self.reduce(query_embedding.reshape(1, -1).astype('float32')),
             k
         )
         
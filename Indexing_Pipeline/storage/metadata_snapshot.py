@@ -0,0 +1,280 @@
+"""
+Columnar image metadata snapshot exported next to the FAISS index
+
+The snapshot maps image_id -> (image_path, normalized_text, created_at) so the
+retrieval pipeline can resolve FAISS results without a PostgreSQL round-trip.
+Strings are stored as one UTF-8 byte buffer plus offsets per column, and rows
+are sorted by image_id for binary-search lookups.
+
+This module only depends on numpy so it can be loaded by the Retrieval Pipeline.
+"""
+import os
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+
+
+def _encode_strings(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Pack strings into a UTF-8 byte buffer and an offsets array"""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        offsets[1:] = np.cumsum([len(value) for value in encoded])
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    return data, offsets
+
+
+def _splice_strings(pieces: List[Tuple[np.ndarray, np.ndarray, int, int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Join row ranges [begin, end) of packed string columns given as (data, offsets, begin, end)"""
+    data, offsets, total = [], [np.zeros(1, dtype=np.int64)], 0
+    for piece_data, piece_offsets, begin, end in pieces:
+        data.append(piece_data[piece_offsets[begin]:piece_offsets[end]])
+        offsets.append(piece_offsets[begin + 1:end + 1] - piece_offsets[begin] + total)
+        total += int(piece_offsets[end] - piece_offsets[begin])
+    return np.concatenate(data).astype(np.uint8), np.concatenate(offsets)
+
+
+def _to_timestamp(value) -> float:
+    """Convert a created_at value (datetime or number) to epoch seconds"""
+    if value is None:
+        return 0.0
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return float(value)
+
+
+class MetadataSnapshot:
+    """In-memory columnar copy of the fashion_images metadata"""
+
+    def __init__(self, image_ids: np.ndarray, path_data: np.ndarray, path_offsets: np.ndarray,
+                 text_data: np.ndarray, text_offsets: np.ndarray, created_at: np.ndarray,
+                 index_version: str = ""):
+        """
+        Initialize snapshot from columns (rows sorted by image_id)
+
+        Args:
+            image_ids: Sorted image ids (N,)
+            path_data / path_offsets: Packed image paths
+            text_data / text_offsets: Packed normalized texts
+            created_at: Row creation times as epoch seconds (N,)
+            index_version: Version of the FAISS index this snapshot was exported with
+        """
+        self.image_ids = image_ids
+        self.path_data = path_data
+        self.path_offsets = path_offsets
+        self.text_data = text_data
+        self.text_offsets = text_offsets
+        self.created_at = created_at
+        self.index_version = index_version
+
+    @classmethod
+    def empty(cls) -> "MetadataSnapshot":
+        """Create snapshot without rows"""
+        return cls.from_records([])
+
+    @classmethod
+    def from_records(cls, records: List[Tuple], index_version: str = "") -> "MetadataSnapshot":
+        """
+        Build snapshot from database rows
+
+        Args:
+            records: List of (image_id, image_path, normalized_text, created_at) tuples
+            index_version: Version of the FAISS index
+
+        Returns:
+            MetadataSnapshot
+        """
+        records = sorted(records, key=lambda row: row[0])
+        path_data, path_offsets = _encode_strings([row[1] for row in records])
+        text_data, text_offsets = _encode_strings([row[2] or "" for row in records])
+        return cls(
+            image_ids=np.array([row[0] for row in records], dtype=np.int64),
+            path_data=path_data,
+            path_offsets=path_offsets,
+            text_data=text_data,
+            text_offsets=text_offsets,
+            created_at=np.array([_to_timestamp(row[3]) for row in records], dtype=np.float64),
+            index_version=index_version
+        )
+
+    @classmethod
+    def from_columns(cls, image_ids: np.ndarray, image_paths: List[str], normalized_texts: List[str],
+                     created_at: np.ndarray, index_version: str = "") -> "MetadataSnapshot":
+        """
+        Build snapshot from column arrays (avoids per-row tuples for large catalogs)
+
+        Args:
+            image_ids: Image ids (N,)
+            image_paths: Image paths (N)
+            normalized_texts: Normalized texts (N)
+            created_at: Creation times as epoch seconds (N,)
+            index_version: Version of the FAISS index
+
+        Returns:
+            MetadataSnapshot
+        """
+        image_ids = np.asarray(image_ids, dtype=np.int64)
+        order = np.argsort(image_ids, kind='stable')
+        path_data, path_offsets = _encode_strings([image_paths[i] for i in order])
+        text_data, text_offsets = _encode_strings([normalized_texts[i] for i in order])
+        return cls(
+            image_ids=image_ids[order],
+            path_data=path_data,
+            path_offsets=path_offsets,
+            text_data=text_data,
+            text_offsets=text_offsets,
+            created_at=np.asarray(created_at, dtype=np.float64)[order],
+            index_version=index_version
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "MetadataSnapshot":
+        """
+        Load snapshot from an .npz file
+
+        Args:
+            path: Snapshot file path
+
+        Returns:
+            MetadataSnapshot
+        """
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                image_ids=data['image_ids'],
+                path_data=data['path_data'],
+                path_offsets=data['path_offsets'],
+                text_data=data['text_data'],
+                text_offsets=data['text_offsets'],
+                created_at=data['created_at'],
+                index_version=str(data['index_version'])
+            )
+
+    def save(self, path: str):
+        """
+        Save snapshot atomically (write to a temp file, then rename)
+
+        Args:
+            path: Snapshot file path
+        """
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                image_ids=self.image_ids,
+                path_data=self.path_data,
+                path_offsets=self.path_offsets,
+                text_data=self.text_data,
+                text_offsets=self.text_offsets,
+                created_at=self.created_at,
+                index_version=np.array(self.index_version)
+            )
+        os.replace(tmp_path, path)
+
+    def merge(self, records: List[Tuple], index_version: Optional[str] = None) -> "MetadataSnapshot":
+        """
+        Return a new snapshot with rows added or replaced
+
+        Only the given records are encoded. Existing rows are copied as contiguous
+        packed ranges between the records, so nothing else is decoded or re-sorted.
+
+        Args:
+            records: List of (image_id, image_path, normalized_text, created_at) tuples
+            index_version: New index version (keeps the current one if None)
+
+        Returns:
+            Merged MetadataSnapshot
+        """
+        version = self.index_version if index_version is None else index_version
+        delta = MetadataSnapshot.from_records(list({int(row[0]): row for row in records}.values()))
+        n, m = len(self.image_ids), len(delta.image_ids)
+
+        # Position of each record among the current rows, and whether it replaces the row there
+        starts = np.searchsorted(self.image_ids, delta.image_ids)
+        replaced = np.zeros(m, dtype=bool)
+        inside = starts < n
+        replaced[inside] = self.image_ids[starts[inside]] == delta.image_ids[inside]
+        # Current rows [resume[j], starts[j]) come right before record j
+        resume = np.concatenate([[0], (starts + replaced)[:-1]]).astype(np.int64)
+
+        # (snapshot, begin, end) row ranges in image_id order; consecutive records form one range
+        pieces = []
+        groups = np.union1d([0], np.flatnonzero(starts > resume)).tolist() if m else []
+        for begin, end in zip(groups, groups[1:] + [m]):
+            pieces.append((self, int(resume[begin]), int(starts[begin])))
+            pieces.append((delta, begin, end))
+        pieces.append((self, int(starts[-1] + replaced[-1]) if m else 0, n))
+
+        path_data, path_offsets = _splice_strings([(src.path_data, src.path_offsets, begin, end)
+                                                   for src, begin, end in pieces])
+        text_data, text_offsets = _splice_strings([(src.text_data, src.text_offsets, begin, end)
+                                                   for src, begin, end in pieces])
+        return MetadataSnapshot(
+            image_ids=np.concatenate([src.image_ids[begin:end] for src, begin, end in pieces]).astype(np.int64),
+            path_data=path_data,
+            path_offsets=path_offsets,
+            text_data=text_data,
+            text_offsets=text_offsets,
+            created_at=np.concatenate([src.created_at[begin:end] for src, begin, end in pieces]).astype(np.float64),
+            index_version=version
+        )
+
+    def rows(self) -> List[Tuple]:
+        """All rows as (image_id, image_path, normalized_text, created_at) tuples"""
+        return [
+            (int(self.image_ids[i]), self._path(i), self._text(i), float(self.created_at[i]))
+            for i in range(len(self.image_ids))
+        ]
+
+    def iter_normalized_texts(self) -> Iterator[str]:
+        """Yield every normalized text in image_id order"""
+        for i in range(len(self.image_ids)):
+            yield self._text(i)
+
+    def _path(self, row: int) -> str:
+        start, end = self.path_offsets[row], self.path_offsets[row + 1]
+        return self.path_data[start:end].tobytes().decode('utf-8')
+
+    def _text(self, row: int) -> str:
+        start, end = self.text_offsets[row], self.text_offsets[row + 1]
+        return self.text_data[start:end].tobytes().decode('utf-8')
+
+    def max_created_at(self) -> Optional[float]:
+        """Latest created_at in the snapshot (epoch seconds) or None if empty"""
+        if len(self.created_at) == 0:
+            return None
+        return float(self.created_at.max())
+
+    def get_images_by_ids(self, image_ids: List[int]) -> Tuple[List[Dict], List[int]]:
+        """
+        Look up metadata for image ids
+
+        Args:
+            image_ids: List of image ids
+
+        Returns:
+            Tuple of (found image dictionaries, ids missing from the snapshot)
+        """
+        if len(image_ids) == 0 or len(self.image_ids) == 0:
+            return [], list(image_ids)
+
+        query = np.asarray(image_ids, dtype=np.int64)
+        rows = np.searchsorted(self.image_ids, query)
+        rows = np.minimum(rows, len(self.image_ids) - 1)
+        found = self.image_ids[rows] == query
+
+        images = []
+        missing = []
+        for image_id, row, hit in zip(query.tolist(), rows.tolist(), found.tolist()):
+            if not hit:
+                missing.append(image_id)
+                continue
+            images.append({
+                'id': image_id,
+                'image_path': self._path(row),
+                'normalized_text': self._text(row),
+                'created_at': datetime.fromtimestamp(float(self.created_at[row]))
+            })
+        return images, missing
+
+    def __len__(self) -> int:
+        return len(self.image_ids)
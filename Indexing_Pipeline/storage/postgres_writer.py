@@ -3,7 +3,8 @@ Store image_id, path, normalized text in PostgreSQL
 """
 import psycopg2
 from psycopg2.extras import execute_batch
-from typing import List, Tuple, Optional
+from datetime import datetime
+from typing import Iterator, List, Tuple, Optional
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -87,12 +88,13 @@ class PostgresWriter:
             self.conn.rollback()
             return None
     
-    def insert_batch(self, records: List[Tuple[str, str]]) -> List[int]:
+    def insert_batch(self, records: List[Tuple[str, str]], text_source: Optional[str] = None) -> List[int]:
         """
         Insert batch of records
         
         Args:
             records: List of (image_path, normalized_text) tuples
+            text_source: Version of the models that produced the normalized texts
         
         Returns:
             List of image_ids
@@ -100,14 +102,14 @@ class PostgresWriter:
         image_ids = []
         try:
             query = f"""
-                INSERT INTO {self.table_name} (image_path, normalized_text)
-                VALUES (%s, %s)
+                INSERT INTO {self.table_name} (image_path, normalized_text, text_source)
+                VALUES (%s, %s, %s)
                 ON CONFLICT (image_path) DO UPDATE
-                SET normalized_text = EXCLUDED.normalized_text
+                SET normalized_text = EXCLUDED.normalized_text, text_source = EXCLUDED.text_source
                 RETURNING image_id
             """
-            for record in records:
-                self.cursor.execute(query, record)
+            for image_path, normalized_text in records:
+                self.cursor.execute(query, (image_path, normalized_text, text_source))
                 image_id = self.cursor.fetchone()[0]
                 image_ids.append(image_id)
             
@@ -154,6 +156,100 @@ class PostgresWriter:
             logger.error(f"Failed to get image paths: {e}")
             return []
     
+    def get_records_since(self, created_after: Optional[datetime] = None) -> List[Tuple]:
+        """
+        Get metadata rows created at or after a timestamp
+        
+        Args:
+            created_after: Lower bound for created_at (None returns every row)
+        
+        Returns:
+            List of (image_id, image_path, normalized_text, created_at) tuples
+        """
+        try:
+            query = f"SELECT image_id, image_path, normalized_text, created_at FROM {self.table_name}"
+            if created_after is None:
+                self.cursor.execute(query)
+            else:
+                self.cursor.execute(query + " WHERE created_at >= %s", (created_after,))
+            return self.cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Failed to get records: {e}")
+            self.conn.rollback()
+            return []
+    
+    def get_paths_by_text_source(self, source_prefix: str, limit: Optional[int] = None) -> List[str]:
+        """
+        Image paths whose normalized text came from models with a given version prefix
+        
+        Args:
+            source_prefix: Start of text_source (e.g. 'clip-tags' for the fast tier)
+            limit: Maximum number of paths (oldest image_ids first)
+        
+        Returns:
+            List of image paths
+        """
+        query = f"SELECT image_path FROM {self.table_name} WHERE text_source LIKE %s ORDER BY image_id"
+        params = [source_prefix.replace('%', r'\%').replace('_', r'\_') + '%']
+        if limit:
+            query += " LIMIT %s"
+            params.append(limit)
+        self.cursor.execute(query, params)
+        return [row[0] for row in self.cursor.fetchall()]
+    
+    def count_by_text_source(self) -> List[Tuple[Optional[str], int]]:
+        """(text_source, row count) pairs, largest first"""
+        self.cursor.execute(
+            f"SELECT text_source, COUNT(*) FROM {self.table_name} GROUP BY text_source ORDER BY COUNT(*) DESC"
+        )
+        return self.cursor.fetchall()
+    
+    def iter_normalized_texts(self, block_size: int = 10000) -> Iterator[List[Tuple[int, str]]]:
+        """
+        Stream (image_id, normalized_text) rows in blocks with a server-side cursor
+        
+        Args:
+            block_size: Rows fetched per round trip
+        
+        Yields:
+            Lists of (image_id, normalized_text) in image_id order
+        """
+        cursor = self.conn.cursor(name='stream_normalized_texts')
+        cursor.itersize = block_size
+        try:
+            cursor.execute(f"SELECT image_id, normalized_text FROM {self.table_name} ORDER BY image_id")
+            while True:
+                rows = cursor.fetchmany(block_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+            self.conn.commit()
+    
+    def iter_image_paths(self, block_size: int = 10000) -> Iterator[List[Tuple[int, str]]]:
+        """
+        Stream (image_id, image_path) rows in blocks with a server-side cursor
+        
+        Args:
+            block_size: Rows fetched per round trip
+        
+        Yields:
+            Lists of (image_id, image_path) in image_id order
+        """
+        cursor = self.conn.cursor(name='stream_image_paths')
+        cursor.itersize = block_size
+        try:
+            cursor.execute(f"SELECT image_id, image_path FROM {self.table_name} ORDER BY image_id")
+            while True:
+                rows = cursor.fetchmany(block_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+            self.conn.commit()
+    
     def close(self):
         """Close database connection"""
         if self.cursor:
@@ -4,9 +4,40 @@ CREATE TABLE IF NOT EXISTS fashion_images (
     image_id SERIAL PRIMARY KEY,
     image_path TEXT NOT NULL UNIQUE,
     normalized_text TEXT NOT NULL,
+    text_source TEXT,  -- version of the models that produced normalized_text (e.g. clip-tags:... for the fast tier)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Databases created before text_source existed
+ALTER TABLE fashion_images ADD COLUMN IF NOT EXISTS text_source TEXT;
+
 -- Create index for faster lookups
 CREATE INDEX IF NOT EXISTS idx_image_path ON fashion_images(image_path);
 CREATE INDEX IF NOT EXISTS idx_created_at ON fashion_images(created_at);
+CREATE INDEX IF NOT EXISTS idx_text_source ON fashion_images(text_source);
+
+-- Work queue for distributed indexing (run_distributed.py)
+CREATE TABLE IF NOT EXISTS indexing_work_units (
+    unit_id SERIAL PRIMARY KEY,
+    image_paths TEXT[] NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',  -- pending | claimed | done | merged | failed
+    worker_id TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    heartbeat_at TIMESTAMP,
+    shard_path TEXT,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_work_units_status ON indexing_work_units(status, unit_id);
+
+-- Captions and normalized texts per image content and model / prompt version
+CREATE TABLE IF NOT EXISTS image_artifacts (
+    content_hash TEXT NOT NULL,
+    stage TEXT NOT NULL,  -- caption | normalize
+    version TEXT NOT NULL,
+    output TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (content_hash, stage, version)
+);
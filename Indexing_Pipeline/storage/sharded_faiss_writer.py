@@ -0,0 +1,194 @@
+"""
+Store vectors + ids in several FAISS shards
+
+Each shard is a regular FAISSWriter index (own .bin, ids and manifest). A shards
+manifest lists them and gets a new version whenever the index is published, so
+the Retrieval Pipeline can fan a query out over all shards and reload only the
+shards that changed.
+"""
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+import numpy as np
+from storage.faiss_writer import FAISSWriter
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Ways of assigning an image_id to a shard
+SHARD_STRATEGIES = ("hash", "range")
+
+
+class ShardedFAISSWriter:
+    """FAISS index split into shards by image_id hash or range"""
+
+    def __init__(self, config: dict):
+        """
+        Initialize sharded index
+
+        Args:
+            config: FAISS configuration dict with a `sharding` section
+                    (num_shards, strategy, range_size, save_threads)
+        """
+        sharding = config.get('sharding', {})
+        self.config = config
+        self.index_path = config['index_path']
+        self.strategy = sharding.get('strategy', 'hash')
+        self.num_shards = sharding.get('num_shards', 4)
+        self.range_size = sharding.get('range_size', 1_000_000)
+        self.save_threads = sharding.get('save_threads', 4)
+        self.manifest_path = self.index_path.replace('.bin', '_shards.json')
+        self.shards: Dict[int, FAISSWriter] = {}
+        self.dirty = set()
+        self.version = None
+
+        if self.strategy not in SHARD_STRATEGIES:
+            raise ValueError(f"Unknown shard strategy '{self.strategy}', expected one of {SHARD_STRATEGIES}")
+
+    def shard_path(self, shard_id: int) -> str:
+        """Index path of a shard"""
+        return self.index_path.replace('.bin', f'_shard{shard_id:03d}.bin')
+
+    def shard_of(self, image_id: int) -> int:
+        """
+        Shard an image_id belongs to
+
+        With 'hash' ids are spread over num_shards; with 'range' each shard holds
+        range_size consecutive ids, so new images only touch the newest shard.
+        """
+        if self.strategy == 'range':
+            return int(image_id) // self.range_size
+        return int(image_id) % self.num_shards
+
+    def _new_shard(self, shard_id: int) -> FAISSWriter:
+        shard_config = dict(self.config, index_path=self.shard_path(shard_id))
+        return FAISSWriter(shard_config)
+
+    def create_index(self):
+        """Start with no shards (they are created on first write)"""
+        self.shards = {}
+        self.dirty = set()
+
+    def load_index(self):
+        """Load the shards listed in the shards manifest"""
+        self.create_index()
+        if not os.path.exists(self.manifest_path):
+            logger.info("No existing sharded index found, creating new one")
+            return
+
+        with open(self.manifest_path, 'r') as f:
+            manifest = json.load(f)
+
+        configured = {'strategy': self.strategy, 'num_shards': self.num_shards, 'range_size': self.range_size}
+        mismatched = {key: manifest.get(key) for key, value in configured.items() if manifest.get(key) != value}
+        if mismatched:
+            raise ValueError(
+                f"Sharded index at {self.manifest_path} was built with "
+                f"{', '.join(f'{key}={value}' for key, value in mismatched.items())} but the config has "
+                f"{', '.join(f'{key}={configured[key]}' for key in mismatched)}; rebuild it to change sharding"
+            )
+
+        self.version = manifest.get('version')
+        for shard in manifest['shards']:
+            writer = self._new_shard(shard['shard_id'])
+            writer.load_index()
+            self.shards[shard['shard_id']] = writer
+        logger.info(f"Loaded {len(self.shards)} FAISS shards ({self.ntotal} vectors)")
+
+    @property
+    def ntotal(self) -> int:
+        """Number of vectors over all shards"""
+        return sum(shard.ntotal for shard in self.shards.values())
+
+    @property
+    def image_ids(self) -> List[int]:
+        """Image ids over all shards"""
+        return [image_id for shard in self.shards.values() for image_id in shard.image_ids]
+
+    def add_vectors_batch(self, image_ids: List[int], embeddings: np.ndarray):
+        """
+        Route a batch of vectors to their shards
+
+        Args:
+            image_ids: List of database image_ids
+            embeddings: Array of embedding vectors
+        """
+        shard_ids = np.array([self.shard_of(image_id) for image_id in image_ids])
+        for shard_id in np.unique(shard_ids).tolist():
+            rows = np.flatnonzero(shard_ids == shard_id)
+            if shard_id not in self.shards:
+                self.shards[shard_id] = self._new_shard(shard_id)
+                self.shards[shard_id].create_index()
+            self.shards[shard_id].add_vectors_batch([image_ids[i] for i in rows], embeddings[rows])
+            self.dirty.add(shard_id)
+
+    def rebuild_shard(self, shard_id: int, image_ids: List[int], embeddings: np.ndarray):
+        """
+        Replace the content of one shard and publish it
+
+        Other shards are untouched, so searchers only reload this shard.
+
+        Args:
+            shard_id: Shard to rebuild
+            image_ids: All image_ids of the shard
+            embeddings: Their embedding vectors
+        """
+        wrong = [image_id for image_id in image_ids if self.shard_of(image_id) != shard_id]
+        if wrong:
+            raise ValueError(f"{len(wrong)} image_ids do not belong to shard {shard_id} (e.g. {wrong[0]})")
+
+        writer = self._new_shard(shard_id)
+        writer.create_index()
+        writer.add_vectors_batch(list(image_ids), embeddings)
+        self.shards[shard_id] = writer
+        self.dirty.add(shard_id)
+        self.save_index(final=True)
+        logger.info(f"✓ Rebuilt shard {shard_id} with {writer.ntotal} vectors")
+
+    def save_index(self, final: bool = False):
+        """
+        Save changed shards (in parallel), then the shards manifest
+
+        Args:
+            final: End of a run (see FAISSWriter.save_index)
+        """
+        dirty = sorted(self.dirty)
+        if dirty:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.save_threads, len(dirty)))) as pool:
+                list(pool.map(lambda shard_id: self.shards[shard_id].save_index(final), dirty))
+        self.dirty = set()
+
+        # Manifest last so readers never see a version without its shard files
+        self.write_manifest(publish=final)
+        logger.info(f"Saved {len(dirty)} changed shard(s), {len(self.shards)} total, {self.ntotal} vectors")
+
+    def write_manifest(self, publish: bool = True):
+        """Write the shards manifest, with a new version id when publishing (see FAISSWriter.write_manifest)"""
+        if publish:
+            self.version = uuid.uuid4().hex
+        manifest_dir = os.path.dirname(os.path.abspath(self.manifest_path))
+        manifest = {
+            'version': self.version,
+            'strategy': self.strategy,
+            'num_shards': self.num_shards,
+            'range_size': self.range_size,
+            'embedding_dim': self.config.get('embedding_dim', 1024),
+            'saved_at': time.time(),
+            'shards': [
+                {
+                    'shard_id': shard_id,
+                    'index_path': os.path.relpath(os.path.abspath(shard.index_path), manifest_dir),
+                    'ids_path': os.path.relpath(os.path.abspath(shard.ids_path), manifest_dir),
+                    'version': shard.version,
+                    'ntotal': int(shard.index.ntotal),
+                }
+                for shard_id, shard in sorted(self.shards.items())
+            ],
+        }
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
@@ -0,0 +1,259 @@
+"""
+PostgreSQL work queue for distributed indexing
+
+The coordinator splits unprocessed images into work units (rows of
+indexing_work_units). Workers claim one unit at a time with
+FOR UPDATE SKIP LOCKED, so concurrent workers never block on or take the
+same unit, and keep a heartbeat on it while they work. A claimed unit whose
+heartbeat is older than the lease is claimed again by the next worker, which
+is how units of crashed workers are recovered.
+"""
+import threading
+import psycopg2
+from typing import Dict, List, Optional, Tuple
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Unit states that still need work or a merge
+OPEN_STATUSES = ('pending', 'claimed', 'done')
+
+
+class WorkQueue:
+    """Claim, heartbeat and complete indexing work units"""
+
+    def __init__(self, config: dict, lease_seconds: int = 600, max_attempts: int = 3):
+        """
+        Initialize work queue
+
+        Args:
+            config: PostgreSQL configuration dict
+            lease_seconds: A claimed unit without heartbeat for this long is reclaimed
+            max_attempts: Claims per unit before it is marked failed
+        """
+        self.config = config
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.table_name = config.get('work_queue_table', 'indexing_work_units')
+        self.conn = None
+        self.cursor = None
+
+    def connect(self):
+        """Establish database connection"""
+        try:
+            self.conn = psycopg2.connect(
+                host=self.config['host'],
+                port=self.config['port'],
+                dbname=self.config['dbname'],
+                user=self.config['user'],
+                password=self.config['password']
+            )
+            self.cursor = self.conn.cursor()
+        except Exception as e:
+            logger.error(f"Failed to connect to database: {e}")
+            raise
+
+    def enqueued_paths(self) -> set:
+        """Image paths in units that are not merged or failed"""
+        self.cursor.execute(
+            f"SELECT unnest(image_paths) FROM {self.table_name} WHERE status = ANY(%s)",
+            (list(OPEN_STATUSES),)
+        )
+        return {row[0] for row in self.cursor.fetchall()}
+
+    def create_units(self, image_paths: List[str], unit_size: int) -> int:
+        """
+        Split image paths into pending units
+
+        Args:
+            image_paths: Images to process
+            unit_size: Images per unit
+
+        Returns:
+            Number of units created
+        """
+        units = [image_paths[i:i + unit_size] for i in range(0, len(image_paths), unit_size)]
+        try:
+            for unit in units:
+                self.cursor.execute(f"INSERT INTO {self.table_name} (image_paths) VALUES (%s)", (unit,))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        logger.info(f"Queued {len(image_paths)} images in {len(units)} units")
+        return len(units)
+
+    def claim(self, worker_id: str) -> Optional[Tuple[int, List[str]]]:
+        """
+        Claim the oldest pending unit, or a claimed unit whose lease expired
+
+        Args:
+            worker_id: Id of the claiming worker
+
+        Returns:
+            (unit_id, image_paths), or None when nothing is claimable
+        """
+        # Units that used up their attempts are parked as failed
+        self.cursor.execute(
+            f"""
+            UPDATE {self.table_name} SET status = 'failed', finished_at = now()
+            WHERE status = 'claimed' AND attempts >= %s
+              AND heartbeat_at < now() - make_interval(secs => %s)
+            """,
+            (self.max_attempts, self.lease_seconds)
+        )
+        self.cursor.execute(
+            f"""
+            UPDATE {self.table_name}
+            SET status = 'claimed', worker_id = %s, attempts = attempts + 1, heartbeat_at = now()
+            WHERE unit_id = (
+                SELECT unit_id FROM {self.table_name}
+                WHERE status = 'pending'
+                   OR (status = 'claimed' AND heartbeat_at < now() - make_interval(secs => %s))
+                ORDER BY unit_id
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING unit_id, image_paths, attempts
+            """,
+            (worker_id, self.lease_seconds)
+        )
+        row = self.cursor.fetchone()
+        self.conn.commit()
+        if row is None:
+            return None
+        if row[2] > 1:
+            logger.warning(f"Reclaimed unit {row[0]} (attempt {row[2]})")
+        return row[0], list(row[1])
+
+    def heartbeat(self, unit_id: int, worker_id: str) -> bool:
+        """
+        Extend the lease on a claimed unit
+
+        Returns:
+            False if the unit is no longer held by this worker
+        """
+        self.cursor.execute(
+            f"UPDATE {self.table_name} SET heartbeat_at = now() "
+            f"WHERE unit_id = %s AND worker_id = %s AND status = 'claimed'",
+            (unit_id, worker_id)
+        )
+        held = self.cursor.rowcount == 1
+        self.conn.commit()
+        return held
+
+    def complete(self, unit_id: int, worker_id: str, shard_path: str) -> bool:
+        """
+        Mark a unit done with its partial shard
+
+        Returns:
+            False if the lease was lost (another worker reclaimed the unit)
+        """
+        self.cursor.execute(
+            f"UPDATE {self.table_name} SET status = 'done', shard_path = %s, error = NULL, finished_at = now() "
+            f"WHERE unit_id = %s AND worker_id = %s AND status = 'claimed'",
+            (shard_path, unit_id, worker_id)
+        )
+        held = self.cursor.rowcount == 1
+        self.conn.commit()
+        return held
+
+    def fail(self, unit_id: int, worker_id: str, error: str):
+        """Release a unit after an error (failed once max_attempts is reached)"""
+        self.cursor.execute(
+            f"""
+            UPDATE {self.table_name}
+            SET status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'pending' END, error = %s
+            WHERE unit_id = %s AND worker_id = %s AND status = 'claimed'
+            """,
+            (self.max_attempts, error[:2000], unit_id, worker_id)
+        )
+        self.conn.commit()
+
+    def done_units(self) -> List[Tuple[int, str]]:
+        """(unit_id, shard_path) of the units waiting for the merge"""
+        self.cursor.execute(
+            f"SELECT unit_id, shard_path FROM {self.table_name} WHERE status = 'done' ORDER BY unit_id"
+        )
+        return self.cursor.fetchall()
+
+    def requeue(self, unit_ids: List[int], error: str):
+        """
+        Put done units back to pending, e.g. when their partial shard is missing at merge time
+        (failed once max_attempts is reached, like fail)
+        """
+        self.cursor.execute(
+            f"""
+            UPDATE {self.table_name}
+            SET status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'pending' END,
+                shard_path = NULL, error = %s
+            WHERE unit_id = ANY(%s) AND status = 'done'
+            """,
+            (self.max_attempts, error[:2000], list(unit_ids))
+        )
+        self.conn.commit()
+
+    def mark_merged(self, unit_ids: List[int]):
+        """Mark units as folded into the main index"""
+        self.cursor.execute(
+            f"UPDATE {self.table_name} SET status = 'merged' WHERE unit_id = ANY(%s)", (list(unit_ids),)
+        )
+        self.conn.commit()
+
+    def counts(self) -> Dict[str, int]:
+        """Units per status"""
+        self.cursor.execute(f"SELECT status, COUNT(*) FROM {self.table_name} GROUP BY status")
+        return dict(self.cursor.fetchall())
+
+    def close(self):
+        """Close database connection"""
+        if self.cursor:
+            self.cursor.close()
+        if self.conn:
+            self.conn.close()
+
+
+class LeaseKeeper:
+    """Heartbeat a claimed unit from a background thread while the worker processes it"""
+
+    def __init__(self, config: dict, unit_id: int, worker_id: str, interval: float):
+        """
+        Initialize lease keeper
+
+        Args:
+            config: PostgreSQL configuration dict (the thread uses its own connection)
+            unit_id: Claimed unit
+            worker_id: Id of the worker holding it
+            interval: Seconds between heartbeats (well below the lease)
+        """
+        self.queue = WorkQueue(config)
+        self.unit_id = unit_id
+        self.worker_id = worker_id
+        self.interval = interval
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if not self.queue.heartbeat(self.unit_id, self.worker_id):
+                    logger.warning(f"Lost lease on unit {self.unit_id}")
+                    self.lost = True
+                    return
+            except Exception as e:
+                # Keep working; the lease only expires after lease_seconds
+                logger.warning(f"Heartbeat for unit {self.unit_id} failed: {e}")
+                self.queue.conn.rollback()
+
+    def __enter__(self):
+        self.queue.connect()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{self.unit_id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join(timeout=self.interval + 1)
+        self.queue.close()
+        return False
@@ -9,9 +9,7 @@ import sys
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, parent_dir)
 
-from models.img_to_text_model import ImageToTextModel
-from models.text_norm_model import TextNormalizationModel
-from models.embedding_model import EmbeddingModel
+from models.registry import build_model
 from logic.caption_logic import CaptionGenerator
 from logic.normalization_logic import TextNormalizer
 from logic.embedding_logic import EmbeddingGenerator
@@ -44,24 +42,15 @@ def main():
     logger.info("\n")
     print("Loading Models...\n")
     
-    img_to_text_model = ImageToTextModel(
-        model_path=config['models']['img_to_text']['path'],
-        device=config['models']['img_to_text']['device']
-    )
+    img_to_text_model = build_model('img_to_text', config['models']['img_to_text'])
     logger.info("\n")
     logger.info(" Your Image-to-Text model loaded Correctly \n")
     
-    text_norm_model = TextNormalizationModel(
-        model_path=config['models']['text_normalization']['path'],
-        device=config['models']['text_normalization']['device']
-    )
+    text_norm_model = build_model('text_normalization', config['models']['text_normalization'])
     logger.info("\n")
     logger.info(" Your Text Normalization model loaded Correctly \n")
     
-    embedding_model = EmbeddingModel(
-        model_path=config['models']['embedding']['path'],
-        device=config['models']['embedding']['device']
-    )
+    embedding_model = build_model('embedding', config['models']['embedding'])
     logger.info("\n")
     logger.info(" Your Embedding model loaded Correctly \n")
     
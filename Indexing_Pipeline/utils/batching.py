@@ -1,7 +1,9 @@
 """
 Batching utilities
+
+Standard library only, so the Retrieval Pipeline and the model wrappers can load it by path.
 """
-from typing import List, Iterator, TypeVar
+from typing import Callable, Iterator, List, Sequence, TypeVar
 
 T = TypeVar('T')
 
@@ -19,3 +21,52 @@ def create_batches(items: List[T], batch_size: int) -> Iterator[List[T]]:
     """
     for i in range(0, len(items), batch_size):
         yield items[i:i + batch_size]
+
+
+def token_budget_batches(lengths: List[int], max_tokens: int, max_batch_size: int = 0) -> Iterator[List[int]]:
+    """
+    Group item indices into length-sorted batches under a padded token budget
+    
+    A padded batch costs len(batch) * longest member, so items of similar
+    length are batched together and short items form larger batches.
+    
+    Args:
+        lengths: Token length of each item
+        max_tokens: Budget per batch (an item longer than the budget gets its own batch)
+        max_batch_size: Optional cap on items per batch (0 = no cap)
+    
+    Yields:
+        Lists of indices into lengths, shortest items first
+    """
+    batch = []
+    for i in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+        # Sorted ascending, so lengths[i] is the padded length of batch + [i]
+        if batch and ((len(batch) + 1) * lengths[i] > max_tokens
+                      or (max_batch_size and len(batch) >= max_batch_size)):
+            yield batch
+            batch = []
+        batch.append(i)
+    if batch:
+        yield batch
+
+
+def run_token_budget_batches(items: List[T], lengths: List[int], run: Callable[[List[T]], Sequence],
+                             max_tokens: int, max_batch_size: int = 0) -> list:
+    """
+    Run a batch function over length-bucketed batches and restore the input order
+    
+    Args:
+        items: Inputs (texts, tokenized inputs, ...)
+        lengths: Token length of each item
+        run: Function returning one output per item of a batch
+        max_tokens: Padded token budget per batch
+        max_batch_size: Optional cap on items per batch (0 = no cap)
+    
+    Returns:
+        One output per item, in the order of items
+    """
+    outputs = [None] * len(items)
+    for batch in token_budget_batches(lengths, max_tokens, max_batch_size):
+        for i, output in zip(batch, run([items[i] for i in batch])):
+            outputs[i] = output
+    return outputs
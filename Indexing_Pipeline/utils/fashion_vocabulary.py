@@ -0,0 +1,84 @@
+"""
+Fashion vocabulary shared by the lightweight models and benchmarks
+
+Words are grouped the same way the normalization prompt asks for them
+(clothing items, colors, settings). This module has no dependencies so the
+Retrieval Pipeline can load it by path.
+"""
+import re
+from typing import List
+
+COLORS = [
+    "black", "white", "red", "blue", "yellow", "green", "grey", "brown", "pink", "beige",
+    "orange", "purple", "navy", "maroon", "cream", "olive", "khaki", "silver", "gold",
+]
+
+GARMENTS = [
+    "shirt", "t-shirt", "jeans", "dress", "jacket", "raincoat", "skirt", "pants", "coat", "sneakers",
+    "suit", "blazer", "hoodie", "sweater", "shorts", "tie", "hat", "cap", "scarf", "boots", "shoes",
+    "heels", "sandals", "bag", "backpack", "belt", "sunglasses", "watch", "kurta", "saree", "top",
+]
+
+SETTINGS = [
+    "office", "city street", "park", "indoor", "outdoor", "beach", "studio", "street", "garden",
+]
+
+# Spelling variants mapped to their vocabulary form
+SYNONYMS = {
+    "gray": "grey",
+    "tshirt": "t-shirt",
+    "tee": "t-shirt",
+    "trousers": "pants",
+    "denim": "jeans",
+    "trainers": "sneakers",
+    "indoors": "indoor",
+    "outdoors": "outdoor",
+}
+
+# Longest phrases first so "city street" wins over "street"
+_PHRASES = sorted(set(COLORS + GARMENTS + SETTINGS), key=len, reverse=True)
+_PHRASE_PATTERN = re.compile(r"\b(" + "|".join(re.escape(phrase) for phrase in _PHRASES) + r")\b")
+
+
+def canonicalize(text: str) -> str:
+    """Lowercase text and replace synonyms with their vocabulary form"""
+    words = re.findall(r"[a-z0-9\-]+", text.lower())
+    return " ".join(SYNONYMS.get(word, word) for word in words)
+
+
+def extract_keywords(text: str) -> List[str]:
+    """
+    Extract vocabulary phrases in the order they appear
+
+    Args:
+        text: Free text (caption, query or file name)
+
+    Returns:
+        List of vocabulary phrases, duplicates removed
+    """
+    keywords = []
+    for match in _PHRASE_PATTERN.finditer(canonicalize(text)):
+        if match.group(1) not in keywords:
+            keywords.append(match.group(1))
+    return keywords
+
+
+def keyword_f1(reference: set, candidate: set) -> float:
+    """
+    F1 of candidate keywords against reference keywords
+
+    Args:
+        reference: Keywords taken as correct
+        candidate: Keywords to score
+
+    Returns:
+        F1 in [0, 1] (1.0 when both are empty)
+    """
+    if not reference and not candidate:
+        return 1.0
+    overlap = len(reference & candidate)
+    if overlap == 0:
+        return 0.0
+    precision = overlap / len(candidate)
+    recall = overlap / len(reference)
+    return 2 * precision * recall / (precision + recall)
@@ -0,0 +1,154 @@
+"""
+Bounded LRU cache persisted across runs, and batch memoization on top of it
+
+Used by the normalization and embedding stages: identical captions and
+normalized texts are frequent in a fashion catalog, so each distinct input is
+computed once per batch and, through the cache, once across batches and runs.
+"""
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class PersistentLRUCache:
+    """LRU cache with a maximum number of entries, saved to a pickle file"""
+
+    def __init__(self, max_entries: int, path: Optional[str] = None, namespace: str = ""):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: Least recently used entries are evicted beyond this
+            path: Pickle file to load from and save to (None keeps the cache in memory)
+            namespace: Model version the values belong to; a saved cache with
+                       another namespace is discarded on load
+        """
+        self.max_entries = max_entries
+        self.path = path
+        self.namespace = namespace
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.duplicates = 0  # Repeated inputs within a batch (computed once)
+
+        if path and os.path.exists(path):
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: Hashable):
+        """Cached value or None (marks the entry as recently used)"""
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value):
+        """Store a value, evicting the least recently used entries"""
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of distinct lookups answered from the cache"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def load(self):
+        """Load entries saved by an earlier run"""
+        try:
+            with open(self.path, 'rb') as f:
+                saved = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache {self.path}: {e}")
+            return
+        if saved.get('namespace') != self.namespace:
+            logger.info(f"Cache {self.path} belongs to {saved.get('namespace')}, starting empty")
+            return
+        for key, value in saved['entries']:
+            self.put(key, value)
+        logger.info(f"Loaded {len(self.entries)} cache entries from {self.path}")
+
+    def save(self):
+        """
+        Save entries (least recently used first) with a write-then-rename
+
+        Entries saved meanwhile by another process sharing the file (distributed workers on
+        one host) are kept as the least recently used ones, and each save writes its own
+        temporary file, so concurrent saves neither collide nor drop each other's entries.
+        """
+        if not self.path:
+            return
+        cache_dir = os.path.dirname(self.path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        entries = list(self.entries.items())
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'rb') as f:
+                    saved = pickle.load(f)
+                if saved.get('namespace') == self.namespace:
+                    others = [(key, value) for key, value in saved['entries'] if key not in self.entries]
+                    entries = (others + entries)[-self.max_entries:]
+            except Exception as e:
+                logger.warning(f"Overwriting unreadable cache {self.path}: {e}")
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump({'namespace': self.namespace, 'entries': entries}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def stats(self) -> str:
+        """One-line hit-rate summary for the logs"""
+        return (f"{self.hits} hits / {self.misses} misses ({self.hit_rate:.1%}), "
+                f"{self.duplicates} in-batch duplicates, {len(self.entries)}/{self.max_entries} entries")
+
+
+def memoized_batch(items: List[Hashable], compute: Callable[[list], list],
+                   cache: Optional[PersistentLRUCache] = None) -> list:
+    """
+    Compute each distinct item once and fan the results back out
+
+    Args:
+        items: Batch inputs (hashable, e.g. strings)
+        compute: Function computing outputs for a list of distinct inputs
+        cache: Optional cache consulted before and filled after compute;
+               empty outputs (model errors) are not cached
+
+    Returns:
+        One output per item, in order
+    """
+    distinct = list(dict.fromkeys(items))
+    results = {}
+    missing = []
+    for item in distinct:
+        value = cache.get(item) if cache is not None else None
+        if value is None:
+            missing.append(item)
+        else:
+            results[item] = value
+
+    if missing:
+        for item, value in zip(missing, compute(missing)):
+            results[item] = value
+            if cache is not None and len(value) > 0:
+                cache.put(item, value)
+
+    if cache is not None:
+        cache.hits += len(distinct) - len(missing)
+        cache.misses += len(missing)
+        cache.duplicates += len(items) - len(distinct)
+    return [results[item] for item in items]
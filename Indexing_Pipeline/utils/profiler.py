@@ -0,0 +1,95 @@
+"""
+Optional profiler hook for a window of indexing batches
+"""
+import cProfile
+import io
+import os
+import pstats
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class BatchProfiler:
+    """Profile batches [start_batch, start_batch + num_batches) with cProfile or torch.profiler"""
+
+    def __init__(self, config: dict):
+        """
+        Initialize profiler
+
+        Args:
+            config: Profiler config (enabled, type, start_batch, num_batches, output_dir)
+        """
+        self.enabled = config.get('enabled', False)
+        self.profiler_type = config.get('type', 'cprofile')
+        self.start_batch = config.get('start_batch', 1)
+        self.num_batches = config.get('num_batches', 5)
+        self.output_dir = config.get('output_dir', 'storage/profiles')
+        self._profiler = None
+
+        if self.profiler_type not in ('cprofile', 'torch'):
+            raise ValueError(f"Unknown profiler type: {self.profiler_type}")
+
+    @property
+    def end_batch(self) -> int:
+        """Last profiled batch index"""
+        return self.start_batch + self.num_batches - 1
+
+    def before_batch(self, batch_idx: int):
+        """
+        Start profiling when the window begins
+
+        Args:
+            batch_idx: Index of the batch about to run
+        """
+        if not self.enabled or batch_idx != self.start_batch:
+            return
+
+        if self.profiler_type == 'torch':
+            import torch
+            activities = [torch.profiler.ProfilerActivity.CPU]
+            if torch.cuda.is_available():
+                activities.append(torch.profiler.ProfilerActivity.CUDA)
+            self._profiler = torch.profiler.profile(activities=activities, profile_memory=True)
+            self._profiler.start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+        logger.info(f"Profiling batches {self.start_batch}-{self.end_batch} with {self.profiler_type}")
+
+    def after_batch(self, batch_idx: int):
+        """
+        Stop profiling and write results when the window ends
+
+        Args:
+            batch_idx: Index of the batch that just finished
+        """
+        if self._profiler is None or batch_idx != self.end_batch:
+            return
+        self.stop()
+
+    def stop(self):
+        """Stop an active profile early (e.g. fewer batches than the window) and save it"""
+        if self._profiler is None:
+            return
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        name = f"indexing_batches_{self.start_batch}-{self.end_batch}"
+
+        if self.profiler_type == 'torch':
+            self._profiler.stop()
+            trace_path = os.path.join(self.output_dir, f"{name}.json")
+            self._profiler.export_chrome_trace(trace_path)
+            logger.info("\n" + self._profiler.key_averages().table(sort_by="self_cpu_time_total", row_limit=20))
+            logger.info(f"✓ torch.profiler trace saved to {trace_path}")
+        else:
+            self._profiler.disable()
+            stats_path = os.path.join(self.output_dir, f"{name}.prof")
+            self._profiler.dump_stats(stats_path)
+            report = io.StringIO()
+            pstats.Stats(self._profiler, stream=report).sort_stats('cumulative').print_stats(20)
+            logger.info("\n" + report.getvalue())
+            logger.info(f"✓ cProfile stats saved to {stats_path}")
+
+        self._profiler = None
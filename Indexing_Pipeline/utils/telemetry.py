@@ -0,0 +1,195 @@
+"""
+Indexing throughput telemetry
+
+Tracks time per stage, images/sec, ETA and memory high-water marks, and appends
+one JSON line per batch to a progress file so long runs can be monitored.
+"""
+import gc
+import json
+import os
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def get_memory_stats() -> Dict[str, Optional[float]]:
+    """
+    Get CPU and GPU memory high-water marks
+
+    Returns:
+        Dict with cpu_max_rss_mb and gpu_max_allocated_mb (None when unavailable)
+    """
+    stats = {'cpu_max_rss_mb': None, 'gpu_max_allocated_mb': None}
+
+    try:
+        import resource
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KB on Linux, bytes on macOS
+        stats['cpu_max_rss_mb'] = max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+    except ImportError:
+        pass
+
+    torch = sys.modules.get('torch')
+    if torch is not None and torch.cuda.is_available():
+        stats['gpu_max_allocated_mb'] = torch.cuda.max_memory_allocated() / (1024 * 1024)
+
+    return stats
+
+
+def get_current_rss_mb() -> Optional[float]:
+    """Current resident set size in MB (Linux /proc; None elsewhere)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def release_memory():
+    """
+    Return memory of unloaded models to the OS
+
+    Call after the last reference to a model is gone: collects cycles, empties the
+    CUDA cache and asks glibc to trim freed heap pages.
+    """
+    gc.collect()
+
+    torch = sys.modules.get('torch')
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+    if sys.platform.startswith('linux'):
+        try:
+            import ctypes
+            ctypes.CDLL('libc.so.6').malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
+
+
+class IndexingTelemetry:
+    """Collect per-stage timings and progress for the indexing loop"""
+
+    def __init__(self, total_images: int, progress_path: Optional[str] = None, window: int = 20):
+        """
+        Initialize telemetry
+
+        Args:
+            total_images: Number of images this run will process
+            progress_path: Optional JSONL file receiving one record per batch
+            window: Number of recent batches used for the current rate and ETA
+        """
+        self.total_images = total_images
+        self.progress_path = progress_path
+        self.start_time = time.time()
+        self.processed = 0
+        self.stage_totals: Dict[str, float] = {}
+        self._batch_stages: Dict[str, float] = {}
+        self._recent = deque(maxlen=window)  # (images, seconds) per batch
+        self._batch_start = time.perf_counter()
+
+        if progress_path:
+            progress_dir = os.path.dirname(progress_path)
+            if progress_dir:
+                os.makedirs(progress_dir, exist_ok=True)
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Time one stage of the current batch
+
+        Args:
+            name: Stage name (caption, normalize, db_insert, embed, faiss_add, ...)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._batch_stages[name] = self._batch_stages.get(name, 0.0) + elapsed
+            self.stage_totals[name] = self.stage_totals.get(name, 0.0) + elapsed
+
+    def record_batch(self, batch_idx: int, num_images: int) -> Dict:
+        """
+        Close the current batch and write a progress record
+
+        Args:
+            batch_idx: Index of the finished batch
+            num_images: Number of images in the batch
+
+        Returns:
+            Progress record
+        """
+        batch_seconds = time.perf_counter() - self._batch_start
+        self.processed += num_images
+        self._recent.append((num_images, batch_seconds))
+
+        recent_images = sum(images for images, _ in self._recent)
+        recent_seconds = sum(seconds for _, seconds in self._recent)
+        current_rate = recent_images / recent_seconds if recent_seconds > 0 else 0.0
+        elapsed = time.time() - self.start_time
+        remaining = self.total_images - self.processed
+
+        record = {
+            'timestamp': time.time(),
+            'batch': batch_idx,
+            'batch_images': num_images,
+            'processed': self.processed,
+            'total': self.total_images,
+            'elapsed_seconds': elapsed,
+            'images_per_sec': current_rate,
+            'overall_images_per_sec': self.processed / elapsed if elapsed > 0 else 0.0,
+            'eta_seconds': remaining / current_rate if current_rate > 0 else None,
+            'batch_seconds': batch_seconds,
+            'stage_seconds': dict(self._batch_stages),
+            'stage_seconds_per_image': {
+                name: seconds / num_images for name, seconds in self._batch_stages.items()
+            } if num_images else {},
+            'stage_images_per_sec': {
+                name: num_images / seconds for name, seconds in self._batch_stages.items() if seconds > 0
+            },
+        }
+        record.update(get_memory_stats())
+
+        if self.progress_path:
+            with open(self.progress_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+
+        eta = record['eta_seconds']
+        logger.info(
+            f"  {current_rate:.2f} img/s | ETA {self.format_seconds(eta)} | "
+            + " ".join(f"{name}={seconds:.2f}s" for name, seconds in self._batch_stages.items())
+        )
+
+        self._batch_stages = {}
+        self._batch_start = time.perf_counter()
+        return record
+
+    def summary(self) -> Dict:
+        """
+        Totals for the whole run
+
+        Returns:
+            Dict with processed count, elapsed time, throughput and per-stage totals
+        """
+        elapsed = time.time() - self.start_time
+        return {
+            'processed': self.processed,
+            'elapsed_seconds': elapsed,
+            'images_per_sec': self.processed / elapsed if elapsed > 0 else 0.0,
+            'stage_seconds': dict(self.stage_totals),
+            **get_memory_stats(),
+        }
+
+    @staticmethod
+    def format_seconds(seconds: Optional[float]) -> str:
+        """Format seconds as H:MM:SS"""
+        if seconds is None:
+            return "unknown"
+        seconds = int(seconds)
+        return f"{seconds // 3600}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
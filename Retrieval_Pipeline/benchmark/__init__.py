@@ -0,0 +1,3 @@
+"""
+Offline benchmark package (synthetic catalogs, lightweight models)
+"""
@@ -0,0 +1,242 @@
+"""
+Offline retrieval benchmark
+
+For each catalog size, builds a synthetic catalog of random 1024-dim vectors with
+fake metadata and measures:
+- FAISS build throughput and raw search throughput / latency
+- Startup time and memory footprint of RetrievalPipeline
+- End-to-end RetrievalPipeline.search latency per stage, with the lightweight
+  model backends (rules / hash) in place of Qwen, BGE and CLIP
+
+Everything runs on CPU without PostgreSQL or model downloads. Reports are JSON so
+two runs can be compared.
+
+Usage:
+    cd Retrieval_Pipeline
+    python benchmark/run_benchmark.py --sizes 10000 100000 --output bench.json
+    python benchmark/run_benchmark.py --sizes 10000 --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+# Add paths before any imports
+benchmark_dir = os.path.dirname(os.path.abspath(__file__))
+retrieval_dir = os.path.dirname(benchmark_dir)
+sys.path.insert(0, retrieval_dir)
+sys.path.insert(0, benchmark_dir)
+
+import faiss
+import numpy as np
+
+import retrieval_pipeline
+from retrieval_pipeline import RetrievalPipeline, metrics_module
+from synthetic_catalog import build_catalog, random_queries, random_unit_vectors
+
+get_rss_bytes = metrics_module.get_rss_bytes
+Histogram = metrics_module.Histogram
+
+# Metrics compared between reports, and whether larger values are better
+COMPARED_METRICS = {
+    'p50': False, 'p95': False, 'p99': False,
+    'startup_seconds': False, 'load_seconds': False,
+    'qps': True, 'faiss_add_vectors_per_sec': True,
+}
+
+
+def to_mb(value):
+    return None if value is None else value / (1024 * 1024)
+
+
+def benchmark_faiss_search(index_path: str, dim: int, num_queries: int, top_n: int, batch_sizes: list) -> dict:
+    """
+    Measure raw FAISS search latency and throughput
+
+    Args:
+        index_path: Path to the FAISS index
+        dim: Embedding dimension
+        num_queries: Number of query vectors
+        top_n: Neighbours per query
+        batch_sizes: Query batch sizes to measure
+
+    Returns:
+        Dict with load time, single-query latency quantiles and QPS per batch size
+    """
+    t0 = time.perf_counter()
+    index = faiss.read_index(index_path)
+    load_seconds = time.perf_counter() - t0
+
+    queries = random_unit_vectors(np.random.default_rng(42), num_queries, dim)
+
+    latency = Histogram(max_samples=num_queries)
+    for query in queries:
+        t0 = time.perf_counter()
+        index.search(query.reshape(1, -1), top_n)
+        latency.observe(time.perf_counter() - t0)
+
+    qps = {}
+    for batch_size in batch_sizes:
+        t0 = time.perf_counter()
+        for start in range(0, num_queries, batch_size):
+            index.search(queries[start:start + batch_size], top_n)
+        elapsed = time.perf_counter() - t0
+        qps[str(batch_size)] = {'qps': num_queries / elapsed if elapsed > 0 else 0.0}
+
+    return {'load_seconds': load_seconds, 'single_query': latency.summary(), 'batched': qps}
+
+
+def benchmark_pipeline(config_path: str, num_queries: int) -> dict:
+    """
+    Measure RetrievalPipeline startup, memory and per-stage search latency with lightweight models
+
+    Args:
+        config_path: Retrieval config of the synthetic catalog
+        num_queries: Number of searches
+
+    Returns:
+        Dict with startup time, RSS growth and stage latency summaries
+    """
+    rss_before = get_rss_bytes()
+    t0 = time.perf_counter()
+    pipeline = RetrievalPipeline(config_path)
+    startup_seconds = time.perf_counter() - t0
+    rss_after = get_rss_bytes()
+
+    # Banners are logged at INFO for every query; keep the console readable
+    pipeline_logger = retrieval_pipeline.logger
+    previous_level = pipeline_logger.level
+    pipeline_logger.setLevel('WARNING')
+    try:
+        for query in random_queries(num_queries):
+            pipeline.search(query)
+    finally:
+        pipeline_logger.setLevel(previous_level)
+
+    stages = pipeline.metrics.snapshot()['stages']
+    pipeline.close()
+
+    return {
+        'startup_seconds': startup_seconds,
+        'rss_before_mb': to_mb(rss_before),
+        'rss_after_startup_mb': to_mb(rss_after),
+        'rss_growth_mb': to_mb(rss_after - rss_before) if rss_before and rss_after else None,
+        'stages': stages,
+    }
+
+
+def run(sizes: list, dim: int, num_queries: int, batch_sizes: list, work_dir: str) -> dict:
+    """Run the full benchmark for every catalog size"""
+    results = []
+    for size in sizes:
+        print(f"\n=== Catalog size {size:,} ===")
+        catalog_dir = os.path.join(work_dir, f"catalog_{size}")
+
+        build = build_catalog(catalog_dir, size, dim)
+        print(f"  FAISS build: {build['faiss_add_vectors_per_sec']:,.0f} vectors/s, "
+              f"index {to_mb(build['index_bytes']):.1f} MB")
+
+        search = benchmark_faiss_search(build['index_path'], dim, num_queries, 50, batch_sizes)
+        print(f"  FAISS search p50/p99: {search['single_query']['p50'] * 1000:.2f} / "
+              f"{search['single_query']['p99'] * 1000:.2f} ms")
+
+        pipeline = benchmark_pipeline(build['config_path'], num_queries)
+        total = pipeline['stages'].get('search_total', {})
+        print(f"  Pipeline startup {pipeline['startup_seconds']:.2f}s, search p50/p99: "
+              f"{total.get('p50', 0) * 1000:.2f} / {total.get('p99', 0) * 1000:.2f} ms")
+
+        results.append({'size': size, 'build': build, 'faiss_search': search, 'pipeline': pipeline})
+
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'faiss': getattr(faiss, '__version__', 'unknown'),
+            'numpy': np.__version__,
+        },
+        'params': {'sizes': sizes, 'dim': dim, 'queries': num_queries, 'batch_sizes': batch_sizes},
+        'timestamp': time.time(),
+        'results': results,
+    }
+
+
+def flatten(prefix: str, value, out: dict):
+    """Flatten nested numeric results into dotted keys"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flatten(f"{prefix}.{key}" if prefix else key, item, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = value
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compare two reports size by size
+
+    Args:
+        current: Report of this run
+        baseline: Earlier report
+        threshold: Relative change treated as a regression (0.1 = 10%)
+
+    Returns:
+        List of regression descriptions
+    """
+    baseline_by_size = {result['size']: result for result in baseline['results']}
+    regressions = []
+    print("\n=== Comparison with baseline ===")
+    for result in current['results']:
+        base = baseline_by_size.get(result['size'])
+        if base is None:
+            continue
+        now_flat, base_flat = {}, {}
+        flatten('', result, now_flat)
+        flatten('', base, base_flat)
+        for key, now_value in sorted(now_flat.items()):
+            metric = key.split('.')[-1]
+            base_value = base_flat.get(key)
+            if metric not in COMPARED_METRICS or not base_value:
+                continue
+            change = (now_value - base_value) / abs(base_value)
+            worse = -change if COMPARED_METRICS[metric] else change
+            print(f"  size={result['size']} {key}: {base_value:.6g} -> {now_value:.6g} ({change:+.1%})")
+            if worse > threshold:
+                regressions.append(f"size={result['size']} {key}: {base_value:.6g} -> {now_value:.6g} ({change:+.1%})")
+    for line in regressions:
+        print(f"  REGRESSION {line}")
+    if not regressions:
+        print("  No regressions above threshold")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline retrieval benchmark with synthetic catalogs")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--dim', type=int, default=1024)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 16, 64])
+    parser.add_argument('--work-dir', help="Where catalogs are written (temporary directory by default)")
+    parser.add_argument('--output', help="Path for the JSON report")
+    parser.add_argument('--compare', help="Baseline JSON report to compare against")
+    parser.add_argument('--threshold', type=float, default=0.1, help="Regression threshold (relative)")
+    args = parser.parse_args()
+
+    if args.work_dir:
+        report = run(args.sizes, args.dim, args.queries, args.batch_sizes, args.work_dir)
+    else:
+        with tempfile.TemporaryDirectory(prefix="fashion_bench_") as work_dir:
+            report = run(args.sizes, args.dim, args.queries, args.batch_sizes, work_dir)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
@@ -0,0 +1,159 @@
+"""
+Synthetic catalog generator for benchmarks
+
+Writes the same artifacts the Indexing Pipeline produces (FAISS index, ids file,
+manifest and metadata snapshot) from random unit vectors and fake metadata,
+plus a retrieval config pointing at them.
+"""
+import json
+import os
+import time
+import uuid
+import importlib.util
+from typing import Dict
+import faiss
+import numpy as np
+import yaml
+
+# Import snapshot format from indexing pipeline
+indexing_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../Indexing_Pipeline'))
+snapshot_path = os.path.join(indexing_dir, 'storage', 'metadata_snapshot.py')
+
+spec = importlib.util.spec_from_file_location("metadata_snapshot", snapshot_path)
+snapshot_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(snapshot_module)
+MetadataSnapshot = snapshot_module.MetadataSnapshot
+
+# Vocabulary used for fake normalized texts and benchmark queries
+vocabulary_path = os.path.join(indexing_dir, 'utils', 'fashion_vocabulary.py')
+spec = importlib.util.spec_from_file_location("fashion_vocabulary", vocabulary_path)
+fashion_vocabulary = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(fashion_vocabulary)
+COLORS = fashion_vocabulary.COLORS
+GARMENTS = fashion_vocabulary.GARMENTS
+SETTINGS = fashion_vocabulary.SETTINGS
+
+# Vectors added to the index per chunk while building
+BUILD_CHUNK_SIZE = 100_000
+
+
+def random_unit_vectors(rng: np.random.Generator, count: int, dim: int) -> np.ndarray:
+    """Random L2-normalized float32 vectors"""
+    vectors = rng.standard_normal((count, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def fake_normalized_text(rng: np.random.Generator) -> str:
+    """Random keyword list in the normalized text format"""
+    return " | ".join([
+        rng.choice(COLORS), rng.choice(GARMENTS),
+        rng.choice(COLORS), rng.choice(GARMENTS),
+        rng.choice(SETTINGS),
+    ])
+
+
+def build_catalog(output_dir: str, num_vectors: int, dim: int = 1024, seed: int = 0) -> Dict:
+    """
+    Build a synthetic catalog and its retrieval config
+
+    Args:
+        output_dir: Directory receiving the artifacts
+        num_vectors: Catalog size
+        dim: Embedding dimension
+        seed: Random seed
+
+    Returns:
+        Dict with artifact paths and build timings
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    index_path = os.path.join(output_dir, 'faiss_index.bin')
+    ids_path = os.path.join(output_dir, 'faiss_index_ids.npy')
+    manifest_path = os.path.join(output_dir, 'faiss_index_manifest.json')
+    snapshot_file = os.path.join(output_dir, 'faiss_index_metadata.npz')
+
+    # FAISS build, in chunks so 10M x 1024 never has to sit in memory twice
+    index = faiss.IndexFlatIP(dim)
+    generate_seconds = 0.0
+    add_seconds = 0.0
+    for start in range(0, num_vectors, BUILD_CHUNK_SIZE):
+        count = min(BUILD_CHUNK_SIZE, num_vectors - start)
+        t0 = time.perf_counter()
+        vectors = random_unit_vectors(rng, count, dim)
+        t1 = time.perf_counter()
+        index.add(vectors)
+        t2 = time.perf_counter()
+        generate_seconds += t1 - t0
+        add_seconds += t2 - t1
+
+    image_ids = np.arange(1, num_vectors + 1, dtype=np.int64)
+
+    t0 = time.perf_counter()
+    faiss.write_index(index, index_path)
+    np.save(ids_path, image_ids)
+    write_seconds = time.perf_counter() - t0
+
+    version = uuid.uuid4().hex
+    with open(manifest_path, 'w') as f:
+        json.dump({'version': version, 'ntotal': int(index.ntotal), 'embedding_dim': dim,
+                   'index_type': 'IndexFlatIP', 'saved_at': time.time()}, f, indent=2)
+
+    # Fake metadata snapshot
+    t0 = time.perf_counter()
+    texts = [fake_normalized_text(rng) for _ in range(num_vectors)]
+    paths = [f"synthetic/{image_id}.jpg" for image_id in image_ids]
+    created_at = np.full(num_vectors, time.time(), dtype=np.float64)
+    snapshot = MetadataSnapshot.from_columns(image_ids, paths, texts, created_at, index_version=version)
+    snapshot.save(snapshot_file)
+    snapshot_seconds = time.perf_counter() - t0
+
+    config_path = os.path.join(output_dir, 'retrieval.yaml')
+    write_config(config_path, index_path, ids_path, snapshot_file, dim)
+
+    return {
+        'index_path': index_path,
+        'config_path': config_path,
+        'index_bytes': os.path.getsize(index_path),
+        'snapshot_bytes': os.path.getsize(snapshot_file),
+        'generate_seconds': generate_seconds,
+        'faiss_add_seconds': add_seconds,
+        'faiss_add_vectors_per_sec': num_vectors / add_seconds if add_seconds > 0 else 0.0,
+        'faiss_write_seconds': write_seconds,
+        'snapshot_build_seconds': snapshot_seconds,
+    }
+
+
+def write_config(config_path: str, index_path: str, ids_path: str, snapshot_file: str, dim: int):
+    """Write a retrieval config for the synthetic catalog (lightweight model backends, no PostgreSQL)"""
+    config = {
+        'database': {
+            'faiss': {'index_path': os.path.abspath(index_path), 'ids_path': os.path.abspath(ids_path)},
+            'metadata_snapshot': {'enabled': True, 'path': os.path.abspath(snapshot_file),
+                                  'postgres_fallback': False},
+            'postgres': {'dbname': 'unused', 'host': 'localhost', 'password': '', 'port': 5432,
+                         'table_name': 'fashion_images', 'user': 'unused'},
+        },
+        'dataset': {'image_dir': os.path.abspath(os.path.dirname(config_path))},
+        'metrics': {'json_path': '', 'max_samples': 100000, 'prometheus_port': 0},
+        'models': {
+            'embedding': {'backend': 'hash', 'device': 'cpu', 'embedding_dim': dim, 'name': 'hash', 'path': ''},
+            'reranking': {'backend': 'hash', 'cascade': [], 'device': 'cpu', 'fusion': 'replace',
+                          'name': 'hash', 'path': ''},
+            'text_normalization': {'backend': 'rules', 'device': 'cpu', 'name': 'rules', 'path': ''},
+        },
+        'search': {'top_k': 10, 'top_n': 50},
+    }
+    with open(config_path, 'w', encoding='utf-8') as f:
+        yaml.dump(config, f)
+
+
+def random_queries(count: int, seed: int = 1) -> list:
+    """Natural-language benchmark queries built from the fake vocabulary"""
+    rng = np.random.default_rng(seed)
+    return [
+        f"a person wearing a {rng.choice(COLORS)} {rng.choice(GARMENTS)} "
+        f"and {rng.choice(COLORS)} {rng.choice(GARMENTS)} in a {rng.choice(SETTINGS)}"
+        for _ in range(count)
+    ]
@@ -0,0 +1,137 @@
+"""
+Parity report of the lexicon query normalizer against the normalization model
+
+Every query is normalized by both the lexicon and the model. Outputs are compared
+as sets of terms (order and duplicates ignored), overall and for the queries the
+lexicon would answer at the configured coverage threshold, next to the latency
+of both paths.
+
+Usage:
+    python evaluate_lexicon.py
+    python evaluate_lexicon.py --queries queries.txt --min-coverage 0.6 --output report.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add paths before any imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from retrieval_pipeline import RetrievalPipeline, QueryNormalizer, LexiconQueryNormalizer, FashionLexicon
+from evaluate_reranking import DEFAULT_QUERIES, load_queries, percentile
+
+
+def term_set(normalized_text: str) -> set:
+    """Terms of a normalized text, lowercased"""
+    return {term.strip().lower() for term in normalized_text.split('|') if term.strip()}
+
+
+def evaluate(lexicon: FashionLexicon, model_normalizer: QueryNormalizer, queries: list,
+             min_coverage: float) -> dict:
+    """
+    Normalize every query with the lexicon and the model
+
+    Args:
+        lexicon: Fashion lexicon
+        model_normalizer: Model-backed query normalizer (reference)
+        queries: Queries to evaluate
+        min_coverage: Coverage at which the lexicon answers a query
+
+    Returns:
+        Report dictionary with per-query and aggregate metrics
+    """
+    per_query = []
+    for query in queries:
+        start = time.perf_counter()
+        terms, coverage = lexicon.match(query)
+        lexicon_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        model_output = model_normalizer.normalize(query)
+        model_seconds = time.perf_counter() - start
+
+        lexicon_terms = set(terms)
+        model_terms = term_set(model_output)
+        union = lexicon_terms | model_terms
+        per_query.append({
+            'query': query,
+            'lexicon': " | ".join(terms),
+            'model': model_output,
+            'coverage': coverage,
+            'lexicon_hit': bool(terms) and coverage >= min_coverage,
+            'exact_match': lexicon_terms == model_terms,
+            'jaccard': len(lexicon_terms & model_terms) / len(union) if union else 1.0,
+            'lexicon_seconds': lexicon_seconds,
+            'model_seconds': model_seconds,
+        })
+
+    hits = [q for q in per_query if q['lexicon_hit']]
+    count = max(1, len(per_query))
+    summary = {
+        'queries': len(per_query),
+        'lexicon_terms': len(lexicon),
+        'min_coverage': min_coverage,
+        'hit_rate': len(hits) / count,
+        'exact_match_all': sum(q['exact_match'] for q in per_query) / count,
+        'mean_jaccard_all': sum(q['jaccard'] for q in per_query) / count,
+        'exact_match_hits': sum(q['exact_match'] for q in hits) / max(1, len(hits)),
+        'mean_jaccard_hits': sum(q['jaccard'] for q in hits) / max(1, len(hits)),
+        'lexicon_p50_seconds': percentile([q['lexicon_seconds'] for q in per_query], 50),
+        'lexicon_p95_seconds': percentile([q['lexicon_seconds'] for q in per_query], 95),
+        'model_p50_seconds': percentile([q['model_seconds'] for q in per_query], 50),
+        'model_p95_seconds': percentile([q['model_seconds'] for q in per_query], 95),
+    }
+    return {'summary': summary, 'per_query': per_query}
+
+
+def print_report(report: dict):
+    """Print parity summary and the lexicon answers that differ from the model"""
+    summary = report['summary']
+    print("\n" + "=" * 80)
+    print("LEXICON NORMALIZER PARITY")
+    print("=" * 80)
+    print(f"Queries:                 {summary['queries']} ({summary['lexicon_terms']} lexicon terms)")
+    print(f"Lexicon hit rate:        {summary['hit_rate']:.1%} at coverage >= {summary['min_coverage']}")
+    print(f"Exact match (hits/all):  {summary['exact_match_hits']:.3f} / {summary['exact_match_all']:.3f}")
+    print(f"Jaccard (hits/all):      {summary['mean_jaccard_hits']:.3f} / {summary['mean_jaccard_all']:.3f}")
+    print(f"Lexicon p50/p95:         {summary['lexicon_p50_seconds'] * 1e6:.1f}us / {summary['lexicon_p95_seconds'] * 1e6:.1f}us")
+    print(f"Model p50/p95:           {summary['model_p50_seconds']:.3f}s / {summary['model_p95_seconds']:.3f}s")
+
+    mismatches = [q for q in report['per_query'] if q['lexicon_hit'] and not q['exact_match']]
+    if mismatches:
+        print("\nLexicon hits that differ from the model:")
+        for q in mismatches:
+            print(f"  {q['query']}\n    lexicon: {q['lexicon']}\n    model:   {q['model']}")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the lexicon query normalizer with the normalization model")
+    parser.add_argument('--config', default=os.path.join(current_dir, 'config', 'retrieval.yaml'))
+    parser.add_argument('--queries', help="Text file with one query per line")
+    parser.add_argument('--min-coverage', type=float, help="Override models.text_normalization.lexicon.min_coverage")
+    parser.add_argument('--output', help="Optional path for the JSON report")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries) if args.queries else DEFAULT_QUERIES
+
+    pipeline = RetrievalPipeline(args.config)
+    normalizer = pipeline.query_normalizer
+    if not isinstance(normalizer, LexiconQueryNormalizer):
+        print("Lexicon is disabled (models.text_normalization.lexicon.enabled), nothing to compare")
+        pipeline.close()
+        sys.exit(1)
+
+    min_coverage = args.min_coverage if args.min_coverage is not None else normalizer.min_coverage
+    report = evaluate(normalizer.lexicon, normalizer.fallback, queries, min_coverage)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    pipeline.close()
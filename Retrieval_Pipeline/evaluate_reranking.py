@@ -0,0 +1,146 @@
+"""
+Offline evaluation of the reranking cascade
+
+Compares the configured reranking cascade (models.reranking.cascade) against the
+single-stage setup that scores every FAISS candidate with the final CLIP model.
+The single-stage ranking is used as the reference, so quality is reported as
+agreement with it, next to the reranking latency of both setups.
+
+Usage:
+    python evaluate_reranking.py
+    python evaluate_reranking.py --queries queries.txt --top-k 10 --output report.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add paths before any imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from retrieval_pipeline import RetrievalPipeline, CLIPReranker
+
+DEFAULT_QUERIES = [
+    "A person in a bright yellow raincoat",
+    "Black evening dress",
+    "Man wearing a white shirt and blue jeans",
+    "Casual summer outfit with sneakers",
+    "Formal business attire in an office",
+    "Red jacket on a city street",
+]
+
+
+def load_queries(queries_path: str) -> list:
+    """Load one query per line, skipping blank lines"""
+    with open(queries_path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def evaluate(pipeline: RetrievalPipeline, queries: list, top_k: int) -> dict:
+    """
+    Run reference and cascade reranking over the same candidates
+
+    Args:
+        pipeline: Loaded retrieval pipeline (its reranker holds the cascade)
+        queries: Queries to evaluate
+        top_k: Number of final results compared per query
+
+    Returns:
+        Report dictionary with per-query and aggregate metrics
+    """
+    reference = CLIPReranker(pipeline.clip_model)
+    cascade = pipeline.reranker
+
+    per_query = []
+    for query in queries:
+        candidates = pipeline.retrieve_candidates(query)
+        image_paths = pipeline.get_image_paths(candidates)
+        semantic_scores = [img['semantic_score'] for img in candidates]
+
+        start = time.perf_counter()
+        ref_indices, _, _ = reference.rerank(query, image_paths, top_k, prior_scores=semantic_scores)
+        ref_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cas_indices, _, stage_timings = cascade.rerank(query, image_paths, top_k, prior_scores=semantic_scores)
+        cas_seconds = time.perf_counter() - start
+
+        k = max(1, min(top_k, len(ref_indices)))
+        overlap = len(set(ref_indices[:k]) & set(cas_indices[:k])) / k
+        top1_match = bool(ref_indices and cas_indices and ref_indices[0] == cas_indices[0])
+
+        per_query.append({
+            'query': query,
+            'candidates': len(candidates),
+            'reference_seconds': ref_seconds,
+            'cascade_seconds': cas_seconds,
+            'overlap_at_k': overlap,
+            'top1_match': top1_match,
+            'cascade_stages': [
+                {'name': name, 'pool_size': pool_size, 'seconds': seconds}
+                for name, pool_size, seconds in stage_timings
+            ],
+        })
+
+    ref_latencies = [q['reference_seconds'] for q in per_query]
+    cas_latencies = [q['cascade_seconds'] for q in per_query]
+    summary = {
+        'queries': len(per_query),
+        'top_k': top_k,
+        'stages': [stage.name for stage in cascade.stages],
+        'mean_overlap_at_k': sum(q['overlap_at_k'] for q in per_query) / max(1, len(per_query)),
+        'top1_agreement': sum(q['top1_match'] for q in per_query) / max(1, len(per_query)),
+        'reference_p50_seconds': percentile(ref_latencies, 50),
+        'reference_p95_seconds': percentile(ref_latencies, 95),
+        'cascade_p50_seconds': percentile(cas_latencies, 50),
+        'cascade_p95_seconds': percentile(cas_latencies, 95),
+    }
+    return {'summary': summary, 'per_query': per_query}
+
+
+def print_report(report: dict):
+    """Print evaluation summary"""
+    summary = report['summary']
+    print("\n" + "=" * 80)
+    print("RERANKING CASCADE EVALUATION")
+    print("=" * 80)
+    print(f"Stages:                {' -> '.join(summary['stages'])}")
+    print(f"Queries:               {summary['queries']}")
+    print(f"Overlap@{summary['top_k']} vs single:  {summary['mean_overlap_at_k']:.3f}")
+    print(f"Top-1 agreement:       {summary['top1_agreement']:.3f}")
+    print(f"Single-stage p50/p95:  {summary['reference_p50_seconds']:.3f}s / {summary['reference_p95_seconds']:.3f}s")
+    print(f"Cascade p50/p95:       {summary['cascade_p50_seconds']:.3f}s / {summary['cascade_p95_seconds']:.3f}s")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate the reranking cascade against single-stage CLIP")
+    parser.add_argument('--config', default=os.path.join(current_dir, 'config', 'retrieval.yaml'))
+    parser.add_argument('--queries', help="Text file with one query per line")
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--output', help="Optional path for the JSON report")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries) if args.queries else DEFAULT_QUERIES
+
+    pipeline = RetrievalPipeline(args.config)
+    report = evaluate(pipeline, queries, args.top_k)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    pipeline.close()
@@ -0,0 +1,174 @@
+"""
+Lexicon fast path for query normalization
+
+The normalization model only ever outputs ' | ' separated colors, garments and
+settings, so most queries can be normalized by looking their words up in a
+lexicon of the terms already present in the index. The LLM is only called when
+too few query words are covered by the lexicon.
+"""
+import os
+import importlib.util
+from collections import Counter
+from typing import Iterable, List, Tuple
+
+# Import shared vocabulary from indexing pipeline
+indexing_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../Indexing_Pipeline'))
+vocabulary_path = os.path.join(indexing_dir, 'utils', 'fashion_vocabulary.py')
+
+spec = importlib.util.spec_from_file_location("fashion_vocabulary", vocabulary_path)
+fashion_vocabulary = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(fashion_vocabulary)
+
+# Query words the normalization model drops (fillers, people, posture, intensity)
+QUERY_STOPWORDS = {
+    "a", "an", "the", "in", "on", "at", "of", "with", "and", "or", "for", "to", "by", "some",
+    "is", "are", "who", "that", "wearing", "wears", "wear", "dressed", "having",
+    "person", "man", "woman", "men", "women", "girl", "boy", "guy", "lady", "someone", "people",
+    "show", "me", "find", "image", "images", "photo", "photos", "picture", "pictures",
+    "standing", "walking", "sitting", "posing", "bright", "dark", "light",
+}
+
+# Longest lexicon term, in words
+MAX_PHRASE_WORDS = 3
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words of text with synonyms replaced by their vocabulary form"""
+    return fashion_vocabulary.canonicalize(text).split()
+
+
+class FashionLexicon:
+    """Set of known fashion terms (single words and short phrases)"""
+
+    def __init__(self, terms: Iterable[str]):
+        """
+        Initialize lexicon
+
+        Args:
+            terms: Terms in normalized form (e.g. 'yellow', 'city street')
+        """
+        self.terms = set()
+        for term in terms:
+            words = tokenize(term)
+            if 0 < len(words) <= MAX_PHRASE_WORDS:
+                self.terms.add(" ".join(words))
+
+    @classmethod
+    def from_normalized_texts(cls, normalized_texts: Iterable[str], min_term_count: int = 2) -> "FashionLexicon":
+        """
+        Build lexicon from indexed normalized texts plus the shared vocabulary
+
+        Args:
+            normalized_texts: ' | ' separated keyword lists produced at indexing time
+            min_term_count: Minimum number of texts a term must appear in (filters one-off model noise)
+
+        Returns:
+            FashionLexicon
+        """
+        counts = Counter()
+        for text in normalized_texts:
+            counts.update({term.strip().lower() for term in text.split('|') if term.strip()})
+
+        vocabulary = fashion_vocabulary.COLORS + fashion_vocabulary.GARMENTS + fashion_vocabulary.SETTINGS
+        indexed = [term for term, count in counts.items() if count >= min_term_count]
+        return cls(vocabulary + indexed)
+
+    def match(self, query: str) -> Tuple[List[str], float]:
+        """
+        Find lexicon terms in a query, longest phrase first
+
+        Args:
+            query: User query
+
+        Returns:
+            Tuple of (terms in query order without duplicates,
+                      share of content words covered by a term)
+        """
+        words = tokenize(query)
+        terms = []
+        covered = 0
+        content = 0
+        i = 0
+        while i < len(words):
+            for size in range(min(MAX_PHRASE_WORDS, len(words) - i), 0, -1):
+                phrase = " ".join(words[i:i + size])
+                if phrase in self.terms:
+                    if phrase not in terms:
+                        terms.append(phrase)
+                    covered += size
+                    content += size
+                    i += size
+                    break
+            else:
+                if words[i] not in QUERY_STOPWORDS:
+                    content += 1
+                i += 1
+
+        coverage = covered / content if content else 0.0
+        return terms, coverage
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+
+class LexiconQueryNormalizer:
+    """Normalize queries with the lexicon, falling back to the model normalizer on low coverage"""
+
+    def __init__(self, lexicon: FashionLexicon, fallback, min_coverage: float = 0.75, metrics=None):
+        """
+        Initialize lexicon normalizer
+
+        Args:
+            lexicon: Fashion lexicon
+            fallback: QueryNormalizer used when coverage is below min_coverage
+            min_coverage: Share of content words that must be lexicon terms
+            metrics: Optional MetricsRegistry counting lexicon hits and fallbacks
+        """
+        self.lexicon = lexicon
+        self.fallback = fallback
+        self.min_coverage = min_coverage
+        self.metrics = metrics
+        self.hits = 0
+        self.fallbacks = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of queries answered by the lexicon"""
+        total = self.hits + self.fallbacks
+        return self.hits / total if total else 0.0
+
+    def normalize(self, query: str) -> str:
+        """
+        Normalize a single query (same interface as QueryNormalizer)
+
+        Args:
+            query: User query text
+
+        Returns:
+            Normalized query text
+        """
+        return self.normalize_with_source(query)[0]
+
+    def normalize_with_source(self, query: str) -> Tuple[str, str, float]:
+        """
+        Normalize a single query and report how
+
+        Args:
+            query: User query text
+
+        Returns:
+            Tuple of (normalized query text, source ('lexicon' or 'model'),
+                      share of content words covered by the lexicon)
+        """
+        terms, coverage = self.lexicon.match(query)
+
+        if terms and coverage >= self.min_coverage:
+            self.hits += 1
+            if self.metrics is not None:
+                self.metrics.inc("normalize_lexicon_hits")
+            return " | ".join(terms), "lexicon", coverage
+
+        self.fallbacks += 1
+        if self.metrics is not None:
+            self.metrics.inc("normalize_model_fallbacks")
+        return self.fallback.normalize(query), "model", coverage
@@ -4,22 +4,23 @@ Query Embedding Logic
 import sys
 import os
 import importlib.util
+from typing import List
 import numpy as np
 
-# Import embedding model from indexing pipeline
+# Import model interfaces from indexing pipeline
 indexing_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../Indexing_Pipeline'))
-embedding_path = os.path.join(indexing_dir, 'models', 'embedding_model.py')
+interfaces_path = os.path.join(indexing_dir, 'models', 'interfaces.py')
 
-spec = importlib.util.spec_from_file_location("embedding_model", embedding_path)
-embedding_module = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(embedding_module)
-EmbeddingModel = embedding_module.EmbeddingModel
+spec = importlib.util.spec_from_file_location("model_interfaces", interfaces_path)
+interfaces_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(interfaces_module)
+TextEmbeddingModel = interfaces_module.TextEmbeddingModel
 
 
 class QueryEmbedder:
     """Generate embeddings for normalized queries"""
     
-    def __init__(self, model: EmbeddingModel):
+    def __init__(self, model: TextEmbeddingModel):
         """
         Initialize query embedder
         
@@ -40,3 +41,15 @@ class QueryEmbedder:
         """
         embedding = self.model.generate_embedding(query)
         return embedding
+    
+    def embed_batch(self, queries: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for many queries (bulk search / evaluation)
+        
+        Args:
+            queries: Normalized query texts
+            
+        Returns:
+            Query embeddings (N, dim), in query order
+        """
+        return self.model.generate_embeddings_batch(queries)
@@ -5,14 +5,14 @@ import sys
 import os
 import importlib.util
 
-# Import text norm model from indexing pipeline
+# Import model interfaces from indexing pipeline
 indexing_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../Indexing_Pipeline'))
-text_norm_path = os.path.join(indexing_dir, 'models', 'text_norm_model.py')
+interfaces_path = os.path.join(indexing_dir, 'models', 'interfaces.py')
 
-spec = importlib.util.spec_from_file_location("text_norm_model", text_norm_path)
-text_norm_module = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(text_norm_module)
-TextNormalizationModel = text_norm_module.TextNormalizationModel
+spec = importlib.util.spec_from_file_location("model_interfaces", interfaces_path)
+interfaces_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(interfaces_module)
+NormalizationModel = interfaces_module.NormalizationModel
 
 from typing import List
 
@@ -20,7 +20,7 @@ from typing import List
 class QueryNormalizer:
     """Normalize user queries using text normalization model"""
     
-    def __init__(self, model: TextNormalizationModel):
+    def __init__(self, model: NormalizationModel):
         """
         Initialize query normalizer
         
@@ -2,56 +2,168 @@
 Reranking Logic using CLIP
 """
 import os
+import time
 import importlib.util
-from typing import List, Tuple
+from typing import List, Tuple, Optional
 import numpy as np
 
-# Import CLIP model
+# Import reranking model interface
 current_dir = os.path.dirname(os.path.abspath(__file__))
-clip_path = os.path.join(current_dir, '../models', 'clip_reranking_model.py')
+interfaces_path = os.path.join(current_dir, '../models', 'interfaces.py')
 
-spec = importlib.util.spec_from_file_location("clip_reranking_model", clip_path)
-clip_module = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(clip_module)
-CLIPRerankingModel = clip_module.CLIPRerankingModel
+spec = importlib.util.spec_from_file_location("reranking_interfaces", interfaces_path)
+interfaces_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(interfaces_module)
+RerankingModel = interfaces_module.RerankingModel
+
+
+# Supported ways of combining a stage's score with the score it inherits
+FUSION_METHODS = ("replace", "weighted", "rrf")
+
+# Rank offset used by reciprocal rank fusion
+RRF_K = 60
+
+
+class RerankStage:
+    """One stage of a reranking cascade"""
+
+    def __init__(self, model: RerankingModel, pool_size: Optional[int] = None,
+                 fusion: str = "replace", weight: float = 1.0, name: str = "clip"):
+        """
+        Initialize rerank stage
+
+        Args:
+            model: CLIP model used to score this stage
+            pool_size: Number of best candidates (from the previous stage) this stage scores,
+                       None scores every candidate
+            fusion: How the stage score is combined with the incoming score
+                    ('replace', 'weighted' or 'rrf')
+            weight: Weight of the stage score when fusion is 'weighted'
+            name: Stage name used in logs and reports
+        """
+        if fusion not in FUSION_METHODS:
+            raise ValueError(f"Unknown fusion '{fusion}', expected one of {FUSION_METHODS}")
+
+        self.model = model
+        self.pool_size = pool_size
+        self.fusion = fusion
+        self.weight = weight
+        self.name = name
+
+    def score(self, query: str, image_paths: List[str], metrics=None) -> np.ndarray:
+        """
+        Score images against the query with this stage's model
+
+        Args:
+            query: Original user query
+            image_paths: List of image file paths
+            metrics: Optional MetricsRegistry receiving sub-stage timings
+
+        Returns:
+            Similarity scores (N,)
+        """
+        if metrics is None:
+            text_embedding = self.model.encode_text([query])
+            image_embeddings = self.model.encode_images(image_paths)
+        else:
+            with metrics.span(f"rerank.{self.name}.text_encode"):
+                text_embedding = self.model.encode_text([query])
+            with metrics.span(f"rerank.{self.name}.image_decode"):
+                images = self.model.load_images(image_paths)
+            with metrics.span(f"rerank.{self.name}.image_encode"):
+                image_embeddings = self.model.encode_pil_images(images)
+            metrics.inc(f"rerank_{self.name}_images", len(image_paths))
+
+        scores = self.model.compute_similarity(text_embedding, image_embeddings)
+        return np.atleast_1d(scores)
+
+    def fuse(self, previous_scores: np.ndarray, stage_scores: np.ndarray) -> np.ndarray:
+        """
+        Combine incoming scores with this stage's scores
+
+        Args:
+            previous_scores: Scores of the pooled candidates before this stage
+            stage_scores: Scores computed by this stage
+
+        Returns:
+            Fused scores (N,)
+        """
+        if self.fusion == "weighted":
+            return self.weight * stage_scores + (1.0 - self.weight) * previous_scores
+
+        if self.fusion == "rrf":
+            # Pool arrives sorted by previous score, so its position is the previous rank
+            previous_ranks = np.arange(len(previous_scores))
+            stage_ranks = np.empty(len(stage_scores), dtype=np.int64)
+            stage_ranks[np.argsort(-stage_scores)] = np.arange(len(stage_scores))
+            return 1.0 / (RRF_K + previous_ranks + 1) + 1.0 / (RRF_K + stage_ranks + 1)
+
+        return stage_scores
 
 
 class CLIPReranker:
     """Rerank search results using CLIP model"""
     
-    def __init__(self, model: CLIPRerankingModel):
+    def __init__(self, model: RerankingModel, stages: Optional[List[RerankStage]] = None,
+                 metrics=None):
         """
         Initialize reranker
         
         Args:
-            model: CLIP reranking model instance
+            model: CLIP reranking model instance (final stage)
+            stages: Optional cascade of rerank stages, cheapest first. When omitted,
+                    a single stage scoring every candidate with `model` is used.
+            metrics: Optional MetricsRegistry for per-stage timings
         """
         self.model = model
+        self.stages = stages if stages else [RerankStage(model)]
+        self.metrics = metrics
     
-    def rerank(self, query: str, image_paths: List[str], top_k: int = 10) -> Tuple[List[int], List[float]]:
+    def rerank(self, query: str, image_paths: List[str], top_k: int = 10,
+               prior_scores: Optional[List[float]] = None
+               ) -> Tuple[List[int], List[float], List[Tuple[str, int, float]]]:
         """
         Rerank images based on CLIP similarity
         
+        Each stage scores the best `pool_size` candidates left by the previous stage;
+        candidates outside a stage's pool keep their previous order behind it.
+        
         Args:
             query: Original user query (not normalized)
-            image_paths: List of image file paths
+            image_paths: List of image file paths, ordered by semantic score
             top_k: Number of top results to return
+            prior_scores: Optional semantic scores aligned with image_paths,
+                          used as the incoming score of the first stage
             
         Returns:
-            Tuple of (indices, scores) for top-k results
+            Tuple of (indices, scores) for top-k results, plus the
+            (stage name, candidates scored, seconds) of every stage
         """
-        # Encode query
-        text_embedding = self.model.encode_text([query])
+        if len(image_paths) == 0:
+            return [], [], []
         
-        # Encode images
-        image_embeddings = self.model.encode_images(image_paths)
+        current_scores = np.zeros(len(image_paths), dtype=np.float32)
+        if prior_scores is not None:
+            current_scores = np.asarray(prior_scores, dtype=np.float32)
+        order = np.arange(len(image_paths))
         
-        # Compute similarities
-        scores = self.model.compute_similarity(text_embedding, image_embeddings)
+        stage_timings = []
+        for stage in self.stages:
+            pool = order[:stage.pool_size] if stage.pool_size else order
+            
+            start = time.perf_counter()
+            stage_scores = stage.score(query, [image_paths[i] for i in pool], self.metrics)
+            fused = stage.fuse(current_scores[pool], stage_scores)
+            elapsed = time.perf_counter() - start
+            stage_timings.append((stage.name, len(pool), elapsed))
+            
+            current_scores[pool] = fused
+            pool = pool[np.argsort(-fused, kind='stable')]
+            order = np.concatenate([pool, order[len(pool):]])
         
         # Get top-k indices
-        top_k = min(top_k, len(scores))
-        top_indices = np.argsort(scores)[::-1][:top_k]
-        top_scores = scores[top_indices]
+        top_k = min(top_k, len(order))
+        top_indices = order[:top_k]
+        top_scores = current_scores[top_indices]
         
-        return top_indices.tolist(), top_scores.tolist()
+        return top_indices.tolist(), top_scores.tolist(), stage_timings
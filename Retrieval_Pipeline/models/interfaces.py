@@ -0,0 +1,28 @@
+"""
+Reranking model interface
+
+Text normalization and embedding interfaces are shared with the Indexing
+Pipeline (Indexing_Pipeline/models/interfaces.py).
+"""
+from typing import List, Protocol, runtime_checkable
+import numpy as np
+
+
+@runtime_checkable
+class RerankingModel(Protocol):
+    """Joint text / image encoder used by the reranking stages"""
+
+    def encode_text(self, texts: List[str]) -> np.ndarray:
+        ...
+
+    def load_images(self, image_paths: List[str]) -> list:
+        ...
+
+    def encode_pil_images(self, images: list) -> np.ndarray:
+        ...
+
+    def encode_images(self, image_paths: List[str]) -> np.ndarray:
+        ...
+
+    def compute_similarity(self, text_embeddings: np.ndarray, image_embeddings: np.ndarray) -> np.ndarray:
+        ...
@@ -0,0 +1,40 @@
+"""
+Model registry for the Retrieval Pipeline
+
+Extends the Indexing Pipeline registry (text_normalization, embedding) with the
+reranking backends, which use the CLIP encoders shared with the Indexing Pipeline. Select a backend with the `backend` key of each
+`models.<role>` section in retrieval.yaml.
+"""
+import os
+import importlib.util
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+indexing_dir = os.path.abspath(os.path.join(current_dir, '../../Indexing_Pipeline'))
+
+
+def _import_from_path(module_name: str, file_path: str):
+    spec = importlib.util.spec_from_file_location(module_name, file_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+indexing_registry = _import_from_path("indexing_model_registry", os.path.join(indexing_dir, 'models', 'registry.py'))
+MODEL_BACKENDS = indexing_registry.MODEL_BACKENDS
+register_backend = indexing_registry.register_backend
+build_model = indexing_registry.build_model
+
+
+def _build_clip(config: dict):
+    module = _import_from_path("clip_model", os.path.join(indexing_dir, 'models', 'clip_model.py'))
+    return module.CLIPEncoder(model_path=config['path'], device=config['device'],
+                              max_batch_tokens=config.get('max_batch_tokens', 8192))
+
+
+def _build_hash_clip(config: dict):
+    module = _import_from_path("lightweight_models", os.path.join(indexing_dir, 'models', 'lightweight_models.py'))
+    return module.HashCLIPModel(embedding_dim=config.get('embedding_dim', 768))
+
+
+register_backend('reranking', 'clip', _build_clip)
+register_backend('reranking', 'hash', _build_hash_clip)
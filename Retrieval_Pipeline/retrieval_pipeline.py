@@ -6,15 +6,23 @@ Flow:
 1. User Query → Text Normalization (Qwen2.5-0.5B-Instruct)
 2. Normalized Query → Embedding (BAAI/bge-large-en-v1.5)
 3. Embedding → FAISS Semantic Search → Top-N (20) Results
+   (metadata resolved from the snapshot exported with the index, PostgreSQL as fallback)
 4. Top-N Images + Original Query → CLIP Reranking → Top-K (10) Final Results
 
+first_stage: clip (configured in search.first_stage or per request) replaces steps 1-4:
+User Query → CLIP text embedding → FAISS search over CLIP image embeddings → Top-K,
+already ranked by the CLIP score the reranking would compute
+
 
 
 """
 import yaml
+import gc
 import os
 import sys
-from typing import List, Dict
+import time
+import threading
+from typing import List, Dict, Optional, Iterator, Tuple
 import importlib.util
 
 # Setup paths
@@ -28,50 +36,71 @@ def import_from_path(module_name, file_path):
     spec.loader.exec_module(module)
     return module
 
-# Import models
-clip_module = import_from_path("clip_reranking_model", os.path.join(current_dir, "models", "clip_reranking_model.py"))
-CLIPRerankingModel = clip_module.CLIPRerankingModel
-
-text_norm_module = import_from_path("text_norm_model", os.path.join(indexing_dir, "models", "text_norm_model.py"))
-TextNormalizationModel = text_norm_module.TextNormalizationModel
-
-embedding_module = import_from_path("embedding_model", os.path.join(indexing_dir, "models", "embedding_model.py"))
-EmbeddingModel = embedding_module.EmbeddingModel
+# Import model registry (backends are imported lazily when built)
+registry_module = import_from_path("model_registry", os.path.join(current_dir, "models", "registry.py"))
+build_model = registry_module.build_model
 
 # Import logic
 query_norm_module = import_from_path("query_normalization", os.path.join(current_dir, "logic", "query_normalization.py"))
 QueryNormalizer = query_norm_module.QueryNormalizer
 
+lexicon_module = import_from_path("lexicon_normalization", os.path.join(current_dir, "logic", "lexicon_normalization.py"))
+FashionLexicon = lexicon_module.FashionLexicon
+LexiconQueryNormalizer = lexicon_module.LexiconQueryNormalizer
+
 query_embed_module = import_from_path("query_embedding", os.path.join(current_dir, "logic", "query_embedding.py"))
 QueryEmbedder = query_embed_module.QueryEmbedder
 
 rerank_module = import_from_path("reranking", os.path.join(current_dir, "logic", "reranking.py"))
 CLIPReranker = rerank_module.CLIPReranker
+RerankStage = rerank_module.RerankStage
 
 # Import storage
 faiss_module = import_from_path("faiss_searcher", os.path.join(current_dir, "storage", "faiss_searcher.py"))
 FAISSSearcher = faiss_module.FAISSSearcher
 
+sharded_faiss_module = import_from_path("sharded_faiss_searcher", os.path.join(current_dir, "storage", "sharded_faiss_searcher.py"))
+ShardedFAISSSearcher = sharded_faiss_module.ShardedFAISSSearcher
+
 postgres_module = import_from_path("postgres_reader", os.path.join(current_dir, "storage", "postgres_reader.py"))
 PostgresReader = postgres_module.PostgresReader
 
+metadata_store_module = import_from_path("metadata_store", os.path.join(current_dir, "storage", "metadata_store.py"))
+SnapshotMetadataStore = metadata_store_module.SnapshotMetadataStore
+
+index_watcher_module = import_from_path("index_watcher", os.path.join(current_dir, "storage", "index_watcher.py"))
+IndexWatcher = index_watcher_module.IndexWatcher
+read_manifest_version = index_watcher_module.read_manifest_version
+
 # Import utils
 logger_module = import_from_path("logger", os.path.join(current_dir, "utils", "logger.py"))
 setup_logger = logger_module.setup_logger
 
+metrics_module = import_from_path("metrics", os.path.join(current_dir, "utils", "metrics.py"))
+MetricsRegistry = metrics_module.MetricsRegistry
+get_rss_bytes = metrics_module.get_rss_bytes
+
 logger = setup_logger(__name__)
 
+# Supported search.first_stage values: normalized text → BGE → FAISS, or query → CLIP text → CLIP image index
+FIRST_STAGES = ("text", "clip")
+
 
 class RetrievalPipeline:
     """Complete retrieval pipeline for fashion search"""
     
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str, models: Optional[Dict] = None):
         """
         Initialize retrieval pipeline
         
         Args:
             config_path: Path to configuration file
+            models: Optional pre-built models keyed by config section
+                    ('text_normalization', 'embedding', 'reranking'); sections that are
+                    not given are built from their `backend` in the config
         """
+        models = models or {}
+        
         # Load config
         with open(config_path, 'r', encoding='utf-8') as f:
             self.config = yaml.safe_load(f)
@@ -80,81 +109,405 @@ class RetrievalPipeline:
         logger.info("INITIALIZING RETRIEVAL PIPELINE")
         logger.info("=" * 80)
         
+        # Stage timings and counters
+        metrics_config = self.config.get('metrics', {})
+        self.metrics = MetricsRegistry(max_samples=metrics_config.get('max_samples', 2048))
+        self.metrics_json_path = metrics_config.get('json_path')
+        self.metrics_json_interval = metrics_config.get('json_interval', 50)
+        
         # Initialize models
         logger.info("\nLoading Models...")
         
-        self.text_norm_model = TextNormalizationModel(
-            model_path=self.config['models']['text_normalization']['path'],
-            device=self.config['models']['text_normalization']['device']
-        )
+        models_config = self.config['models']
+        
+        self.text_norm_model = models.get('text_normalization') or build_model('text_normalization', models_config['text_normalization'])
         logger.info("✓ Text Normalization Model loaded")
         
-        self.embedding_model = EmbeddingModel(
-            model_path=self.config['models']['embedding']['path'],
-            device=self.config['models']['embedding']['device']
-        )
+        self.embedding_model = models.get('embedding') or build_model('embedding', models_config['embedding'])
         logger.info("✓ Embedding Model loaded")
         
-        self.clip_model = CLIPRerankingModel(
-            model_path=self.config['models']['reranking']['path'],
-            device=self.config['models']['reranking']['device']
-        )
+        self.clip_model = models.get('reranking') or build_model('reranking', models_config['reranking'])
         logger.info("✓ CLIP Reranking Model loaded")
         
         # Initialize logic components
-        self.query_normalizer = QueryNormalizer(self.text_norm_model)
         self.query_embedder = QueryEmbedder(self.embedding_model)
-        self.reranker = CLIPReranker(self.clip_model)
+        self.reranker = CLIPReranker(self.clip_model, self._build_rerank_stages(), metrics=self.metrics)
         
         # Initialize storage
         logger.info("\nLoading Storage...")
         
-        index_path = os.path.join(os.path.dirname(__file__), self.config['database']['faiss']['index_path'])
-        ids_path = os.path.join(os.path.dirname(__file__), self.config['database']['faiss']['ids_path'])
-        
-        self.faiss_searcher = FAISSSearcher(index_path, ids_path)
+        self.faiss_searcher = self._load_faiss_searcher()
+        self.clip_searcher = self._load_clip_searcher()
         self.postgres_reader = PostgresReader(self.config['database']['postgres'])
-        self.postgres_reader.connect()
+        self.metadata_store = self._load_metadata_store()
+        self.query_normalizer = self._build_query_normalizer()
         
         # Get search config
         self.top_n = self.config['search']['top_n']
         self.top_k = self.config['search']['top_k']
+        self.first_stage = self.config['search'].get('first_stage', 'text')
+        self._check_first_stage(self.first_stage)
         self.dataset_dir = os.path.join(os.path.dirname(__file__), self.config['dataset']['image_dir'])
         
+        # Hot reload of new index versions
+        self.last_reload = None
+        self._reload_lock = threading.Lock()
+        self.index_watcher = None
+        reload_config = self.config['database']['faiss'].get('hot_reload', {})
+        if reload_config.get('enabled', False):
+            self.index_watcher = IndexWatcher(
+                self._faiss_manifest_path(),
+                self.faiss_searcher.version,
+                self.reload_index,
+                poll_interval=reload_config.get('poll_interval', 10.0)
+            )
+            self.index_watcher.start()
+        
+        # Metrics exporter
+        metrics_port = metrics_config.get('prometheus_port')
+        if metrics_port:
+            try:
+                self.metrics.start_http_server(metrics_port)
+                logger.info(f"✓ Metrics served on http://127.0.0.1:{metrics_port}/metrics")
+            except OSError as e:
+                logger.warning(f"Could not start metrics server on port {metrics_port}: {e}")
+        
         logger.info("=" * 80)
         logger.info("✓ RETRIEVAL PIPELINE READY")
         logger.info("=" * 80)
     
-    def search(self, query: str) -> List[Dict]:
+    def _load_faiss_searcher(self):
         """
-        Search for fashion images matching the query
+        Load the FAISS index, as one file or as shards searched in parallel
+        
+        Returns:
+            FAISSSearcher or ShardedFAISSSearcher
+        """
+        faiss_config = self.config['database']['faiss']
+        rescore_factor = faiss_config.get('rescore_factor', 0)
+        sharding = faiss_config.get('sharding', {})
+        if sharding.get('enabled', False):
+            manifest_path = os.path.join(os.path.dirname(__file__), sharding['manifest_path'])
+            return ShardedFAISSSearcher(manifest_path, search_threads=sharding.get('search_threads', 4),
+                                        rescore_factor=rescore_factor)
+        
+        index_path = os.path.join(os.path.dirname(__file__), faiss_config['index_path'])
+        ids_path = os.path.join(os.path.dirname(__file__), faiss_config['ids_path'])
+        return FAISSSearcher(index_path, ids_path, rescore_factor=rescore_factor)
+    
+    def _load_clip_searcher(self):
+        """
+        Load the CLIP image index built by the indexing pipeline (database.clip_index)
+        
+        Returns:
+            FAISSSearcher, or None when the CLIP index is disabled
+        """
+        clip_config = self.config['database'].get('clip_index', {})
+        if not clip_config.get('enabled', False):
+            return None
+        index_path = os.path.join(os.path.dirname(__file__), clip_config['index_path'])
+        ids_path = os.path.join(os.path.dirname(__file__), clip_config['ids_path'])
+        return FAISSSearcher(index_path, ids_path)
+    
+    def _check_first_stage(self, first_stage: str):
+        """Raise for an unknown first stage, or for clip without a CLIP index"""
+        if first_stage not in FIRST_STAGES:
+            raise ValueError(f"Unknown first_stage '{first_stage}', expected one of {FIRST_STAGES}")
+        if first_stage == 'clip' and self.clip_searcher is None:
+            raise ValueError("first_stage 'clip' needs database.clip_index.enabled and the CLIP index "
+                             "built by the indexing pipeline")
+    
+    def _faiss_manifest_path(self) -> str:
+        """Manifest that gets a new version whenever the indexing pipeline publishes the index"""
+        faiss_config = self.config['database']['faiss']
+        sharding = faiss_config.get('sharding', {})
+        if sharding.get('enabled', False):
+            return os.path.join(os.path.dirname(__file__), sharding['manifest_path'])
+        index_path = os.path.join(os.path.dirname(__file__), faiss_config['index_path'])
+        return index_path.replace('.bin', '_manifest.json')
+    
+    def reload_index(self, version: str) -> bool:
+        """
+        Load a newly published index version and swap it in
+        
+        Everything is loaded before any swap, and each swap is a single attribute
+        assignment, so in-flight queries finish on the objects they started with.
+        The metadata snapshot is swapped first: it is a superset of the old one, so
+        no FAISS result is left without metadata.
         
         Args:
-            query: User query (e.g., "A person in a bright yellow raincoat")
+            version: Version found in the index manifest
             
         Returns:
-            List of result dictionaries with image info and scores
+            True when the new version is live, False to retry later
+            (snapshot for this version not exported yet and no PostgreSQL fallback,
+            or another version published while loading)
         """
-        logger.info(f"\n{'=' * 80}")
-        logger.info(f"PROCESSING QUERY: {query}")
-        logger.info(f"{'=' * 80}\n")
+        with self._reload_lock:
+            rss_before = get_rss_bytes()
+            load_start = time.perf_counter()
+            
+            new_snapshot = None
+            if isinstance(self.metadata_store, SnapshotMetadataStore):
+                new_snapshot = self.metadata_store.load_snapshot(version)
+                if new_snapshot is None:
+                    logger.info(f"Index version {version} published, waiting for its metadata snapshot")
+                    return False
+            
+            new_lexicon = None
+            if isinstance(self.query_normalizer, LexiconQueryNormalizer) and new_snapshot is not None:
+                lexicon_config = self.config['models']['text_normalization'].get('lexicon', {})
+                new_lexicon = FashionLexicon.from_normalized_texts(
+                    new_snapshot.iter_normalized_texts(),
+                    min_term_count=lexicon_config.get('min_term_count', 2)
+                )
+            
+            # The indexing pipeline publishes the CLIP index before the text index it is watched through
+            new_clip_searcher = None
+            if self.clip_searcher is not None:
+                clip_index_path = os.path.join(os.path.dirname(__file__),
+                                               self.config['database']['clip_index']['index_path'])
+                clip_version = read_manifest_version(clip_index_path.replace('.bin', '_manifest.json'))
+                if clip_version not in (None, self.clip_searcher.version):
+                    new_clip_searcher = self._load_clip_searcher()
+            
+            new_searcher = None
+            new_shards = None
+            if isinstance(self.faiss_searcher, ShardedFAISSSearcher):
+                # Loads changed shards only; the shard map is swapped below
+                new_shards, loaded_version, changed_shards = self.faiss_searcher.load_shards()
+            else:
+                new_searcher = self._load_faiss_searcher()
+                loaded_version = new_searcher.version
+                changed_shards = None
+            if loaded_version != version:
+                # Another version was published while loading; the next poll picks it up
+                logger.info(f"Index version changed to {loaded_version} while loading {version}, retrying")
+                return False
+            
+            load_seconds = time.perf_counter() - load_start
+            rss_loaded = get_rss_bytes()
+            
+            swap_start = time.perf_counter()
+            if new_snapshot is not None:
+                self.metadata_store.swap(new_snapshot)
+            if new_lexicon is not None:
+                self.query_normalizer.lexicon = new_lexicon
+            if new_shards is not None:
+                self.faiss_searcher.swap_shards(new_shards, loaded_version)
+            else:
+                self.faiss_searcher = new_searcher
+            if new_clip_searcher is not None:
+                self.clip_searcher = new_clip_searcher
+            swap_seconds = time.perf_counter() - swap_start
+            
+            # Old index is freed once the last in-flight query drops its reference
+            del new_searcher, new_shards, new_snapshot, new_lexicon, new_clip_searcher
+            gc.collect()
+            rss_after = get_rss_bytes()
+        
+        self.metrics.inc("index_reloads")
+        self.metrics.observe("index_reload_load", load_seconds)
+        self.metrics.observe("index_reload_swap", swap_seconds)
+        
+        to_mb = lambda value: None if value is None else value / (1024 * 1024)
+        self.last_reload = {
+            'version': version,
+            'load_seconds': load_seconds,
+            'swap_seconds': swap_seconds,
+            'changed_shards': changed_shards,
+            'rss_before_mb': to_mb(rss_before),
+            'rss_peak_overlap_mb': to_mb(rss_loaded - rss_before) if rss_before and rss_loaded else None,
+            'rss_after_mb': to_mb(rss_after),
+        }
+        logger.info(
+            f"✓ Index version {version} live: loaded in {load_seconds:.2f}s, swapped in {swap_seconds * 1e6:.0f}us, "
+            f"memory overlap {self.last_reload['rss_peak_overlap_mb'] or 0:.1f} MB"
+        )
+        return True
+    
+    def _load_metadata_store(self):
+        """
+        Load the metadata snapshot exported with the FAISS index, or fall back to PostgreSQL
         
+        Returns:
+            Object providing get_images_by_ids (SnapshotMetadataStore or PostgresReader)
+        """
+        snapshot_config = self.config['database'].get('metadata_snapshot', {})
+        snapshot_path = os.path.join(os.path.dirname(__file__), snapshot_config.get('path', ''))
+        
+        if not snapshot_config.get('enabled', False) or not os.path.exists(snapshot_path):
+            self.postgres_reader.connect()
+            return self.postgres_reader
+        
+        fallback = None
+        if snapshot_config.get('postgres_fallback', True):
+            self.postgres_reader.connect()
+            fallback = self.postgres_reader
+        
+        metadata_store = SnapshotMetadataStore(snapshot_path, fallback, metrics=self.metrics)
+        if metadata_store.index_version != self.faiss_searcher.version:
+            logger.warning(
+                f"Metadata snapshot version {metadata_store.index_version} does not match "
+                f"FAISS index version {self.faiss_searcher.version}"
+            )
+            metadata_store.refresh(index_version=self.faiss_searcher.version)
+        return metadata_store
+    
+    def _build_query_normalizer(self):
+        """
+        Build the query normalizer, with the lexicon fast path when enabled
+        
+        The lexicon is built from the normalized texts of the metadata snapshot
+        (only the shared vocabulary when metadata comes from PostgreSQL).
+        
+        Returns:
+            QueryNormalizer or LexiconQueryNormalizer
+        """
+        model_normalizer = QueryNormalizer(self.text_norm_model)
+        lexicon_config = self.config['models']['text_normalization'].get('lexicon', {})
+        if not lexicon_config.get('enabled', False):
+            return model_normalizer
+        
+        snapshot = getattr(self.metadata_store, 'snapshot', None)
+        normalized_texts = snapshot.iter_normalized_texts() if snapshot is not None else []
+        lexicon = FashionLexicon.from_normalized_texts(
+            normalized_texts, min_term_count=lexicon_config.get('min_term_count', 2)
+        )
+        logger.info(f"✓ Query lexicon built with {len(lexicon)} terms")
+        
+        return LexiconQueryNormalizer(
+            lexicon, model_normalizer,
+            min_coverage=lexicon_config.get('min_coverage', 0.75),
+            metrics=self.metrics
+        )
+    
+    def _build_rerank_stages(self) -> List[RerankStage]:
+        """
+        Build the reranking cascade from config
+        
+        Stages listed under `models.reranking.cascade` run first (cheapest first),
+        followed by the main reranking model as the final stage.
+        
+        Returns:
+            List of rerank stages
+        """
+        rerank_config = self.config['models']['reranking']
+        loaded_models = {rerank_config['path']: self.clip_model}
+        
+        stages = []
+        for stage_config in rerank_config.get('cascade') or []:
+            model_path = stage_config['path']
+            if model_path not in loaded_models:
+                loaded_models[model_path] = build_model('reranking', {
+                    'backend': stage_config.get('backend', rerank_config.get('backend')),
+                    'path': model_path,
+                    'device': stage_config.get('device', rerank_config['device'])
+                })
+                logger.info(f"✓ Cascade Reranking Model loaded: {model_path}")
+            
+            stages.append(RerankStage(
+                model=loaded_models[model_path],
+                pool_size=stage_config.get('pool_size'),
+                fusion=stage_config.get('fusion', 'replace'),
+                weight=stage_config.get('weight', 1.0),
+                name=stage_config.get('name', model_path)
+            ))
+        
+        stages.append(RerankStage(
+            model=self.clip_model,
+            pool_size=rerank_config.get('pool_size'),
+            fusion=rerank_config.get('fusion', 'replace'),
+            weight=rerank_config.get('weight', 1.0),
+            name=rerank_config.get('name', rerank_config['path'])
+        ))
+        return stages
+    
+    def retrieve_candidates(self, query: str, top_n: Optional[int] = None,
+                            first_stage: Optional[str] = None) -> List[Dict]:
+        """
+        Run normalization, embedding and FAISS search for a query
+        
+        Args:
+            query: User query
+            top_n: Number of FAISS candidates (search.top_n when None)
+            first_stage: 'text' or 'clip' (search.first_stage when None)
+            
+        Returns:
+            List of candidate image dictionaries ordered by semantic score
+            (the CLIP score with first_stage 'clip')
+        """
+        first_stage = first_stage or self.first_stage
+        self._check_first_stage(first_stage)
+        top_n = top_n or self.top_n
+        if first_stage == 'clip':
+            image_ids, semantic_scores = self._search_clip(query, top_n)
+        else:
+            image_ids, semantic_scores = self._search_text(query, top_n)
+        return self._resolve_candidates(image_ids, semantic_scores, top_n)
+    
+    def _search_clip(self, query: str, top_n: int) -> Tuple[List[int], List[float]]:
+        """
+        Encode the original query with the CLIP text tower and search the CLIP image index
+        
+        Returns:
+            Tuple of (image_ids, CLIP scores)
+        """
+        logger.info("STEP 1: CLIP Text Encoding (first_stage: clip)")
+        with self.metrics.span("clip_text_encode"):
+            query_embedding = self.clip_model.encode_text([query])
+        logger.info(f"  Embedding shape: {query_embedding.shape}\n")
+        
+        logger.info(f"STEP 2: CLIP Image Index Search (Top-{top_n})")
+        with self.metrics.span("clip_search"):
+            image_ids, clip_scores = self.clip_searcher.search(query_embedding, top_n)
+        self.metrics.inc("clip_candidates", len(image_ids))
+        logger.info(f"  Found {len(image_ids)} results from the CLIP index\n")
+        return image_ids, clip_scores
+    
+    def _search_text(self, query: str, top_n: int) -> Tuple[List[int], List[float]]:
+        """
+        Normalize and embed the query, then search the text index
+        
+        Returns:
+            Tuple of (image_ids, semantic scores)
+        """
         # STEP 1: Normalize query
         logger.info("STEP 1: Text Normalization")
-        normalized_query = self.query_normalizer.normalize(query)
+        source = None
+        with self.metrics.span("normalize"):
+            if isinstance(self.query_normalizer, LexiconQueryNormalizer):
+                normalized_query, source, coverage = self.query_normalizer.normalize_with_source(query)
+            else:
+                normalized_query = self.query_normalizer.normalize(query)
         logger.info(f"  Original: {query}")
-        logger.info(f"  Normalized: {normalized_query}\n")
+        logger.info(f"  Normalized: {normalized_query}")
+        if source is not None:
+            logger.info(f"  Source: {source} (coverage {coverage:.2f}, "
+                        f"lexicon hit rate {self.query_normalizer.hit_rate:.1%})")
+        logger.info("")
         
         # STEP 2: Generate embedding
         logger.info("STEP 2: Embedding Generation")
-        query_embedding = self.query_embedder.embed(normalized_query)
+        with self.metrics.span("embed"):
+            query_embedding = self.query_embedder.embed(normalized_query)
         logger.info(f"  Embedding shape: {query_embedding.shape}\n")
         
         # STEP 3: Semantic search with FAISS
-        logger.info(f"STEP 3: Semantic Search (Top-{self.top_n})")
-        image_ids, semantic_scores = self.faiss_searcher.search(query_embedding, self.top_n)
+        logger.info(f"STEP 3: Semantic Search (Top-{top_n})")
+        with self.metrics.span("faiss_search"):
+            image_ids, semantic_scores = self.faiss_searcher.search(query_embedding, top_n)
+        self.metrics.inc("faiss_candidates", len(image_ids))
         logger.info(f"  Found {len(image_ids)} results from FAISS\n")
+        return image_ids, semantic_scores
+    
+    def _resolve_candidates(self, image_ids: List[int], semantic_scores: List[float], top_n: int) -> List[Dict]:
+        """
+        Deduplicate search hits and attach their metadata
         
+        Returns:
+            List of candidate image dictionaries ordered by score
+        """
         # Deduplicate: Keep best score for each image_id
         unique_results = {}
         for img_id, score in zip(image_ids, semantic_scores):
@@ -162,12 +515,14 @@ class RetrievalPipeline:
                 unique_results[img_id] = score
         
         # Sort by score and take top results
-        sorted_results = sorted(unique_results.items(), key=lambda x: x[1], reverse=True)[:self.top_n]
+        sorted_results = sorted(unique_results.items(), key=lambda x: x[1], reverse=True)[:top_n]
         unique_ids = [img_id for img_id, _ in sorted_results]
         unique_scores = [score for _, score in sorted_results]
         
-        # Get image metadata from PostgreSQL
-        images = self.postgres_reader.get_images_by_ids(unique_ids)
+        # Get image metadata (snapshot, or PostgreSQL)
+        with self.metrics.span("metadata_fetch"):
+            images, query_ms = self.metadata_store.get_images_by_ids(unique_ids)
+        logger.info(f"  Fetched metadata for {len(images)} images in {query_ms:.1f}ms\n")
         
         # Create image_id to metadata mapping
         id_to_image = {img['id']: img for img in images}
@@ -180,20 +535,87 @@ class RetrievalPipeline:
                 img_data['semantic_score'] = float(score)
                 semantic_results.append(img_data)
         
-        # STEP 4: Rerank with CLIP
-        logger.info(f"STEP 4: CLIP Reranking (Top-{self.top_k})")
+        return semantic_results
+    
+    def get_image_paths(self, results: List[Dict]) -> List[str]:
+        """
+        Construct full image paths for results
         
-        # Get image paths - construct full absolute paths
+        Args:
+            results: List of image dictionaries
+            
+        Returns:
+            List of absolute image paths
+        """
         image_paths = []
-        for img in semantic_results:
+        for img in results:
             # If path is already absolute, use it; otherwise join with dataset_dir
             img_path = img['image_path']
             if not os.path.isabs(img_path):
                 img_path = os.path.join(self.dataset_dir, img_path)
             image_paths.append(img_path)
+        return image_paths
+    
+    def search_stream(self, query: str, top_k: Optional[int] = None, top_n: Optional[int] = None,
+                      first_stage: Optional[str] = None) -> Iterator[Tuple[str, List[Dict]]]:
+        """
+        Search for fashion images, yielding results as each stage completes
+        
+        The semantic (FAISS) order is yielded as soon as candidates are resolved,
+        so callers can show results before CLIP reranking finishes. With first_stage
+        'clip' the candidates already carry the CLIP score, so reranking is skipped.
+        
+        Args:
+            query: User query (e.g., "A person in a bright yellow raincoat")
+            top_k: Number of results (search.top_k when None)
+            top_n: Number of FAISS candidates (search.top_n when None)
+            first_stage: 'text' or 'clip' (search.first_stage when None)
+            
+        Yields:
+            ('semantic', top-k results in FAISS order), then
+            ('reranked', top-k results in final order with clip_score)
+        """
+        logger.info(f"\n{'=' * 80}")
+        logger.info(f"PROCESSING QUERY: {query}")
+        logger.info(f"{'=' * 80}\n")
+        
+        # Per-call limits: the pipeline is shared between UI sessions, so its defaults are never mutated
+        top_k = top_k or self.top_k
+        first_stage = first_stage or self.first_stage
+        
+        self.metrics.inc("searches")
+        self.metrics.start_trace()
+        search_start = time.perf_counter()
+        
+        semantic_results = self.retrieve_candidates(query, top_n, first_stage)
         
-        # Rerank using original query (not normalized)
-        rerank_indices, rerank_scores = self.reranker.rerank(query, image_paths, self.top_k)
+        self.metrics.observe("first_results", time.perf_counter() - search_start)
+        preview = []
+        for img in semantic_results[:top_k]:
+            result = img.copy()
+            result['final_rank'] = len(preview) + 1
+            preview.append(result)
+        yield 'semantic', preview
+        
+        if first_stage == 'clip':
+            # The CLIP index scores are the scores CLIP reranking would compute
+            self.metrics.inc("clip_first_stage_searches")
+            rerank_indices = list(range(len(preview)))
+            rerank_scores = [img['semantic_score'] for img in preview]
+        else:
+            # STEP 4: Rerank with CLIP
+            logger.info(f"STEP 4: CLIP Reranking (Top-{top_k}, {len(self.reranker.stages)} stage(s))")
+            
+            image_paths = self.get_image_paths(semantic_results)
+            semantic_scores = [img['semantic_score'] for img in semantic_results]
+            
+            # Rerank using original query (not normalized)
+            with self.metrics.span("rerank"):
+                rerank_indices, rerank_scores, stage_timings = self.reranker.rerank(
+                    query, image_paths, top_k, prior_scores=semantic_scores
+                )
+            for stage_name, pool_size, elapsed in stage_timings:
+                logger.info(f"  Stage {stage_name}: {pool_size} candidates in {elapsed:.3f}s")
         
         # Build final results
         final_results = []
@@ -205,14 +627,55 @@ class RetrievalPipeline:
         
         logger.info(f"  Reranked to {len(final_results)} final results\n")
         
+        self.metrics.observe("search_total", time.perf_counter() - search_start)
+        timings = self.metrics.end_trace()
+        self._export_metrics()
+        logger.info("  Timings: " + ", ".join(
+            f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in timings.items()
+        ))
+        
         logger.info(f"{'=' * 80}")
         logger.info(f"✓ SEARCH COMPLETED - {len(final_results)} results returned")
         logger.info(f"{'=' * 80}\n")
         
+        yield 'reranked', final_results
+    
+    def search(self, query: str, top_k: Optional[int] = None, top_n: Optional[int] = None,
+               first_stage: Optional[str] = None) -> List[Dict]:
+        """
+        Search for fashion images matching the query
+        
+        Args:
+            query: User query (e.g., "A person in a bright yellow raincoat")
+            top_k: Number of results (search.top_k when None)
+            top_n: Number of FAISS candidates (search.top_n when None)
+            first_stage: 'text' or 'clip' (search.first_stage when None)
+            
+        Returns:
+            List of result dictionaries with image info and scores
+        """
+        final_results = []
+        for _, final_results in self.search_stream(query, top_k, top_n, first_stage):
+            pass
         return final_results
     
+    def _export_metrics(self):
+        """Dump metrics JSON every `metrics.json_interval` searches when configured"""
+        if not self.metrics_json_path:
+            return
+        searches = self.metrics.counters.get("searches", 0)
+        if searches % self.metrics_json_interval == 0:
+            self.metrics.dump_json(os.path.join(os.path.dirname(__file__), self.metrics_json_path))
+    
     def close(self):
         """Close pipeline resources"""
+        if self.index_watcher is not None:
+            self.index_watcher.stop()
+        if self.metrics_json_path:
+            self.metrics.dump_json(os.path.join(os.path.dirname(__file__), self.metrics_json_path))
+        self.metrics.stop_http_server()
+        if isinstance(self.faiss_searcher, ShardedFAISSSearcher):
+            self.faiss_searcher.close()
         self.postgres_reader.close()
 
 
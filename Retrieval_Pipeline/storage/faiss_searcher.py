@@ -5,18 +5,21 @@ import faiss
 import numpy as np
 from typing import List, Tuple
 import os
+import json
 
 
 class FAISSSearcher:
     """FAISS searcher for semantic similarity search"""
     
-    def __init__(self, index_path: str, ids_path: str):
+    def __init__(self, index_path: str, ids_path: str, rescore_factor: int = 0):
         """
         Initialize FAISS searcher
         
         Args:
             index_path: Path to FAISS index file
             ids_path: Path to image IDs numpy file
+            rescore_factor: For compressed or reduced indexes, fetch top_n * rescore_factor candidates
+                            and rescore them exactly with the raw float32 vectors (0 disables)
         """
         if not os.path.exists(index_path):
             raise FileNotFoundError(f"FAISS index not found at {index_path}")
@@ -27,9 +30,51 @@ class FAISSSearcher:
         print(f"Loading FAISS index from {index_path}...")
         self.index = faiss.read_index(index_path)
         self.image_ids = np.load(ids_path, allow_pickle=True)
+        # The indexing pipeline replaces the ids before the index, so they can only run ahead of it
+        if self.index.ntotal > len(self.image_ids):
+            raise ValueError(f"FAISS index has {self.index.ntotal} vectors but only {len(self.image_ids)} "
+                             f"image IDs at {ids_path}")
         
-        print(f"✓ Loaded FAISS index with {self.index.ntotal} vectors")
+        # Version written by the indexing pipeline (None for indexes saved without a manifest)
+        self.version = None
+        self.index_type = "IndexFlatIP"
+        self.embedding_dim = self.index.d
+        self.reduction_method = "none"
+        manifest_path = index_path.replace('.bin', '_manifest.json')
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            self.version = manifest.get('version')
+            self.index_type = manifest.get('index_type', self.index_type)
+            self.embedding_dim = manifest.get('embedding_dim', self.embedding_dim)
+            self.reduction_method = manifest.get('reduction', {}).get('method', 'none')
+        
+        # Dimensionality reduction applied to queries (the index holds reduced vectors)
+        self.transform = None
+        if self.reduction_method == 'pca':
+            self.transform = faiss.read_VectorTransform(index_path.replace('.bin', '_pca.bin'))
+        
+        # Raw float32 vectors for exact rescoring, memory-mapped (pages are read on demand)
+        self.raw_vectors = None
+        self.rescore_factor = 0
+        vectors_path = index_path.replace('.bin', '_vectors.f32')
+        exact = self.index_type == "IndexFlatIP" and self.reduction_method == 'none'
+        if rescore_factor > 0 and not exact and os.path.exists(vectors_path):
+            dim = self.embedding_dim
+            rows = min(os.path.getsize(vectors_path) // (4 * dim), len(self.image_ids))
+            if rows >= self.index.ntotal:
+                self.raw_vectors = np.memmap(vectors_path, dtype='float32', mode='r', shape=(rows, dim))
+                self.rescore_factor = rescore_factor
+            else:
+                # Rows past the end of the file could not be rescored; search the index alone
+                print(f"✗ {vectors_path} has {rows} rows for {self.index.ntotal} vectors, rescoring disabled")
+        
+        print(f"✓ Loaded {self.index_type} FAISS index with {self.index.ntotal} vectors (version {self.version})")
+        if self.reduction_method != 'none':
+            print(f"✓ Queries reduced {self.embedding_dim} -> {self.index.d} dims ({self.reduction_method})")
         print(f"✓ Loaded {len(self.image_ids)} image IDs")
+        if self.raw_vectors is not None:
+            print(f"✓ Exact rescoring of top_n x {self.rescore_factor} candidates from {vectors_path}")
     
     def search(self, query_embedding: np.ndarray, top_n: int = 20) -> Tuple[List[int], List[float]]:
         """
@@ -50,10 +95,57 @@ class FAISSSearcher:
         query_embedding = query_embedding.astype('float32')
         
         # Search
-        scores, indices = self.index.search(query_embedding, top_n)
+        if self.raw_vectors is not None:
+            return self._search_rescored(query_embedding, top_n)
+        scores, indices = self.index.search(self.reduce(query_embedding), top_n)
+        
+        # Get image IDs (FAISS pads with -1 when the index has fewer than top_n vectors)
+        result_ids = [int(self.image_ids[idx]) for idx in indices[0] if idx >= 0]
+        result_scores = [float(score) for idx, score in zip(indices[0], scores[0]) if idx >= 0]
+        
+        return result_ids, result_scores
+    
+    def reduce(self, query_embedding: np.ndarray) -> np.ndarray:
+        """
+        Project a query to the index dimension, as the indexing pipeline did for the vectors
+        
+        Args:
+            query_embedding: Query embedding (1, embedding_dim), float32
+            
+        Returns:
+            Query embedding (1, index dim), float32
+        """
+        if self.reduction_method == 'none':
+            return query_embedding
+        if self.transform is not None:
+            reduced = self.transform.apply_py(np.ascontiguousarray(query_embedding))
+        else:
+            reduced = np.ascontiguousarray(query_embedding[:, :self.index.d])
+        reduced = reduced / np.maximum(np.linalg.norm(reduced, axis=1, keepdims=True), 1e-12)
+        return reduced.astype('float32')
+    
+    def _search_rescored(self, query_embedding: np.ndarray, top_n: int) -> Tuple[List[int], List[float]]:
+        """
+        Search the compressed / reduced index for a larger candidate set, then rank it by exact
+        full-dimension inner product
+        
+        Args:
+            query_embedding: Query embedding (1, dim), float32
+            top_n: Number of top results to return
+            
+        Returns:
+            Tuple of (image_ids, similarity_scores)
+        """
+        _, indices = self.index.search(self.reduce(query_embedding), top_n * self.rescore_factor)
+        candidates = indices[0][(indices[0] >= 0) & (indices[0] < len(self.raw_vectors))]
+        if len(candidates) == 0:
+            return [], []
         
-        # Get image IDs
-        result_ids = [int(self.image_ids[idx]) for idx in indices[0]]
-        result_scores = scores[0].tolist()
+        # Sorted row order keeps the mmap reads sequential
+        candidates = np.sort(candidates)
+        exact_scores = self.raw_vectors[candidates] @ query_embedding[0]
+        best = np.argsort(-exact_scores)[:top_n]
         
+        result_ids = [int(self.image_ids[idx]) for idx in candidates[best]]
+        result_scores = exact_scores[best].tolist()
         return result_ids, result_scores
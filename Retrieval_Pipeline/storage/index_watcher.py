@@ -0,0 +1,85 @@
+"""
+Background watcher for newly published FAISS index versions
+"""
+import json
+import threading
+from typing import Callable, Optional
+
+
+def read_manifest_version(manifest_path: str) -> Optional[str]:
+    """
+    Version of the index currently published on disk
+
+    Args:
+        manifest_path: Index manifest or shards manifest path
+
+    Returns:
+        Version id, or None when the manifest is missing or being replaced
+    """
+    try:
+        with open(manifest_path, 'r') as f:
+            return json.load(f).get('version')
+    except (OSError, ValueError):
+        return None
+
+
+class IndexWatcher:
+    """Poll an index manifest and hand new versions to a reload callback"""
+
+    def __init__(self, manifest_path: str, current_version: Optional[str],
+                 on_new_version: Callable[[str], bool], poll_interval: float = 10.0):
+        """
+        Initialize watcher
+
+        Args:
+            manifest_path: Manifest whose version is polled
+            current_version: Version already loaded
+            on_new_version: Called with the new version from the watcher thread; returns
+                            True once the version is live, False to retry on the next poll
+            poll_interval: Seconds between polls
+        """
+        self.manifest_path = manifest_path
+        self.current_version = current_version
+        self.on_new_version = on_new_version
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self) -> bool:
+        """
+        Poll once
+
+        Returns:
+            True if a new version was loaded
+        """
+        version = read_manifest_version(self.manifest_path)
+        if version is None or version == self.current_version:
+            return False
+        if not self.on_new_version(version):
+            return False
+        self.current_version = version
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception as e:
+                # Keep serving the loaded index; retry on the next poll
+                print(f"❌ Index reload failed: {e}")
+
+    def start(self):
+        """Start polling in a daemon thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="index-watcher", daemon=True)
+        self._thread.start()
+        print(f"✓ Watching {self.manifest_path} for new index versions every {self.poll_interval}s")
+
+    def stop(self):
+        """Stop polling"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+            self._thread = None
@@ -0,0 +1,131 @@
+"""
+Snapshot-backed metadata store
+"""
+import os
+import time
+import threading
+import importlib.util
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+
+# Import snapshot format from indexing pipeline
+indexing_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../Indexing_Pipeline'))
+snapshot_path = os.path.join(indexing_dir, 'storage', 'metadata_snapshot.py')
+
+spec = importlib.util.spec_from_file_location("metadata_snapshot", snapshot_path)
+snapshot_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(snapshot_module)
+MetadataSnapshot = snapshot_module.MetadataSnapshot
+
+
+class SnapshotMetadataStore:
+    """Resolve image metadata from the in-process snapshot, with optional PostgreSQL fallback"""
+
+    def __init__(self, snapshot_path: str, postgres_reader=None, metrics=None):
+        """
+        Initialize metadata store
+
+        Args:
+            snapshot_path: Path to the snapshot exported by the indexing pipeline
+            postgres_reader: Optional PostgresReader used for ids missing from the
+                             snapshot and for incremental refreshes
+            metrics: Optional MetricsRegistry counting snapshot hits and misses
+        """
+        if not os.path.exists(snapshot_path):
+            raise FileNotFoundError(f"Metadata snapshot not found at {snapshot_path}")
+
+        self.snapshot_path = snapshot_path
+        self.postgres_reader = postgres_reader
+        self.snapshot = MetadataSnapshot.load(snapshot_path)
+        self._refresh_lock = threading.Lock()
+        self.metrics = metrics
+
+        print(f"✓ Loaded metadata snapshot with {len(self.snapshot)} rows "
+              f"(index version {self.snapshot.index_version or 'unknown'})")
+
+    @property
+    def index_version(self) -> str:
+        """Version of the FAISS index the snapshot belongs to"""
+        return self.snapshot.index_version
+
+    def refresh(self, index_version: Optional[str] = None) -> int:
+        """
+        Pull rows created since the newest snapshot row from PostgreSQL
+
+        Args:
+            index_version: Index version to tag the refreshed snapshot with
+
+        Returns:
+            Number of rows fetched
+        """
+        if self.postgres_reader is None:
+            return 0
+
+        with self._refresh_lock:
+            last_created_at = self.snapshot.max_created_at()
+            since = datetime.fromtimestamp(last_created_at) if last_created_at is not None else None
+            records = self.postgres_reader.get_records_since(since)
+            # Swap in a new snapshot object so concurrent lookups see old or new, never partial
+            self.snapshot = self.snapshot.merge(records, index_version=index_version)
+
+        print(f"✓ Refreshed metadata snapshot with {len(records)} rows from PostgreSQL")
+        return len(records)
+
+    def load_snapshot(self, index_version: str) -> Optional[MetadataSnapshot]:
+        """
+        Load the snapshot file for a new index version without swapping it in
+
+        Args:
+            index_version: Version of the newly published FAISS index
+
+        Returns:
+            New MetadataSnapshot, or None when the file belongs to another index version
+            and there is no PostgreSQL fallback to catch up from
+        """
+        snapshot = MetadataSnapshot.load(self.snapshot_path)
+        if snapshot.index_version == index_version:
+            return snapshot
+        if self.postgres_reader is None:
+            return None
+
+        last_created_at = snapshot.max_created_at()
+        since = datetime.fromtimestamp(last_created_at) if last_created_at is not None else None
+        return snapshot.merge(self.postgres_reader.get_records_since(since), index_version=index_version)
+
+    def swap(self, snapshot: MetadataSnapshot):
+        """
+        Replace the snapshot used for lookups
+
+        Args:
+            snapshot: Snapshot returned by load_snapshot
+        """
+        with self._refresh_lock:
+            self.snapshot = snapshot
+
+    def get_images_by_ids(self, image_ids: List[int]) -> Tuple[List[Dict], float]:
+        """
+        Retrieve image metadata by IDs
+
+        Args:
+            image_ids: List of image IDs
+
+        Returns:
+            Tuple of (list of dictionaries with image metadata, lookup time in ms)
+        """
+        start = time.perf_counter()
+
+        images, missing = self.snapshot.get_images_by_ids(image_ids)
+        if self.metrics is not None:
+            self.metrics.inc("metadata_snapshot_hits", len(images))
+            self.metrics.inc("metadata_snapshot_misses", len(missing))
+
+        # Rows indexed after the snapshot was exported
+        if missing and self.postgres_reader is not None:
+            images.extend(self.postgres_reader.get_images_by_ids(missing)[0])
+
+        return images, (time.perf_counter() - start) * 1000
+
+    def close(self):
+        """Close the PostgreSQL fallback, if any"""
+        if self.postgres_reader is not None:
+            self.postgres_reader.close()
@@ -1,8 +1,16 @@
 """
 PostgreSQL Reader
 """
+import threading
+import time
+import weakref
 import psycopg2
-from typing import List, Dict, Optional
+from psycopg2 import pool
+from typing import List, Dict, Optional, Tuple
+
+
+# Name of the server-side prepared statement used for metadata lookups
+GET_IMAGES_STATEMENT = "fashion_get_images_by_ids"
 
 
 class PostgresReader:
@@ -14,26 +22,128 @@ class PostgresReader:
         
         Args:
             config: Database configuration dictionary
+                    (optional keys: min_connections, max_connections, connect_timeout)
         """
         self.config = config
-        self.conn = None
+        self.min_connections = config.get('min_connections', 1)
+        self.max_connections = config.get('max_connections', 8)
+        self.pool = None
+        self._pool_lock = threading.Lock()
+        # getconn raises PoolError when every connection is out; callers wait here instead
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+        # Connections that already have the prepared statement (the pool closes surplus ones)
+        self._prepared = weakref.WeakSet()
+        self._prepared_lock = threading.Lock()
     
     def connect(self):
-        """Connect to PostgreSQL database"""
+        """Create the PostgreSQL connection pool"""
+        with self._pool_lock:
+            if self.pool is not None:
+                return
+            try:
+                self.pool = pool.ThreadedConnectionPool(
+                    self.min_connections,
+                    self.max_connections,
+                    host=self.config['host'],
+                    port=self.config['port'],
+                    dbname=self.config['dbname'],
+                    user=self.config['user'],
+                    password=self.config['password'],
+                    connect_timeout=self.config.get('connect_timeout', 5)
+                )
+                print(f"✓ Connected to PostgreSQL database "
+                      f"(pool {self.min_connections}-{self.max_connections} connections)")
+            except Exception as e:
+                print(f"✗ Failed to connect to database: {e}")
+                raise
+    
+    def _prepare(self, conn):
+        """
+        Prepare the metadata lookup statement on a connection (once per connection)
+        
+        Args:
+            conn: Pooled psycopg2 connection
+        """
+        with self._prepared_lock:
+            if conn in self._prepared:
+                return
+        
+        with conn.cursor() as cursor:
+            cursor.execute(f"""
+                PREPARE {GET_IMAGES_STATEMENT} (int[]) AS
+                SELECT image_id, image_path, normalized_text, created_at
+                FROM {self.config['table_name']}
+                WHERE image_id = ANY($1)
+            """)
+        conn.commit()
+        
+        with self._prepared_lock:
+            self._prepared.add(conn)
+    
+    def _discard(self, conn):
+        """Drop a broken connection from the pool"""
+        with self._prepared_lock:
+            self._prepared.discard(conn)
+        try:
+            self.pool.putconn(conn, close=True)
+        except Exception:
+            pass
+    
+    def health_check(self) -> bool:
+        """
+        Check that the database answers a trivial query
+        
+        Returns:
+            True if a pooled connection is usable
+        """
         try:
-            self.conn = psycopg2.connect(
-                host=self.config['host'],
-                port=self.config['port'],
-                dbname=self.config['dbname'],
-                user=self.config['user'],
-                password=self.config['password']
-            )
-            print("✓ Connected to PostgreSQL database")
-        except Exception as e:
-            print(f"✗ Failed to connect to database: {e}")
-            raise
+            self._run(lambda cursor: cursor.execute("SELECT 1"))
+            return True
+        except psycopg2.Error:
+            return False
+    
+    def _run(self, work, retries: int = 1):
+        """
+        Run work(cursor) on a pooled connection, reconnecting after a dropped connection
+        
+        Blocks while all max_connections connections are in use. Failing to connect
+        counts as a connection error and is retried as well.
+        
+        Args:
+            work: Callable receiving a cursor and returning a result
+            retries: Number of retries on a fresh connection after a connection error
+        
+        Returns:
+            Result of work
+        """
+        if self.pool is None:
+            self.connect()
+        
+        with self._slots:
+            for attempt in range(retries + 1):
+                conn = None
+                try:
+                    conn = self.pool.getconn()
+                    self._prepare(conn)
+                    with conn.cursor() as cursor:
+                        result = work(cursor)
+                    conn.commit()
+                    self.pool.putconn(conn)
+                    return result
+                except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                    # Server restarted or connection dropped: throw the connection away and retry
+                    if conn is not None:
+                        self._discard(conn)
+                    if attempt >= retries:
+                        raise
+                    print(f"✗ Lost database connection ({e}), reconnecting...")
+                except Exception:
+                    if conn is not None:
+                        conn.rollback()
+                        self.pool.putconn(conn)
+                    raise
     
-    def get_images_by_ids(self, image_ids: List[int]) -> List[Dict]:
+    def get_images_by_ids(self, image_ids: List[int]) -> Tuple[List[Dict], float]:
         """
         Retrieve image metadata by IDs
         
@@ -41,22 +151,19 @@ class PostgresReader:
             image_ids: List of image IDs
             
         Returns:
-            List of dictionaries with image metadata
+            Tuple of (list of dictionaries with image metadata, lookup time in ms)
         """
-        if not self.conn:
-            self.connect()
+        if not image_ids:
+            return [], 0.0
         
-        cursor = self.conn.cursor()
+        start = time.perf_counter()
         
-        # Query for images
-        query = f"""
-            SELECT image_id, image_path, normalized_text, created_at
-            FROM {self.config['table_name']}
-            WHERE image_id = ANY(%s)
-        """
+        def fetch(cursor):
+            cursor.execute(f"EXECUTE {GET_IMAGES_STATEMENT} (%s)", ([int(i) for i in image_ids],))
+            return cursor.fetchall()
         
-        cursor.execute(query, (image_ids,))
-        results = cursor.fetchall()
+        results = self._run(fetch)
+        query_ms = (time.perf_counter() - start) * 1000
         
         # Convert to list of dicts
         images = []
@@ -68,11 +175,38 @@ class PostgresReader:
                 'created_at': row[3]
             })
         
-        cursor.close()
-        return images
+        return images, query_ms
+    
+    def get_records_since(self, created_after=None) -> List[tuple]:
+        """
+        Retrieve metadata rows created at or after a timestamp
+        
+        Args:
+            created_after: Lower bound for created_at (None returns every row)
+        
+        Returns:
+            List of (image_id, image_path, normalized_text, created_at) tuples
+        """
+        query = f"""
+            SELECT image_id, image_path, normalized_text, created_at
+            FROM {self.config['table_name']}
+        """
+        
+        def fetch(cursor):
+            if created_after is None:
+                cursor.execute(query)
+            else:
+                cursor.execute(query + " WHERE created_at >= %s", (created_after,))
+            return cursor.fetchall()
+        
+        return self._run(fetch)
     
     def close(self):
-        """Close database connection"""
-        if self.conn:
-            self.conn.close()
-            print("✓ Database connection closed")
+        """Close all pooled database connections"""
+        with self._pool_lock:
+            if self.pool is not None:
+                self.pool.closeall()
+                self.pool = None
+                with self._prepared_lock:
+                    self._prepared.clear()
+                print("✓ Database connection closed")
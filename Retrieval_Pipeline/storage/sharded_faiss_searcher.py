@@ -0,0 +1,130 @@
+"""
+Fan-out search over a sharded FAISS index
+"""
+import heapq
+import json
+import os
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+import numpy as np
+
+# Import single-index searcher
+current_dir = os.path.dirname(os.path.abspath(__file__))
+spec = importlib.util.spec_from_file_location("faiss_searcher", os.path.join(current_dir, 'faiss_searcher.py'))
+faiss_searcher_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(faiss_searcher_module)
+FAISSSearcher = faiss_searcher_module.FAISSSearcher
+
+
+class ShardedFAISSSearcher:
+    """Search every shard in parallel and merge the top-N results"""
+
+    def __init__(self, manifest_path: str, search_threads: int = 4, rescore_factor: int = 0):
+        """
+        Initialize sharded searcher
+
+        Args:
+            manifest_path: Path to the shards manifest written by ShardedFAISSWriter
+            search_threads: Threads used to search shards concurrently (FAISS releases the GIL)
+            rescore_factor: Exact rescoring factor passed to every shard (see FAISSSearcher)
+        """
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"FAISS shards manifest not found at {manifest_path}")
+
+        self.manifest_path = manifest_path
+        self.manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+        self.shards: Dict[int, FAISSSearcher] = {}
+        self.version = None
+        self.rescore_factor = rescore_factor
+        self._pool = ThreadPoolExecutor(max_workers=search_threads, thread_name_prefix="faiss-shard")
+
+        self.reload()
+
+    @property
+    def ntotal(self) -> int:
+        """Number of vectors over all shards"""
+        return sum(shard.index.ntotal for shard in self.shards.values())
+
+    def reload(self) -> List[int]:
+        """
+        Re-read the shards manifest and swap in the shards whose version changed
+
+        Returns:
+            Ids of the shards that were (re)loaded or removed
+        """
+        shards, version, changed = self.load_shards()
+        self.swap_shards(shards, version)
+        return changed
+
+    def load_shards(self) -> Tuple[Dict[int, FAISSSearcher], str, List[int]]:
+        """
+        Re-read the shards manifest and load shards whose version changed, without serving them
+
+        Returns:
+            (shard map for swap_shards, manifest version, ids of the shards that were (re)loaded or removed)
+        """
+        with open(self.manifest_path, 'r') as f:
+            manifest = json.load(f)
+
+        shards = {}
+        changed = []
+        for entry in manifest['shards']:
+            shard_id = entry['shard_id']
+            current = self.shards.get(shard_id)
+            if current is not None and current.version is not None and current.version == entry.get('version'):
+                shards[shard_id] = current
+                continue
+            shards[shard_id] = FAISSSearcher(
+                os.path.join(self.manifest_dir, entry['index_path']),
+                os.path.join(self.manifest_dir, entry['ids_path']),
+                rescore_factor=self.rescore_factor
+            )
+            changed.append(shard_id)
+
+        changed.extend(shard_id for shard_id in self.shards if shard_id not in shards)
+        return shards, manifest.get('version'), changed
+
+    def swap_shards(self, shards: Dict[int, FAISSSearcher], version: str):
+        """
+        Serve shards returned by load_shards
+
+        The shard map is replaced in one assignment, so searches running
+        concurrently use either the old or the new set of shards.
+
+        Args:
+            shards: Shard map returned by load_shards
+            version: Manifest version it was loaded from
+        """
+        self.shards = shards
+        self.version = version
+
+        print(f"✓ Sharded FAISS index version {self.version}: {len(shards)} shards, {self.ntotal} vectors")
+
+    def search(self, query_embedding: np.ndarray, top_n: int = 20) -> Tuple[List[int], List[float]]:
+        """
+        Search all shards and merge
+
+        Args:
+            query_embedding: Query embedding vector (1, dim)
+            top_n: Number of top results to return
+
+        Returns:
+            Tuple of (image_ids, similarity_scores) sorted by score
+        """
+        shards = list(self.shards.values())
+        if len(shards) == 1:
+            return shards[0].search(query_embedding, top_n)
+
+        per_shard = self._pool.map(lambda shard: shard.search(query_embedding, top_n), shards)
+        candidates = (
+            (score, image_id)
+            for image_ids, scores in per_shard
+            for image_id, score in zip(image_ids, scores)
+        )
+        best = heapq.nlargest(top_n, candidates)
+        return [image_id for _, image_id in best], [score for score, _ in best]
+
+    def close(self):
+        """Stop the search thread pool"""
+        self._pool.shutdown(wait=False)
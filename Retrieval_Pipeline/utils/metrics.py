@@ -0,0 +1,244 @@
+"""
+Latency metrics for the retrieval pipeline
+
+Usage:
+    metrics = MetricsRegistry()
+    with metrics.span("faiss_search"):
+        ...
+    metrics.inc("faiss_candidates", len(ids))
+    print(metrics.to_prometheus())
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+
+# Prefix for every exported metric name
+METRIC_PREFIX = "fashion_search"
+
+# Quantiles reported for every stage
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def get_rss_bytes() -> Optional[int]:
+    """
+    Current resident set size of this process
+
+    Returns:
+        RSS in bytes, or None where /proc is not available
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class Histogram:
+    """Latency histogram keeping a bounded window of recent samples"""
+
+    def __init__(self, max_samples: int = 2048):
+        """
+        Initialize histogram
+
+        Args:
+            max_samples: Number of most recent samples used for quantiles
+        """
+        self.samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        """Record one sample"""
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Nearest-rank quantile over the sample window"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        rank = min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))
+        return ordered[rank]
+
+    def summary(self) -> Dict:
+        """Count, sum, max and quantiles as a dictionary"""
+        result = {'count': self.count, 'sum': self.total, 'max': self.max}
+        for q in QUANTILES:
+            result[f"p{int(q * 100)}"] = self.quantile(q)
+        return result
+
+
+class MetricsRegistry:
+    """Thread-safe registry of stage timings and counters"""
+
+    def __init__(self, max_samples: int = 2048):
+        """
+        Initialize registry
+
+        Args:
+            max_samples: Sample window per histogram
+        """
+        self.max_samples = max_samples
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._server = None
+
+    @contextmanager
+    def span(self, name: str):
+        """
+        Time a block of code as a stage
+
+        Args:
+            name: Stage name (e.g. "normalize", "rerank.image_decode")
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name: str, seconds: float):
+        """
+        Record a stage duration
+
+        Args:
+            name: Stage name
+            seconds: Duration in seconds
+        """
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self.max_samples)
+            histogram.observe(seconds)
+
+        trace = getattr(self._local, 'trace', None)
+        if trace is not None:
+            trace[name] = trace.get(name, 0.0) + seconds
+
+    def inc(self, name: str, value: float = 1):
+        """
+        Increment a counter
+
+        Args:
+            name: Counter name
+            value: Amount to add
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def start_trace(self):
+        """Start collecting the stage timings of the current request (per thread)"""
+        self._local.trace = {}
+
+    def end_trace(self) -> Dict[str, float]:
+        """
+        Stop collecting stage timings for the current request
+
+        Returns:
+            Mapping of stage name to seconds spent in it
+        """
+        trace = getattr(self._local, 'trace', None) or {}
+        self._local.trace = None
+        return trace
+
+    def snapshot(self) -> Dict:
+        """All counters and histogram summaries as a dictionary"""
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'stages': {name: hist.summary() for name, hist in self.histograms.items()},
+                'timestamp': time.time(),
+            }
+
+    def to_json(self) -> str:
+        """Metrics as a JSON document"""
+        return json.dumps(self.snapshot(), indent=2)
+
+    def dump_json(self, path: str):
+        """
+        Write metrics JSON atomically
+
+        Args:
+            path: Output file path
+        """
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_json())
+        os.replace(tmp_path, path)
+
+    def to_prometheus(self) -> str:
+        """Metrics in Prometheus text exposition format"""
+        data = self.snapshot()
+        lines = [
+            f"# HELP {METRIC_PREFIX}_stage_seconds Time spent per retrieval stage",
+            f"# TYPE {METRIC_PREFIX}_stage_seconds summary",
+        ]
+        for stage, summary in sorted(data['stages'].items()):
+            for q in QUANTILES:
+                value = summary[f"p{int(q * 100)}"]
+                lines.append(f'{METRIC_PREFIX}_stage_seconds{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'{METRIC_PREFIX}_stage_seconds_sum{{stage="{stage}"}} {summary["sum"]:.6f}')
+            lines.append(f'{METRIC_PREFIX}_stage_seconds_count{{stage="{stage}"}} {summary["count"]}')
+
+        for name, value in sorted(data['counters'].items()):
+            metric = f"{METRIC_PREFIX}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port: int, host: str = "127.0.0.1"):
+        """
+        Serve /metrics (Prometheus) and /metrics.json on a background thread
+
+        Args:
+            port: Local port to listen on
+            host: Interface to bind (localhost by default)
+        """
+        if self._server is not None:
+            return
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body, content_type = registry.to_prometheus(), 'text/plain; version=0.0.4'
+                elif self.path == '/metrics.json':
+                    body, content_type = registry.to_json(), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                payload = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                # Keep scrapes out of the console
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        thread.start()
+
+    def stop_http_server(self):
+        """Stop the metrics HTTP server if running"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
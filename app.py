@@ -36,49 +36,67 @@ st.set_page_config(
 apply_custom_css()
 
 
+CONFIG_PATH = os.path.join(current_dir, 'Retrieval_Pipeline', 'config', 'retrieval.yaml')
+
+
 @st.cache_resource
 def load_pipeline():
     """Load retrieval pipeline (cached)"""
-    config_path = os.path.join(current_dir, 'Retrieval_Pipeline', 'config', 'retrieval.yaml')
-    pipeline = RetrievalPipeline(config_path)
+    pipeline = RetrievalPipeline(CONFIG_PATH)
     return pipeline
 
 
+@st.cache_data(show_spinner=False)
+def load_config(config_mtime):
+    """Load retrieval config (cached, re-read only when the file's mtime changes)"""
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
 def main():
     # Header
     render_header()
     
     # Load config
-    config_path = os.path.join(current_dir, 'Retrieval_Pipeline', 'config', 'retrieval.yaml')
-    with open(config_path, 'r', encoding='utf-8') as f:
-        config = yaml.safe_load(f)
+    config = load_config(os.path.getmtime(CONFIG_PATH))
     
-    # Sidebar with settings
-    top_k = render_sidebar(config, config_path)
+    # Sidebar with settings (per session)
+    top_k, first_stage = render_sidebar(config)
     
     # Search section
     query, search_button = render_search_box()
     
+    dataset_dir = os.path.join(current_dir, 'Dataset')
+    results_per_row = config['ui']['results_per_row']
+    thumbnail_size = config['ui'].get('thumbnail_size', 320)
+    streamed = False
+    
     # Search execution
     if search_button or (query and 'last_query' in st.session_state and st.session_state.last_query != query):
         if query.strip():
             st.session_state.last_query = query
             
-            with st.spinner("🔄 Searching... This may take a few seconds..."):
+            # Semantic results are drawn here first, then replaced in place by the reranked order
+            results_placeholder = st.empty()
+            
+            with st.spinner("🔄 Searching..."):
                 try:
                     # Load pipeline
                     pipeline = load_pipeline()
                     
-                    # Update search parameters
-                    pipeline.top_n = config['search']['top_n']  # Use config value for top_n
-                    pipeline.top_k = top_k
-                    
-                    # Perform search
-                    results = pipeline.search(query)
-                    
-                    # Store results in session state
-                    st.session_state.results = results
-                    st.session_state.query = query
+                    # Perform search with this session's settings, rendering each stage as it completes
+                    for stage, results in pipeline.search_stream(query, top_k=top_k,
+                                                                 top_n=config['search']['top_n'],
+                                                                 first_stage=first_stage):
+                        # Store results in session state
+                        st.session_state.results = results
+                        st.session_state.query = query
+                        
+                        if results:
+                            with results_placeholder.container():
+                                render_results(results, query, dataset_dir, results_per_row,
+                                               refining=(stage == 'semantic'), thumbnail_size=thumbnail_size)
+                            streamed = True
                     
                 except Exception as e:
                     st.error(f"❌ Error during search: {str(e)}")
@@ -88,10 +106,9 @@ def main():
     
     # Display results
     if 'results' in st.session_state and st.session_state.results:
-        dataset_dir = os.path.join(current_dir, 'Dataset')
-        results_per_row = config['ui']['results_per_row']
-        
-        render_results(st.session_state.results, st.session_state.query, dataset_dir, results_per_row)
+        if not streamed:
+            render_results(st.session_state.results, st.session_state.query, dataset_dir, results_per_row,
+                           thumbnail_size=thumbnail_size)
         render_export_button(st.session_state.results, st.session_state.query)
     
     elif 'results' in st.session_state and not st.session_state.results:
@@ -99,8 +116,7 @@ def main():
     
     else:
         # Welcome message
-        dataset_dir = os.path.join(current_dir, 'Dataset')
-        render_welcome_message(dataset_dir)
+        render_welcome_message(dataset_dir, thumbnail_size)
 
 
 if __name__== "__main__":
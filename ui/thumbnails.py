@@ -0,0 +1,70 @@
+"""
+Server-side thumbnails for the Streamlit UI
+
+Result images are downscaled once into static/thumbnails/ and served by
+Streamlit's static file server (server.enableStaticServing in
+.streamlit/config.toml), so the browser fetches small cached JPEGs by URL
+instead of receiving full-resolution images over the websocket on every rerun.
+"""
+import hashlib
+import os
+import tempfile
+from PIL import Image
+
+# Streamlit serves <app dir>/static at /app/static
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+THUMBNAIL_DIR = os.path.join(STATIC_DIR, 'thumbnails')
+THUMBNAIL_URL_PREFIX = "app/static/thumbnails"
+
+DEFAULT_THUMBNAIL_SIZE = 320
+
+
+def thumbnail_name(image_path: str, size: int) -> str:
+    """
+    File name of the thumbnail for an image
+
+    The name includes the image's modification time, so a replaced image gets a new thumbnail.
+
+    Args:
+        image_path: Source image path
+        size: Longest thumbnail side in pixels
+
+    Returns:
+        Thumbnail file name
+    """
+    mtime = os.path.getmtime(image_path)
+    key = f"{os.path.abspath(image_path)}:{mtime}:{size}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest() + ".jpg"
+
+
+def get_thumbnail_url(image_path: str, size: int = DEFAULT_THUMBNAIL_SIZE) -> str:
+    """
+    Create the thumbnail if needed and return its URL
+
+    Args:
+        image_path: Source image path
+        size: Longest thumbnail side in pixels
+
+    Returns:
+        URL of the thumbnail relative to the app root
+    """
+    name = thumbnail_name(image_path, size)
+    thumbnail_path = os.path.join(THUMBNAIL_DIR, name)
+
+    if not os.path.exists(thumbnail_path):
+        os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+        # Write a uniquely named file then rename it: sessions are threads of one process,
+        # so two of them may render the same thumbnail at once
+        fd, tmp_path = tempfile.mkstemp(dir=THUMBNAIL_DIR, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f, Image.open(image_path) as img:
+                img = img.convert('RGB')
+                img.thumbnail((size, size))
+                img.save(f, format='JPEG', quality=85)
+            os.replace(tmp_path, thumbnail_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    return f"{THUMBNAIL_URL_PREFIX}/{name}"
@@ -2,7 +2,9 @@
 UI Components for Fashion Search Engine
 Separate file for styling and layout components
 """
+import os
 import streamlit as st
+from ui.thumbnails import get_thumbnail_url, DEFAULT_THUMBNAIL_SIZE
 
 
 def apply_custom_css():
@@ -182,29 +184,48 @@ def render_header():
     st.markdown('<div class="sub-header">Discover your perfect style with AI-powered visual search</div>', unsafe_allow_html=True)
 
 
-def render_sidebar(config, config_path):
-    """Render the sidebar with settings"""
+def render_sidebar(config):
+    """
+    Render the sidebar with settings
+    
+    Settings live in the user's session (st.session_state), the config file is never written.
+    
+    Returns:
+        (top_k, first_stage)
+    """
     with st.sidebar:
         st.markdown("### ⚙️ Configuration")
         st.markdown("---")
         
-        # Results slider
+        # Results slider (per session, defaults to search.top_k)
+        if 'top_k' not in st.session_state:
+            st.session_state.top_k = config['search']['top_k']
+        
         st.markdown("**📊 Number of Results**")
         top_k = st.slider(
             "Results to Display",
             min_value=1,
             max_value=20,
-            value=config['search']['top_k'],
             step=1,
+            key="top_k",
             label_visibility="collapsed"
         )
         
-        # Update config if changed
-        if top_k != config['search']['top_k']:
-            import yaml
-            config['search']['top_k'] = top_k
-            with open(config_path, 'w', encoding='utf-8') as f:
-                yaml.dump(config, f)
+        # Search mode (per session, defaults to search.first_stage; clip needs the CLIP image index)
+        first_stage = config['search'].get('first_stage', 'text')
+        if config['database'].get('clip_index', {}).get('enabled', False):
+            if 'first_stage' not in st.session_state:
+                st.session_state.first_stage = first_stage
+            
+            st.markdown("---")
+            st.markdown("**⚡ Search Mode**")
+            first_stage = st.radio(
+                "Search Mode",
+                options=["text", "clip"],
+                format_func=lambda stage: "Text + CLIP rerank" if stage == "text" else "CLIP only (fastest)",
+                key="first_stage",
+                label_visibility="collapsed"
+            )
         
         st.markdown("---")
         st.markdown("**💡 Example Queries:**")
@@ -215,7 +236,7 @@ def render_sidebar(config, config_path):
         - *Formal business attire*
         """)
         
-        return top_k
+        return top_k, first_stage
 
 
 def render_search_box():
@@ -238,15 +259,30 @@ def render_search_box():
     return query, search_button
 
 
-def render_results(results, query, dataset_dir, results_per_row):
-    """Render search results in a grid"""
-    from PIL import Image
-    import os
+def render_image(img_path, thumbnail_size=DEFAULT_THUMBNAIL_SIZE):
+    """Render an image as a thumbnail served by URL"""
+    url = get_thumbnail_url(img_path, thumbnail_size)
+    st.markdown(
+        f'<img src="{url}" style="width: 100%; border-radius: 16px;" loading="lazy">',
+        unsafe_allow_html=True
+    )
+
+
+def render_results(results, query, dataset_dir, results_per_row, refining=False,
+                   thumbnail_size=DEFAULT_THUMBNAIL_SIZE):
+    """
+    Render search results in a grid
     
+    Args:
+        refining: True while the shown (semantic) order is still being reranked
+        thumbnail_size: Longest side of the served thumbnails in pixels
+    """
     st.divider()
     
     # Results header
     st.markdown(f"### 🎯 Results for *'{query}'*")
+    if refining:
+        st.caption("⏳ Refining the order with CLIP...")
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -266,8 +302,7 @@ def render_results(results, query, dataset_dir, results_per_row):
                         img_path = result['image_path']
                         
                         try:
-                            img = Image.open(img_path)
-                            st.image(img, use_container_width=True)
+                            render_image(img_path, thumbnail_size)
                         
                         except Exception as e:
                             st.error(f"❌ Error loading image: {e}")
@@ -281,24 +316,37 @@ def render_export_button(results, query):
     pass
 
 
-def render_welcome_message(dataset_dir):
-    """Render welcome message with example images"""
-    from PIL import Image
-    import os
+@st.cache_data(ttl=3600, show_spinner=False)
+def sample_dataset_images(dataset_dir, count=5):
+    """
+    First `count` images of the dataset directory (cached, the directory is not listed per page load)
+    
+    Returns:
+        List of image file names
+    """
+    image_files = []
+    if not os.path.exists(dataset_dir):
+        return image_files
     
+    with os.scandir(dataset_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith(('.jpg', '.jpeg', '.png')):
+                image_files.append(entry.name)
+                if len(image_files) == count:
+                    break
+    return image_files
+
+
+def render_welcome_message(dataset_dir, thumbnail_size=DEFAULT_THUMBNAIL_SIZE):
+    """Render welcome message with example images"""
     # Show example images
     st.divider()
     st.subheader("📸 Example Images from Dataset")
     
-    if os.path.exists(dataset_dir):
-        image_files = [f for f in os.listdir(dataset_dir) if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
-        
-        if image_files:
-            cols = st.columns(min(5, len(image_files)))
-            for i, col in enumerate(cols):
-                if i < len(image_files):
-                    with col:
-                        img_path = os.path.join(dataset_dir, image_files[i])
-                        img = Image.open(img_path)
-                        st.image(img)
-                        st.caption(image_files[i])
+    image_files = sample_dataset_images(dataset_dir)
+    if image_files:
+        cols = st.columns(len(image_files))
+        for col, image_file in zip(cols, image_files):
+            with col:
+                render_image(os.path.join(dataset_dir, image_file), thumbnail_size)
+                st.caption(image_file)